@@ -1,26 +1,102 @@
 import os
 import re
-import requests
 import json
+import time
+import threading
 from threading import Thread
-from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
-from flask import Flask
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
 
 # Load environment variables from the .env file first
 load_dotenv()
 
-# Initialize OpenAI client after loading env vars
-from openai import OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# The OpenAI SDK, Flask, Pillow/NumPy and the Socket Mode adapter are imported where they are first used,
+# so importing this module (Heroku boot, tests, benchmarks) doesn't pay for them. See clients.py.
+from clients import FAST_STARTUP, LINEAR_API_URL, TokenVerification, get_linear_session, get_openai_client
+
+# The Slack endpoint can be pointed at a local stand-in (see loadtest/).
+SLACK_API_URL = os.getenv("SLACK_API_URL")
+# Server for the $PORT binding: "asyncio" (health_server.py) or "flask" (Werkzeug's development server).
+HTTP_SERVER = os.getenv("HTTP_SERVER", "asyncio")
+# Seconds from a report reaching a worker to its ticket link. If GPT hasn't answered by then, the ticket
+# is created from the raw text and updated once the answer arrives. 0 waits for GPT however long it takes.
+ENRICH_DEADLINE = float(os.getenv("ENRICH_DEADLINE", 8))
+# Seconds before one OpenAI enrichment request is given up, and how many times a failed one is retried.
+# A call that outlives ENRICH_DEADLINE holds an enrichment thread at most this long per attempt.
+ENRICH_TIMEOUT = float(os.getenv("ENRICH_TIMEOUT", 60))
+ENRICH_MAX_RETRIES = int(os.getenv("ENRICH_MAX_RETRIES", 1))
+# Reaction added to a report as soon as a worker picks it up; empty disables it.
+ACK_REACTION = os.getenv("ACK_REACTION", "eyes")
+
+from slack_sdk import WebClient
+# In fast startup mode the bot token check (Bolt's auth.test) starts now and runs while slack_bolt
+# and the modules below are imported and the listeners register.
+slack_auth = TokenVerification(os.environ.get("SLACK_BOT_TOKEN"), SLACK_API_URL).start() if FAST_STARTUP else None
 
-from parse_fields import extract_title, extract_priority, extract_assignee, extract_labels, extract_description
+from slack_bolt import App
+from parse_fields import fallback_ticket, parse_ticket, strip_attachments
+from event_filter import REPORTABLE_SUBTYPES, filter_events, log_event
+from dedupe import drop_duplicate_events
+from socket_pool import SocketModePool
+from scheduler import SCHEDULER_WORKERS, get_scheduler
+import ratelimit
+import routing_config
+import intake
+import tickets
+from slack_context import thread_lines, trim_thread
+from triggers import match_trigger, strip_trigger
+from usage import DIMENSIONS, query_usage, record_completion_usage
+from health_server import HealthServer, Route
+from pipeline import Pipeline, Stage, recent_traces
+from warmup import LINEAR_METADATA, prefetch_linear_metadata, start_warm_up, status as warmup_status, team_metadata
+from metrics import IN_FLIGHT, QUEUE_WAIT, REPORTS, STAGE_LATENCY, TICKET_UPGRADES, PROMETHEUS_CONTENT_TYPE, record_upstream, render, track_stage
 
 # Initialize Slack Bolt app using your Bot token
-app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
+if SLACK_API_URL:
+    app = App(client=WebClient(token=os.environ.get("SLACK_BOT_TOKEN"), base_url=SLACK_API_URL),
+              token_verification_enabled=not FAST_STARTUP)
+else:
+    app = App(token=os.environ.get("SLACK_BOT_TOKEN"), token_verification_enabled=not FAST_STARTUP)
+if slack_auth is not None:
+    slack_auth.attach(app)
+# Ack and drop redelivered and irrelevant message events before any listener (or its logging) runs.
+app.use(drop_duplicate_events)
+app.use(filter_events)
+# Enrichment calls allowed to keep running after their report missed ENRICH_DEADLINE (each upgrades its
+# fallback ticket when GPT answers). With that many outstanding, a worker whose report misses the deadline
+# waits for its own call instead, so a slow OpenAI slows intake down rather than piling up calls.
+ENRICH_MAX_OVERRUNS = int(os.getenv("ENRICH_MAX_OVERRUNS", SCHEDULER_WORKERS))
+ENRICH_OVERRUNS = threading.BoundedSemaphore(ENRICH_MAX_OVERRUNS)
+# Enrichment runs here so a scheduler worker can stop waiting at the deadline: one thread per worker plus
+# one per allowed overrun, so a call never queues behind ones that overran.
+ENRICH_EXECUTOR = ThreadPoolExecutor(max_workers=SCHEDULER_WORKERS + ENRICH_MAX_OVERRUNS, thread_name_prefix="enrich")
+# Set in __main__ when the bot runs over Socket Mode; /healthz reports its connections.
+socket_pool = None
+
+def wait_for_slack_auth(timeout=None):
+    """
+    Blocks until the bot token has been verified. Raises BoltError if it is invalid.
+    Call before connecting to Slack; returns immediately when verification ran at import.
+    """
+    if slack_auth is not None:
+        slack_auth.wait(timeout)
+
+def enrich_bug_report(raw_text, images=None, channel=None, user=None, thread=None, logs=None, route=None):
+    """
+    Sends the raw bug report (and any screenshots or key frames from recordings) to GPT
+    and returns the structured ticket text.
+    thread holds the earlier "Name: text" messages when the report was filed inside a Slack thread
+    (see slack_context.py). Both are bounded by preprocess.preprocess before they go into the prompt.
+    logs is an optional list of excerpts from attached log files (see collect_text_attachments).
+    images is an optional list of (image_bytes, mimetype) tuples from collect_image_attachments.
+    channel and user are only used to attribute the completion's token usage; the model comes from
+    the route (see routing_config.py), the channel's unless route is given.
+    """
+    # Repeated log lines, long stack traces and long threads are condensed so the prompt stays bounded.
+    from preprocess import preprocess
+    with track_stage("preprocess"):
+        raw_text, thread = preprocess(raw_text, thread, channel=channel, user=user)
 
-def enrich_bug_report(raw_text):
     prompt = (
         "You are the best AI product manager. Read the following raw bug report and produce "
         "a structured ticket with the following exact format:\n\n"
@@ -34,12 +110,30 @@ def enrich_bug_report(raw_text):
         "2. **Bhavik Patel (Founding Engineer):** Best for addressing core functionality issues and backend performance problems.\n"
         "3. **Aaron (Frontend Engineer):** Best for addressing frontend issues and UI/UX problems.\n"
         "4. **Rushil Nagarsheth (Founding Engineer):** Best for managing infrastructure challenges and system integrations.\n\n"
-        "Raw Bug Report:\n"
+        + (f"Earlier Messages in the Slack Thread:\n{thread}\n\n" if thread else "")
+        + ("Excerpts From Attached Log Files:\n" + "\n\n".join(logs) + "\n\n" if logs else "")
+        + "Raw Bug Report:\n"
         f"{raw_text}\n"
     )
 
-    response = client.chat.completions.create(model="gpt-4o",
-    messages=[
+    user_content = prompt
+    if images:
+        from attachments import to_data_url
+        from packing import PACK_SCREENSHOTS, PACKED_IMAGES_NOTE, pack_images
+        # Screenshots and key frames from recordings go alongside the text in the same request.
+        image_note = "\nThe attached images are screenshots or key frames from the reporter's recording.\n"
+        if PACK_SCREENSHOTS and len(images) > 1:
+            images = pack_images(images)
+            image_note += PACKED_IMAGES_NOTE + "\n"
+        user_content = [{"type": "text", "text": prompt + image_note}]
+        for image_bytes, mimetype in images:
+            user_content.append({"type": "image_url", "image_url": {"url": to_data_url(image_bytes, mimetype)}})
+
+    client = get_openai_client().with_options(timeout=ENRICH_TIMEOUT, max_retries=ENRICH_MAX_RETRIES)
+    from openai import APIStatusError
+    try:
+        response = client.chat.completions.create(model=(route or routing_config.route_for(channel)).model,
+        messages=[
         {
             "role": "system",
             "content": (
@@ -47,90 +141,118 @@ def enrich_bug_report(raw_text):
                 "Do not alter the markdown syntax. Do not include any section with 'Attachments:' in your response."
             )
         },
-        {"role": "user", "content": prompt}
-    ],
-    temperature=0.7)
+        {"role": "user", "content": user_content}
+        ],
+        temperature=0.7)
+    except APIStatusError as e:
+        record_upstream("openai", e.status_code)
+        raise
+    except Exception:
+        record_upstream("openai", "error")
+        raise
+    record_upstream("openai", 200)
+    record_completion_usage(response, channel=channel, user=user)
     ticket = response.choices[0].message.content
 
-    # First, remove any lines that start with 'attachments:' (case-insensitive)
-    ticket = re.sub(r"(?im)^\s*attachments:.*(?:\n|$)", "", ticket)
-    # Then, remove any block that starts with '**Attachments:**' until the next header or end-of-string.
-    ticket = re.sub(r"(?is)\*\*Attachments:\*\*.*?(?=\n\*\*|$)", "", ticket)
-    # Specifically target "Attachments: None" pattern
-    ticket = re.sub(r"(?is)\*\*Attachments:\*\*\s*None.*?(?=\n\*\*|$)", "", ticket)
-
-    return ticket
+    # Remove any 'attachments:' lines and **Attachments:** blocks the model added anyway.
+    return strip_attachments(ticket)
 
-def create_linear_ticket(enriched_report):
-    LINEAR_API_KEY = os.getenv("LINEAR_API_KEY")
-    LINEAR_TEAM_ID = os.getenv("LINEAR_TEAM_ID")
-
-    if not LINEAR_API_KEY or not LINEAR_TEAM_ID:
-        raise ValueError("Please ensure LINEAR_API_KEY and LINEAR_TEAM_ID are set in your environment.")
-
-    # Extract fields from the GPT output.
-    title = extract_title(enriched_report)
-    description = extract_description(enriched_report)  # Extract only the description portion.
-    priority_str = extract_priority(enriched_report)
-    assignee_name = extract_assignee(enriched_report)
-    labels = extract_labels(enriched_report)
+def issue_input(fields, route=None):
+    """
+    Returns the Linear issue fields (title, description, priority, assignee and label ids) for a parsed
+    report, shared by issueCreate and issueUpdate. Label and assignee names resolve through the report
+    channel's route (the default route if none is given), whose default labels are used when none of
+    the report's labels map to a label id.
+    """
+    from routing_index import ROUTING_DECISIONS, suggest_assignee
 
-    if not labels:
-        labels = ["Bug"]
+    route = route or routing_config.route_for(None)
+    title = fields.title
+    description = fields.description  # Only the description portion.
+    priority_str = fields.priority
+    assignee_name = fields.assignee
+    labels = fields.labels or []
 
     priority_map = {"low": 0, "medium": 1, "high": 2}
     priority = priority_map.get(priority_str.lower(), 1) if priority_str else 1
 
     # Normalize assignee name for case-insensitive matching.
     assignee_name = assignee_name.lower() if assignee_name else ""
-    ASSIGNEE_MAP = {
-        "": "",
-        "tut50103": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-        "nikolas ioannou": "4c6b43ac-b384-42eb-8715-cfa156f58400",
-        "bhavik patel": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-        "kp07usa": "4c6b43ac-b384-42eb-8715-cfa156f58400",
-        "rushil nagarsheth": "4c6b43ac-b384-42eb-8715-cfa156f58400",
-        "manas": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-        "aaron": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-    }
 
-    assignee_id = ASSIGNEE_MAP.get(assignee_name)
+    # Whoever closed the most similar past tickets in the route's team, when the routing index is confident
+    # and they are in the channel's assignee pool; otherwise GPT's pick, with the route's team members
+    # prefetched at boot covering anyone the route's names don't.
+    metadata = team_metadata(route.team_id)
+    suggestion = suggest_assignee(f"{title}\n{description}", route.team_id)
+    if suggestion and route.allows(suggestion[0]):
+        assignee_id = suggestion[0]
+        ROUTING_DECISIONS.inc(source="index")
+    else:
+        assignee_id = route.assignees.get(assignee_name) or metadata["users"].get(assignee_name)
+        if not route.allows(assignee_id):
+            assignee_id = None
+        ROUTING_DECISIONS.inc(source="model" if assignee_id else "default")
     if not assignee_id:
-        print(f"Warning: Assignee '{assignee_name}' not found in the mapping. Falling back to 'aaron'.")
-        assignee_id = ASSIGNEE_MAP["aaron"]
-
-    TICKET_TYPE_MAP = {
-        "Bug": os.getenv("LINEAR_BUG_LABEL_ID", "dfcf45d1-f4a4-4ab8-8aef-3960defc8450"),
-        # "Bug Bot": os.getenv("LINEAR_BUG_LABEL_ID", "dfcf45d1-f4a4-4ab8-8aef-3960defc8450"),
-        "In QA": os.getenv("LINEAR_IN_QA_LABEL_ID", "ce778bdc-39e1-4a1b-a546-488fde56252b"),
-        "Internal Admin": os.getenv("LINEAR_INTERNAL_ADMIN_LABEL_ID", "031c70bb-cc93-40ec-a3dd-7ed36bc19b23"),
-        "Core Web": os.getenv("LINEAR_CORE_WEB_LABEL_ID", "1d8a8a3d-5813-439f-a421-641875357c99"),
-        "Core Mobile": os.getenv("LINEAR_CORE_MOBILE_LABEL_ID", "361e454d-9f41-494f-95ad-04301dbb3231"),
-        "Backend": os.getenv("LINEAR_BACKEND_LABEL_ID", "c3aa8f63-f8c8-4d22-915e-6ddab30829d7"),
-        "QA'd --> Functional": os.getenv("LINEAR_QA_FUNCTIONAL_LABEL_ID", "d8a01af7-45ed-4257-b039-7f1c0d4fab92")
-    }
+        print(f"Warning: Assignee '{assignee_name}' not found for route '{route.name}'. Using its fallback assignee.")
+        assignee_id = route.fallback_assignee
+
     mapped_labels = []
     for label in labels:
-        normalized = label.strip().capitalize()
-        if normalized in TICKET_TYPE_MAP:
-            mapped_labels.append(TICKET_TYPE_MAP[normalized])
+        name = label.strip().lower()
+        label_id = route.labels.get(name) or metadata["labels"].get(name)
+        if label_id and label_id not in mapped_labels:
+            mapped_labels.append(label_id)
     if not mapped_labels:
-        mapped_labels = [TICKET_TYPE_MAP["Bug"]]
-
-    variables = {
-        "input": {
-            "teamId": LINEAR_TEAM_ID,
-            "title": title,
-            "description": description,
-            "priority": priority
-        }
+        mapped_labels = list(route.default_labels)
+
+    issue = {
+        "title": title,
+        "description": description,
+        "priority": priority
     }
     if assignee_id:
-        variables["input"]["assigneeId"] = assignee_id
+        issue["assigneeId"] = assignee_id
     if mapped_labels:
-        variables["input"]["labelIds"] = mapped_labels
+        issue["labelIds"] = mapped_labels
+    return issue
 
-    url = "https://api.linear.app/graphql"
+def linear_mutation(mutation, variables, operation):
+    """
+    Posts a GraphQL mutation to Linear and returns the issue from data[operation].
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": os.getenv("LINEAR_API_KEY")
+    }
+
+    try:
+        response = get_linear_session().post(LINEAR_API_URL, headers=headers, json={"query": mutation, "variables": variables})
+    except Exception:
+        record_upstream("linear", "error")
+        raise
+    record_upstream("linear", response.status_code)
+    result = response.json()
+
+    if "errors" in result:
+        raise Exception(f"Linear API error: {result['errors']}")
+
+    return result["data"][operation]["issue"]
+
+def create_linear_ticket(enriched_report, fields=None, issue=None, route=None):
+    """
+    Creates the Linear issue for an enriched report in the route's team and returns it (id, title, url).
+    fields can be passed instead of parsing enriched_report, e.g. a fallback_ticket, or issue with the
+    issue_input of fields already worked out.
+    """
+    route = route or routing_config.route_for(None)
+    if not os.getenv("LINEAR_API_KEY") or not route.team_id:
+        raise ValueError(f"Please ensure LINEAR_API_KEY is set and route '{route.name}' has a team "
+                         "(LINEAR_TEAM_ID or the routing config).")
+
+    # Extract all fields from the GPT output in one pass.
+    if issue is None:
+        issue = issue_input(fields if fields is not None else parse_ticket(enriched_report), route)
+    variables = {"input": {"teamId": route.team_id, **issue}}
 
     mutation = """
     mutation IssueCreate($input: IssueCreateInput!) {
@@ -144,22 +266,67 @@ def create_linear_ticket(enriched_report):
       }
     }
     """
+    return linear_mutation(mutation, variables, "issueCreate")
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": LINEAR_API_KEY
-    }
+def update_linear_ticket(issue_id, enriched_report, route=None):
+    """
+    Rewrites an existing issue's fields from an enriched report (used to upgrade fallback tickets).
+    """
+    return update_linear_fields(issue_id, issue_input(parse_ticket(enriched_report), route))
 
-    response = requests.post(url, headers=headers, json={"query": mutation, "variables": variables})
-    result = response.json()
+def update_linear_fields(issue_id, fields):
+    """
+    Sends an issueUpdate with just the given issue fields (a subset of issue_input's output).
+    """
+    mutation = """
+    mutation IssueUpdate($id: String!, $input: IssueUpdateInput!) {
+      issueUpdate(id: $id, input: $input) {
+        success
+        issue {
+          id
+          title
+          url
+        }
+      }
+    }
+    """
+    return linear_mutation(mutation, {"id": issue_id, "input": fields}, "issueUpdate")
 
-    if "errors" in result:
-        raise Exception(f"Linear API error: {result['errors']}")
+@app.middleware
+def stamp_received_at(context, next):
+    """
+    Notes when Bolt received the event so listeners can measure how long they waited to run.
+    """
+    context["received_at"] = time.perf_counter()
+    next()
 
-    return result["data"]["issueCreate"]["issue"]
+def observe_delivery(event, context):
+    """
+    Records Slack delivery latency (event timestamp to listener start) and queue wait inside Bolt.
+    """
+    event_ts = event.get("event_ts") or event.get("ts")
+    if event_ts:
+        STAGE_LATENCY.observe(max(0.0, time.time() - float(event_ts)), stage="slack_delivery")
+    received_at = context.get("received_at")
+    if received_at is not None:
+        QUEUE_WAIT.observe(time.perf_counter() - received_at)
+
+def reply(say, text, thread_ts):
+    """
+    Posts a threaded reply, recording its latency and Slack's response status.
+    """
+    with track_stage("say"):
+        try:
+            response = say(text=text, thread_ts=thread_ts)
+        except Exception:
+            record_upstream("slack", "error")
+            raise
+    record_upstream("slack", getattr(response, "status_code", 200))
+    return response
 
 @app.event("app_mention")
-def handle_app_mention(event, say, logger):
+def handle_app_mention(event, say, logger, context):
+    observe_delivery(event, context)
     user = event.get("user")
     text = event.get("text", "")
     thread_ts = event.get("ts")
@@ -168,43 +335,321 @@ def handle_app_mention(event, say, logger):
     bot_id = os.getenv("SLACK_BOT_USER_ID")
     if not bot_id:
         logger.error("SLACK_BOT_USER_ID not found in environment variables")
-        say(
-            text=f"Sorry <@{user}>, there was an error processing your message.",
-            thread_ts=thread_ts
-        )
+        REPORTS.inc(outcome="error")
+        reply(say, f"Sorry <@{user}>, there was an error processing your message.", thread_ts)
         return
         
-    message_text = re.sub(rf"<@{bot_id}>\s*", "", text).strip()
+    message_text = clean_report_text(text, bot_id)
     logger.info(f"Cleaned message_text: {message_text!r}")
+    process_bug_report(event, message_text, say, logger)
 
-    # Check minimum length requirement
-    if len(message_text) < 10:
-        say(
-            text=f"Sorry <@{user}>, your bug report needs more detail (at least 10 characters).",
-            thread_ts=thread_ts
-        )
+def in_thread(event):
+    """
+    Returns True if the event is a reply inside an existing thread (not the thread's first message).
+    """
+    return bool(event.get("thread_ts")) and event.get("thread_ts") != event.get("ts")
+
+RATE_LIMIT_REASONS = {"user": "from you", "channel": "from this channel", "global": "are coming in"}
+
+def clean_report_text(text, bot_id):
+    """
+    Returns the report text without the bot mention.
+    """
+    return re.sub(rf"<@{bot_id}>\s*", "", text).strip()
+
+def process_bug_report(event, message_text, say, logger):
+    """
+    Turns a cleaned bug report into a Linear ticket and replies in the reporter's thread.
+    Shared by @mentions and plain messages that match a trigger.
+    Reports over a rate limit (see ratelimit.py) get a single throttle reply; the rest are queued on the
+    scheduler (see scheduler.py), so a flood from one channel or user can't hold up everyone else and
+    urgent reports go first.
+    """
+    user = event.get("user")
+    thread_ts = event.get("ts")
+
+    # Check minimum length requirement; a mention inside a thread can lean on the earlier replies.
+    if len(message_text) < 10 and not in_thread(event):
+        REPORTS.inc(outcome="too_short")
+        reply(say, f"Sorry <@{user}>, your bug report needs more detail (at least 10 characters).", thread_ts)
         return
 
+    # Token-bucket limits per user, channel and overall, checked before anything reaches OpenAI or Linear.
+    throttled = ratelimit.check(user=user, channel=event.get("channel"))
+    if throttled is not None:
+        REPORTS.inc(outcome="rate_limited")
+        logger.info(f"Rate limited report from {user} ({throttled.scope} limit)")
+        if throttled.notify:
+            reply(say, f"Sorry <@{user}>, too many bug reports {RATE_LIMIT_REASONS[throttled.scope]} right now. "
+                       f"Please try again in {max(1, round(throttled.retry_after))} seconds.", thread_ts)
+        return
+
+    get_scheduler().submit(
+        lambda: create_ticket_for_report(event, message_text, say, logger),
+        channel=event.get("channel"),
+        user=user,
+        text=message_text,
+    )
+
+def enrich_within_deadline(deadline, message_text, **kwargs):
+    """
+    Runs enrich_bug_report(message_text, **kwargs), giving up waiting at deadline (a time.monotonic()
+    value, or None to wait however long it takes). Returns (future, enriched report or None if the
+    deadline passed first); the future keeps running and resolves to the report later.
+    Only ENRICH_MAX_OVERRUNS calls are left running at a time; past that, this waits for the call to
+    finish (at most ENRICH_TIMEOUT per attempt) and returns None only if it failed.
+    """
+    if deadline is None:
+        return None, enrich_bug_report(message_text, **kwargs)
+    enrichment = ENRICH_EXECUTOR.submit(enrich_bug_report, message_text, **kwargs)
+    try:
+        return enrichment, enrichment.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        pass
+    if ENRICH_OVERRUNS.acquire(blocking=False):
+        enrichment.add_done_callback(lambda future: ENRICH_OVERRUNS.release())
+        return enrichment, None
     try:
-        # Pass the cleaned message_text to enrich_bug_report
-        enriched_report = enrich_bug_report(message_text)
-        ticket = create_linear_ticket(enriched_report)
-        response_message = f"Thanks for reporting the bug, <@{user}>! A ticket has been created in Linear: {ticket.get('url', 'URL not available')}"
+        return enrichment, enrichment.result()
+    except Exception:
+        # A fallback ticket is filed; upgrade_ticket records the failed enrichment.
+        return enrichment, None
+
+def upgrade_ticket(ticket, enrichment, logger, route=None):
+    """
+    Done callback for an enrichment that missed its deadline: rewrites the fallback ticket with GPT's
+    title, description, priority, assignee and labels.
+    """
+    if enrichment.exception() is not None:
+        logger.error(f"Enrichment for fallback ticket {ticket.get('id')} failed: {enrichment.exception()}")
+        TICKET_UPGRADES.inc(outcome="enrich_failed")
+        return
+    try:
+        fields = issue_input(parse_ticket(enrichment.result()), route)
+        with track_stage("upgrade_ticket"):
+            update_linear_fields(ticket["id"], fields)
+        tickets.update_fields(ticket["id"], fields)
+        TICKET_UPGRADES.inc(outcome="updated")
     except Exception as e:
-        logger.error(f"Error processing bug report from mention: {e}")
+        logger.error(f"Error upgrading fallback ticket {ticket.get('id')}: {e}")
+        TICKET_UPGRADES.inc(outcome="error")
+
+def remember_ticket(channel, ts, ticket, message_text, issue, logger):
+    """
+    Records which ticket a Slack message became, with its issue_input. Never fails the report.
+    """
+    try:
+        tickets.record_ticket(channel, ts, ticket, message_text, issue)
+    except Exception as e:
+        logger.warning(f"Could not record ticket for {channel}/{ts}: {e}")
+
+def record_intake(event, outcome, result, logger):
+    """
+    Adds a processed report to the intake rollups behind /intake and the digest: outcome, time from
+    the Slack message to the reply, and (unless it failed) the ticket's priority, labels and assignee.
+    Never fails the report.
+    """
+    try:
+        fields, issue, ticket = result if result else (None, {}, {})
+        intake.record_report(
+            event.get("channel"),
+            event.get("user"),
+            outcome,
+            max(0.0, time.time() - float(event.get("ts") or time.time())),
+            priority=(fields.priority or "Medium").capitalize() if fields else None,
+            labels=[label.strip() for label in fields.labels or ["Bug"]] if fields else (),
+            assignee=issue.get("assigneeId"),
+            issue_id=ticket.get("id"),
+        )
+    except Exception as e:
+        logger.warning(f"Could not record intake for {event.get('channel')}/{event.get('ts')}: {e}")
+
+def ensure_linear_metadata(route=None):
+    """
+    Loads the Linear team members and labels of the route's team (every routed team if route is None)
+    if the boot warm-up hasn't (yet), so ticket creation can map names to ids.
+    """
+    team_ids = [route.team_id] if route is not None else routing_config.current().team_ids()
+    missing = [team_id for team_id in team_ids if team_id and team_id not in LINEAR_METADATA]
+    if missing:
+        prefetch_linear_metadata(missing)
+
+def acknowledge(event):
+    """
+    Reacts to the report with ACK_REACTION so the reporter knows it is being worked on.
+    """
+    if ACK_REACTION:
+        app.client.reactions_add(channel=event.get("channel"), name=ACK_REACTION, timestamp=event.get("ts"))
+
+def create_ticket_for_report(event, message_text, say, logger):
+    """
+    Runs on a scheduler worker: enriches the report, creates the Linear ticket and replies with its link.
+    The work runs as a dependency graph (see pipeline.py): the acknowledgement, thread context,
+    attachments and Linear metadata all start at once, enrichment starts when its inputs are ready and
+    ticket creation when enrichment and the metadata are. Each report's trace is logged and kept for /traces.
+    If enrichment isn't done within ENRICH_DEADLINE seconds, the ticket is created from the raw text
+    (see fallback_ticket) and upgraded by upgrade_ticket once GPT answers.
+    """
+    user = event.get("user")
+    thread_ts = event.get("ts")
+    channel = event.get("channel")
+    files = event.get("files", [])
+    deadline = time.monotonic() + ENRICH_DEADLINE if ENRICH_DEADLINE else None
+    # Looked up once, so a config reload mid-report can't split it between two routes.
+    route = routing_config.route_for(channel)
+    from attachments import collect_image_attachments, collect_text_attachments
+
+    def enrich(thread_context, attachments, logs):
+        return enrich_within_deadline(deadline, message_text, images=attachments, channel=channel, user=user,
+                                      thread=thread_context, logs=logs, route=route)
+
+    def create_ticket(enrich, linear_metadata, thread_context):
+        enrichment, enriched_report = enrich
+        if enriched_report is not None:
+            fields = parse_ticket(enriched_report)
+        else:
+            # GPT missed the deadline: file the raw report now and rewrite the ticket when GPT answers.
+            fields = fallback_ticket("\n\n".join(filter(None, (message_text, trim_thread(thread_context)))))
+        issue = issue_input(fields, route)
+        ticket = create_linear_ticket(None, issue=issue, route=route)
+        # Remembered so an edit to the Slack message can update this ticket (see handle_report_edit).
+        remember_ticket(channel, thread_ts, ticket, message_text, issue, logger)
+        if enriched_report is None:
+            enrichment.add_done_callback(lambda future: upgrade_ticket(ticket, future, logger, route))
+        return ticket, enriched_report is None, fields, issue
+
+    report = Pipeline([
+        Stage("ack", lambda: acknowledge(event), optional=True),
+        # Mentions inside a thread usually point at a bug described in the earlier replies.
+        Stage("thread_context", lambda: thread_lines(app.client, channel, event["thread_ts"], before_ts=thread_ts)
+              if in_thread(event) else [], optional=True, default=[]),
+        # Screenshots, recordings and logs are optional; a failed download never blocks the ticket.
+        Stage("attachments", lambda: collect_image_attachments(files, logger), optional=True, default=[]),
+        Stage("logs", lambda: collect_text_attachments(files, logger), optional=True, default=[]),
+        Stage("linear_metadata", lambda: ensure_linear_metadata(route), optional=True),
+        Stage("enrich", enrich, deps=("thread_context", "attachments", "logs")),
+        Stage("create_ticket", create_ticket, deps=("enrich", "linear_metadata", "thread_context")),
+    ], label=f"report {channel}/{thread_ts}")
+
+    IN_FLIGHT.inc()
+    created = None
+    try:
+        ticket, fallback, fields, issue = report.run()["create_ticket"]
+        created = fields, issue, ticket
+        outcome = "created_fallback" if fallback else "created"
+        if fallback:
+            REPORTS.inc(outcome="created_fallback")
+            response_message = (f"Thanks for reporting the bug, <@{user}>! A ticket has been created in Linear: "
+                                f"{ticket.get('url', 'URL not available')} (details are still being filled in)")
+        else:
+            REPORTS.inc(outcome="created")
+            response_message = f"Thanks for reporting the bug, <@{user}>! A ticket has been created in Linear: {ticket.get('url', 'URL not available')}"
+    except Exception as e:
+        logger.error(f"Error processing bug report: {e}")
+        REPORTS.inc(outcome="error")
+        outcome = "error"
         response_message = f"Sorry <@{user}>, there was an error processing your bug report."
+    finally:
+        IN_FLIGHT.dec()
 
-    say(text=response_message, thread_ts=thread_ts)
+    reply(say, response_message, thread_ts)
+    record_intake(event, outcome, created, logger)
 
 @app.event("message")
-def handle_message_events(body, logger):
+def handle_message_events(body, event, say, logger, context):
     """
     Handle message events that aren't mentions.
-    This prevents the "Unhandled request" warnings in the logs.
+    Plain messages matching a trigger (e.g. "bug!") are processed as bug reports; everything else is ignored.
+    """
+    # Log a sampled, truncated summary; full payloads are too large to log on every message.
+    log_event(logger, "Received message event", body)
+    if event.get("subtype") == "message_changed":
+        handle_report_edit(event, say, logger)
+        return
+    if event.get("subtype") not in REPORTABLE_SUBTYPES:
+        return
+    text = event.get("text", "")
+    match = match_trigger(text, event.get("channel"))
+    if not match:
+        return
+    # Messages that also mention the bot are handled by handle_app_mention.
+    bot_id = os.getenv("SLACK_BOT_USER_ID")
+    if bot_id and f"<@{bot_id}>" in text:
+        return
+    observe_delivery(event, context)
+    process_bug_report(event, strip_trigger(text, match), say, logger)
+
+# How changed issue fields are named in the edit confirmation.
+EDITABLE_FIELD_NAMES = {"assigneeId": "assignee", "labelIds": "labels"}
+
+def handle_report_edit(event, say, logger):
+    """
+    Keeps a ticket in step with edits to the Slack message it was created from. Edits that barely
+    change the text (see tickets.is_material) are ignored; otherwise the new text is re-enriched on
+    the scheduler and only the ticket fields that actually changed are sent to Linear.
     """
-    # Log the full body for debugging purposes
-    logger.info(f"Received message event: {body}")
-    # No response needed for regular messages
+    message = event.get("message") or {}
+    channel = event.get("channel")
+    record = tickets.find_ticket(channel, message.get("ts"))
+    if record is None:
+        return
+    text = message.get("text", "")
+    match = match_trigger(text, channel)
+    message_text = strip_trigger(text, match) if match else clean_report_text(text, os.getenv("SLACK_BOT_USER_ID", ""))
+    if not tickets.is_material(record["text"], message_text):
+        tickets.REPORT_EDITS.inc(outcome="minor")
+        return
+    user = message.get("user")
+    if ratelimit.check(user=user, channel=channel) is not None:
+        tickets.REPORT_EDITS.inc(outcome="rate_limited")
+        return
+    get_scheduler().submit(
+        lambda: apply_report_edit(record, message, channel, message_text, say, logger),
+        channel=channel,
+        user=user,
+        text=message_text,
+    )
+
+def apply_report_edit(record, message, channel, message_text, say, logger):
+    """
+    Runs on a scheduler worker: re-enriches an edited report and sends a minimal issueUpdate.
+    The thread context, screenshots and log excerpts are fetched again from the edited message, as
+    create_ticket_for_report fetches them, so the re-enrichment sees the same inputs the ticket was made from.
+    """
+    user = message.get("user")
+    files = message.get("files", [])
+    route = routing_config.route_for(channel)
+    from attachments import collect_image_attachments, collect_text_attachments
+
+    def enrich(thread_context, attachments, logs):
+        return enrich_bug_report(message_text, images=attachments, channel=channel, user=user,
+                                 thread=thread_context, logs=logs, route=route)
+
+    edit = Pipeline([
+        Stage("thread_context", lambda: thread_lines(app.client, channel, message["thread_ts"], before_ts=message.get("ts"))
+              if in_thread(message) else [], optional=True, default=[]),
+        Stage("attachments", lambda: collect_image_attachments(files, logger), optional=True, default=[]),
+        Stage("logs", lambda: collect_text_attachments(files, logger), optional=True, default=[]),
+        Stage("enrich", enrich, deps=("thread_context", "attachments", "logs")),
+    ], label=f"edit {channel}/{message.get('ts')}")
+    try:
+        enriched_report = edit.run()["enrich"]
+        fields = issue_input(parse_ticket(enriched_report), route)
+        changes = tickets.changed_fields(record["fields"], fields)
+        if changes:
+            with track_stage("update_ticket"):
+                update_linear_fields(record["issue_id"], changes)
+        tickets.update_fields(record["issue_id"], fields, text=message_text)
+    except Exception as e:
+        logger.error(f"Error updating ticket {record['issue_id']} after an edit: {e}")
+        tickets.REPORT_EDITS.inc(outcome="error")
+        return
+    if not changes:
+        tickets.REPORT_EDITS.inc(outcome="unchanged")
+        return
+    tickets.REPORT_EDITS.inc(outcome="updated")
+    changed = ", ".join(EDITABLE_FIELD_NAMES.get(key, key) for key in changes)
+    reply(say, f"Updated the ticket with your edit ({changed}): {record['url']}", message.get("ts"))
 
 @app.event("message_changed")
 def handle_message_changed_events(body, logger):
@@ -212,29 +657,120 @@ def handle_message_changed_events(body, logger):
     Handle message change events.
     This prevents the "Unhandled request" warnings in the logs.
     """
-    # Log the full body for debugging purposes
-    logger.info(f"Received message changed event: {body}")
+    # Log a sampled, truncated summary; full payloads are too large to log on every message.
+    log_event(logger, "Received message changed event", body)
     # No response needed for message changes
 
-# Minimal Flask app to bind to the $PORT for Heroku.
-flask_app = Flask(__name__)
+# Routes for the $PORT binding. Each handler takes the parsed query string and returns
+# (status, content type, body); both health_server and the Flask app serve them.
+def http_index(query):
+    return 200, "text/plain; charset=utf-8", "Slack Bot is running!"
+
+def http_healthz(query):
+    # 503 until the boot warm-up has opened upstream connections and loaded Linear metadata.
+    warmup = warmup_status()
+    if socket_pool is not None:
+        warmup["socket_mode"] = socket_pool.health()
+    return 200 if warmup["state"] == "ready" else 503, "application/json", json.dumps(warmup)
+
+def http_metrics(query):
+    # Prometheus text format: per-stage latency, queue wait, upstream statuses and in-flight reports.
+    return 200, PROMETHEUS_CONTENT_TYPE, render()
+
+def http_usage(query):
+    # Token and cost totals from the daily rollups, e.g. /usage?by=user&days=7
+    dimension = query.get("by", ["channel"])[0]
+    if dimension not in DIMENSIONS:
+        return 400, "application/json", json.dumps({"error": f"by must be one of {', '.join(DIMENSIONS)}"})
+    try:
+        days = int(query.get("days", [30])[0])
+    except ValueError:
+        days = 30
+    return 200, "application/json", json.dumps({"by": dimension, "days": days, "usage": query_usage(dimension, days)})
+
+def http_intake(query):
+    # Intake of one day or ISO week from the rollups, e.g. /intake?period=2024-W19 (default: today)
+    period = query.get("period", [intake.day_period(time.time())])[0]
+    if period == "week":
+        period = intake.week_period(time.time())
+    return 200, "application/json", json.dumps(intake.query_period(period))
+
+def assignee_names():
+    # Linear user ids to names for the intake digest, from the metadata prefetched at boot for every team.
+    names = {}
+    for metadata in list(LINEAR_METADATA.values()):
+        for name, user_id in metadata["users"].items():
+            names.setdefault(user_id, name)
+    return names
+
+def http_traces(query):
+    # Stage timings and critical path of the most recent reports, newest first.
+    return 200, "application/json", json.dumps({"traces": recent_traces()})
+
+HTTP_ROUTES = {
+    "/": Route(http_index),
+    "/healthz": Route(http_healthz),
+    "/metrics": Route(http_metrics),
+    "/usage": Route(http_usage, blocking=True),
+    "/intake": Route(http_intake, blocking=True),
+    "/traces": Route(http_traces),
+}
+
+def create_flask_app():
+    """
+    Builds a Flask app serving HTTP_ROUTES, for HTTP_SERVER=flask and WSGI servers.
+    Flask is imported here rather than at module load.
+    """
+    from flask import Flask, Response, request
+
+    flask_app = Flask(__name__)
 
-@flask_app.route("/")
-def index():
-    return "Slack Bot is running!", 200
+    def view(route):
+        def serve():
+            status, content_type, body = route.handler(request.args.to_dict(flat=False))
+            return Response(body, status=status, content_type=content_type)
+        return serve
+
+    for path, route in HTTP_ROUTES.items():
+        flask_app.add_url_rule(path, endpoint=route.handler.__name__, view_func=view(route))
+    return flask_app
 
 if __name__ == "__main__":
+    # Warm upstream connections and prefetch Linear metadata while Socket Mode connects.
+    start_warm_up()
+    # Daily/weekly intake digest to DIGEST_CHANNEL, if configured.
+    intake.start_digests(app.client, names=assignee_names)
+    # Picks up edits to the channel routing config without a restart.
+    routing_config.start_watching()
+    # Loads the assignee routing index and keeps it in step with Linear's completed issues. Started on its
+    # own rather than as a warm-up step, so WARMUP_ENABLED=false doesn't stop it.
+    import routing_index
+    routing_index.start_sync()
+
+    socket_pool = SocketModePool(app, os.environ["SLACK_APP_TOKEN"])
+
     # Start the Slack bot in a separate thread.
     def start_bot():
-        handler = SocketModeHandler(app, os.environ["SLACK_APP_TOKEN"])
-        handler.start()
+        try:
+            # Don't connect until the token check started at import has passed.
+            wait_for_slack_auth()
+        except Exception as e:
+            # Same outcome as an invalid token at App(token=...) construction: the process exits.
+            app.logger.error(f"Slack token verification failed: {e}")
+            os._exit(1)
+        # Several concurrent connections, rotated with overlap (see socket_pool.py).
+        socket_pool.start()
 
     bot_thread = Thread(target=start_bot)
     bot_thread.start()
 
-    # Bind Flask to the $PORT provided by Heroku.
+    # Bind the health/metrics server to the $PORT provided by Heroku.
     port = int(os.environ.get("PORT", 5003))
-    flask_app.run(host="0.0.0.0", port=port)
+    if HTTP_SERVER == "flask":
+        # Werkzeug's development server, kept for local debugging.
+        create_flask_app().run(host="0.0.0.0", port=port)
+    else:
+        HealthServer(HTTP_ROUTES, port=port).serve_forever()
 
 # import os
 # import re
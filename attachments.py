@@ -0,0 +1,278 @@
+import io
+import os
+import re
+import mmap
+import base64
+import tempfile
+import requests
+from PIL import Image
+
+from frames import extract_key_frames, is_animated
+
+# Formats the vision model accepts as-is.
+SUPPORTED_IMAGE_FORMATS = ["png", "jpeg", "gif", "webp"]
+# Cap on the number of images sent with a single report, across all attachments.
+MAX_VISION_IMAGES = int(os.getenv("MAX_VISION_IMAGES", 8))
+# Text attachments (.log/.txt) are spooled to disk and scanned through mmap, never read into memory whole.
+# Larger files are skipped.
+MAX_TEXT_ATTACHMENT_BYTES = int(os.getenv("MAX_TEXT_ATTACHMENT_BYTES", 500 * 1024 * 1024))
+# Characters of log excerpts passed to enrichment per report, and lines of context around each error.
+LOG_EXCERPT_MAX_CHARS = int(os.getenv("LOG_EXCERPT_MAX_CHARS", 8000))
+LOG_WINDOW_BEFORE = int(os.getenv("LOG_WINDOW_BEFORE", 5))
+LOG_WINDOW_AFTER = int(os.getenv("LOG_WINDOW_AFTER", 15))
+# Longest single window and line kept, so one minified line can't take the whole budget.
+LOG_WINDOW_MAX_CHARS = 2000
+LOG_LINE_MAX_CHARS = 300
+# Distinct error lines whose repeats are counted; further new ones are only counted in total.
+MAX_DISTINCT_ERRORS = 10000
+TEXT_EXTENSIONS = (".log", ".txt")
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Keywords that open an error region in a log file (error, fatal, critical, panic, exception, traceback,
+# segfault in the usual casings; error and exception also as the end of a class name like IOError).
+_LOG_ERROR_RE = re.compile(
+    rb"E(?:rror|RROR|xception|XCEPTION)|e(?:rror|xception)|\b(?:F(?:atal|ATAL)|fatal|C(?:ritical|RITICAL)|critical|"
+    rb"P(?:anic|ANIC)|panic|T(?:raceback|RACEBACK)|traceback|S(?:egfault|EGFAULT)|segfault)\b"
+)
+# Finds candidates for _LOG_ERROR_RE: a first letter and the rest of a keyword in any casing. The leading
+# character class lets the regex engine skip most positions with one lookup, several times faster than
+# searching with _LOG_ERROR_RE itself; each candidate (e.g. "catalina", which has c + "atal") is then
+# checked with _LOG_ERROR_RE.match.
+_LOG_CANDIDATE_RE = re.compile(
+    rb"[EeFfCcPpTtSs](?:rror|RROR|atal|ATAL|ritical|RITICAL|anic|ANIC|xception|XCEPTION|raceback|RACEBACK|"
+    rb"egfault|EGFAULT)"
+)
+# Digits and hex ids differ between repeats of the same error line.
+_LOG_VARIABLE_RE = re.compile(rb"0x[0-9a-fA-F]+|\b[0-9a-fA-F]{8,}\b|\d+")
+
+
+def download_slack_file(url):
+    """
+    Downloads the file from Slack using the bot token for authorization.
+    Returns the binary content of the file.
+    """
+    slack_token = os.getenv("SLACK_BOT_TOKEN")
+    headers = {"Authorization": f"Bearer {slack_token}"}
+    response = requests.get(url, headers=headers)
+    response.raise_for_status()
+    return response.content
+
+
+def spool_slack_file(url, directory, max_bytes=MAX_TEXT_ATTACHMENT_BYTES):
+    """
+    Streams a Slack file to a temporary file in directory, chunk by chunk, using the bot token.
+    Returns the file's path. Raises ValueError if the file is larger than max_bytes.
+    """
+    slack_token = os.getenv("SLACK_BOT_TOKEN")
+    headers = {"Authorization": f"Bearer {slack_token}"}
+    with requests.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as spool:
+            for chunk in response.iter_content(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"text attachment is over {max_bytes} bytes")
+                spool.write(chunk)
+            return spool.name
+
+
+def _line_start(data, position, lines):
+    """
+    Returns the offset of the line `lines` lines above the one containing position.
+    """
+    for _ in range(lines + 1):
+        position = data.rfind(b"\n", 0, position)
+        if position < 0:
+            return 0
+    return position + 1
+
+
+def _line_end(data, position, lines):
+    """
+    Returns the offset just past the end of the line `lines` lines below the one containing position.
+    """
+    for _ in range(lines + 1):
+        newline = data.find(b"\n", position)
+        if newline < 0:
+            return len(data)
+        position = newline + 1
+    return position
+
+
+def _count_newlines(data, start, end):
+    count = 0
+    for offset in range(start, end, SPOOL_CHUNK_BYTES):
+        count += data[offset:min(end, offset + SPOOL_CHUNK_BYTES)].count(b"\n")
+    return count
+
+
+def _format_window(data, start, end):
+    text = data[start:min(end, start + LOG_WINDOW_MAX_CHARS * 4)].decode("utf-8", errors="replace")
+    lines = [line if len(line) <= LOG_LINE_MAX_CHARS else line[:LOG_LINE_MAX_CHARS] + " [...]" for line in text.splitlines()]
+    return "\n".join(lines)[:LOG_WINDOW_MAX_CHARS]
+
+
+def scan_log_file(path, name, max_chars=LOG_EXCERPT_MAX_CHARS):
+    """
+    Returns an excerpt of a log file for the enrichment prompt, at most about max_chars long.
+    The file is memory-mapped and searched with a compiled pattern for error lines; each distinct error
+    (ignoring numbers and ids) contributes a window of LOG_WINDOW_BEFORE/LOG_WINDOW_AFTER lines, and
+    repeats are only counted. A file without errors contributes its last lines. Only the windows are
+    ever copied out of the mapping, so memory use doesn't grow with the file.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return ""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        windows, repeats = [], {}
+        used, window_end, untracked = 0, 0, 0
+        line_number, counted_to = 1, 0
+        if hasattr(data, "madvise"):
+            data.madvise(mmap.MADV_SEQUENTIAL)
+        position = 0
+        while True:
+            match = _LOG_CANDIDATE_RE.search(data, position)
+            if match is None:
+                break
+            if not _LOG_ERROR_RE.match(data, match.start()):
+                position = match.start() + 1
+                continue
+            # One entry per line, however many keywords it contains.
+            line_start = data.rfind(b"\n", 0, match.start()) + 1
+            line_end = data.find(b"\n", match.end())
+            position = size if line_end < 0 else line_end + 1
+            key = _LOG_VARIABLE_RE.sub(b"#", data[line_start:min(position, line_start + 200)].strip())
+            if key in repeats:
+                repeats[key] += 1
+                continue
+            if len(repeats) >= MAX_DISTINCT_ERRORS:
+                untracked += 1
+                continue
+            repeats[key] = 1
+            if line_start < window_end or used >= max_chars:
+                # Already shown in the previous window, or the budget is spent; still counted above.
+                continue
+            start = max(window_end, _line_start(data, line_start, LOG_WINDOW_BEFORE))
+            end = _line_end(data, line_start, LOG_WINDOW_AFTER)
+            line_number += _count_newlines(data, counted_to, start)
+            counted_to = start
+            window = _format_window(data, start, end)
+            windows.append((line_number, key, window))
+            used += len(window)
+            window_end = end
+        if not windows:
+            start = _line_start(data, size, LOG_WINDOW_BEFORE + LOG_WINDOW_AFTER)
+            tail = _format_window(data, start, size)
+            return f"Log file {name} ({size:,} bytes, no error lines found), last lines:\n{tail}"[:max_chars]
+
+    distinct = f"{len(repeats)}+" if untracked else str(len(repeats))
+    parts = [f"Log file {name} ({size:,} bytes, {distinct} distinct error lines):"]
+    for line_number, key, window in windows:
+        count = repeats[key]
+        parts.append(f"--- from line {line_number}" + (f" (this error occurs {count} times)" if count > 1 else "") + f" ---\n{window}")
+    return "\n".join(parts)[:max_chars]
+
+
+def is_text_attachment(file_info):
+    name = (file_info.get("name") or "").lower()
+    return name.endswith(TEXT_EXTENSIONS) or file_info.get("mimetype") == "text/plain"
+
+
+def collect_text_attachments(files, logger=None, max_chars=LOG_EXCERPT_MAX_CHARS):
+    """
+    Downloads the .log/.txt files attached to a Slack message to a temporary directory and returns
+    their error excerpts (see scan_log_file), at most max_chars in total. Files that fail to download
+    or are too large are skipped (and logged).
+    """
+    excerpts, remaining = [], max_chars
+    text_files = [file_info for file_info in files or [] if is_text_attachment(file_info)]
+    if not text_files:
+        return excerpts
+    with tempfile.TemporaryDirectory(prefix="bugbot-logs-") as directory:
+        for file_info in text_files:
+            url = file_info.get("url_private_download") or file_info.get("url_private")
+            if not url or remaining <= 0:
+                continue
+            try:
+                path = spool_slack_file(url, directory)
+                excerpt = scan_log_file(path, file_info.get("name") or "attachment.log", remaining)
+                os.remove(path)
+            except Exception as e:
+                if logger:
+                    logger.warning(f"Skipping text attachment {file_info.get('name')!r}: {e}")
+                continue
+            if excerpt:
+                excerpts.append(excerpt)
+                remaining -= len(excerpt)
+    return excerpts
+
+
+def ensure_supported_format(file_data, desired_format="JPEG"):
+    """
+    Uses Pillow to verify that file_data is in one of the supported formats (png, jpeg, gif, webp).
+    If not, it converts the image to the desired format (JPEG by default).
+    Returns the (possibly converted) image data and a filename.
+    """
+    try:
+        image = Image.open(io.BytesIO(file_data))
+    except Exception as e:
+        raise ValueError(f"Error opening image: {e}")
+
+    if image.format and image.format.lower() in SUPPORTED_IMAGE_FORMATS:
+        # If it's already in a supported format, we return the original data.
+        return file_data, f"image.{image.format.lower()}"
+
+    # Otherwise, convert the image to the desired format.
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format=desired_format)
+    return output.getvalue(), f"image.{desired_format.lower()}"
+
+
+def prepare_image_attachment(file_data):
+    """
+    Turns one image attachment into the images that go to vision analysis.
+    Animated GIF/APNG/WebP files are reduced to a handful of key frames; still images
+    pass through ensure_supported_format.
+    Returns a list of (image_bytes, mimetype) tuples.
+    """
+    try:
+        image = Image.open(io.BytesIO(file_data))
+    except Exception as e:
+        raise ValueError(f"Error opening image: {e}")
+
+    if is_animated(image):
+        return [(frame, "image/jpeg") for frame in extract_key_frames(file_data)]
+
+    data, filename = ensure_supported_format(file_data)
+    return [(data, f"image/{filename.rsplit('.', 1)[-1]}")]
+
+
+def collect_image_attachments(files, logger=None, max_images=MAX_VISION_IMAGES):
+    """
+    Downloads the image files attached to a Slack message and prepares them for vision analysis.
+    Attachments that fail to download or decode are skipped (and logged) rather than failing the report.
+    Returns at most max_images (image_bytes, mimetype) tuples.
+    """
+    images = []
+    for file_info in files or []:
+        if len(images) >= max_images:
+            break
+        if not (file_info.get("mimetype") or "").startswith("image/"):
+            continue
+        url = file_info.get("url_private_download") or file_info.get("url_private")
+        if not url:
+            continue
+        try:
+            images.extend(prepare_image_attachment(download_slack_file(url)))
+        except Exception as e:
+            if logger:
+                logger.warning(f"Skipping attachment {file_info.get('name')!r}: {e}")
+    return images[:max_images]
+
+
+def to_data_url(image_bytes, mimetype):
+    """
+    Encodes image bytes as a base64 data URL for an OpenAI image_url content part.
+    """
+    return f"data:{mimetype};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
@@ -0,0 +1,100 @@
+"""
+Compares sending screenshots one image per content part against packing them into composites.
+
+Offline (default) it reports estimated image tokens and packing time for a synthetic report.
+With --live and OPENAI_API_KEY set it also sends both variants to gpt-4o and reports the
+billed prompt tokens and response time.
+
+Run from the repository root:
+    python -m benchmarks.packing_bench
+    python -m benchmarks.packing_bench --live --runs 3
+"""
+import argparse
+import io
+import os
+import random
+import time
+
+from PIL import Image, ImageDraw
+from dotenv import load_dotenv
+
+from attachments import to_data_url
+from packing import estimate_image_tokens, pack_images
+
+# (width, height) of typical screenshots: phone, laptop, cropped dialog, toast.
+SCREENSHOT_SIZES = [(1170, 2532), (1440, 900), (640, 480), (420, 160), (800, 600), (360, 640)]
+
+
+def make_screenshot(width, height, seed):
+    """
+    Draws a fake UI screenshot: header bar, a few text-like lines and a red error box.
+    """
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, width, height // 12), fill=(40, 60, 120))
+    for line in range(12):
+        y = height // 8 + line * height // 16
+        draw.rectangle((20, y, 20 + rng.randint(width // 4, width - 40), y + height // 40), fill=(180, 180, 180))
+    draw.rectangle((width // 6, height // 2, width * 5 // 6, height // 2 + height // 10), outline=(200, 0, 0), width=4)
+    draw.text((width // 6 + 10, height // 2 + 10), f"Error {rng.randint(400, 599)}: request failed", fill=(200, 0, 0))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue(), "image/jpeg"
+
+
+def image_tokens(images):
+    total = 0
+    for image_bytes, _ in images:
+        total += estimate_image_tokens(*Image.open(io.BytesIO(image_bytes)).size)
+    return total
+
+
+def live_call(client, images):
+    content = [{"type": "text", "text": "Describe any errors visible in these bug report screenshots in one sentence each."}]
+    for image_bytes, mimetype in images:
+        content.append({"type": "image_url", "image_url": {"url": to_data_url(image_bytes, mimetype)}})
+    start = time.perf_counter()
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[{"role": "user", "content": content}],
+        max_tokens=200,
+        temperature=0,
+    )
+    return time.perf_counter() - start, response.usage.prompt_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=len(SCREENSHOT_SIZES), help="screenshots per report")
+    parser.add_argument("--runs", type=int, default=1, help="live calls per mode")
+    parser.add_argument("--live", action="store_true", help="also call the OpenAI API")
+    args = parser.parse_args()
+
+    sizes = [SCREENSHOT_SIZES[i % len(SCREENSHOT_SIZES)] for i in range(args.count)]
+    images = [make_screenshot(width, height, seed) for seed, (width, height) in enumerate(sizes)]
+
+    start = time.perf_counter()
+    packed = pack_images(images)
+    pack_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'mode':<10}{'images':>8}{'est. tokens':>14}")
+    print(f"{'per-image':<10}{len(images):>8}{image_tokens(images):>14}")
+    print(f"{'packed':<10}{len(packed):>8}{image_tokens(packed):>14}")
+    print(f"packing time: {pack_ms:.1f} ms")
+
+    if not args.live:
+        return
+
+    load_dotenv()
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    print(f"\n{'mode':<10}{'prompt tokens':>15}{'mean latency':>15}")
+    for mode, payload in (("per-image", images), ("packed", packed)):
+        results = [live_call(client, payload) for _ in range(args.runs)]
+        mean_latency = sum(latency for latency, _ in results) / len(results)
+        print(f"{mode:<10}{results[-1][1]:>15}{mean_latency:>14.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+GPT ticket outputs used to check parse_ticket against the extract_* functions.
+
+REAL_REPORTS are outputs in the shape gpt-4o returns for enrich_bug_report (including the
+ways it drifts from the requested format); fuzzed_reports() mutates them and builds
+random header layouts to cover edge cases.
+"""
+import random
+
+REAL_REPORTS = [
+    """**Description:** The homepage carousel is failing to cycle through the images as expected, leading to a static display that impacts user engagement.
+
+**Priority:** Medium
+
+**Recommended Assignee:** Aaron (Frontend Engineer)
+
+**Labels:** Bug
+
+**Title:** Homepage Carousel Not Cycling Through Images""",
+    """**Description:** When a user uploads a card image larger than 5MB on iOS, the upload spinner never finishes and the app must be force-quit. The backend returns a 413 but the client does not surface it.
+
+**Priority:** High
+
+**Recommended Assignee:** Bhavik Patel (Founding Engineer)
+
+**Labels:** Bug
+
+**Title:** iOS upload hangs on images over 5MB
+""",
+    """**Description:** Login via Google SSO intermittently fails with "invalid_state".
+- Happens roughly 1 in 5 attempts
+- Only on Safari
+
+**Steps to Reproduce:**
+1. Open the web app in Safari.
+2. Click "Continue with Google".
+3. Complete sign-in.
+
+**Expected Behavior:** User lands on the dashboard.
+
+**Actual Behavior:** Error page with invalid_state.
+
+**Priority:** Urgent
+
+**Recommended Assignee:** Rushil Nagarsheth - Founding Engineer
+
+**Labels:** Bug, Core Web
+
+**Title:** Google SSO fails intermittently on Safari
+
+**Attachments:** None""",
+    """**Title:** Add CSV export to the admin dashboard
+
+**Description:** Admins want to export the user table to CSV for reporting.
+
+**Priority:** Low
+
+**Recommended Assignee:** Nikolas Ioannou, Co-Founder
+
+**Labels:** Feature
+""",
+    """Here is the structured ticket:
+
+**Description:** The deploy pipeline times out pulling the base image from the registry, blocking releases.
+
+**Priority:** High
+
+**Recommended Assignee:** Rushil Nagarsheth (Founding Engineer)
+
+**Labels:** Backend
+
+**Title:** Deploy pipeline times out pulling base image
+
+Attachments: screenshot.png
+""",
+    """**Description:**
+Push notifications arrive twice on Android 14 devices after the latest release.
+
+**Priority:** Medium
+
+**Recommended Assignee:**
+Bhavik Patel
+
+**Labels:**
+Core Mobile
+
+**Title:**
+Duplicate push notifications on Android 14""",
+    """**Description:** Search results page improvement: show recent searches when the box is focused.
+
+**Priority:** Low
+
+**Recommended Assignee:** Aaron (Frontend Engineer)
+
+**Labels:**
+
+**Title:** Improvement - show recent searches""",
+    """**Title:** Homepage Carousel Not Cycling Through Images
+
+    **Description:** The homepage carousel is failing to cycle through the images as expected, leading to a static display that impacts user engagement.
+
+    **Priority:** Medium
+
+    **Recommended Assignee:** Bhavik Patel (Founding Engineer)
+
+    **Labels:** bug, ui
+
+    """,
+    """**Description:** Card balance shows $0.00 for a few seconds after opening the wallet tab; **this confuses users** who think funds disappeared.
+
+**Attachments:**
+- https://files.slack.com/files-pri/T08EHL36AHH-F08EK59821K/screenshot.png
+
+**Priority:** High
+
+**Recommended Assignee:** (unassigned)
+
+**Labels:** Bug
+
+**Title:** Wallet shows zero balance on load""",
+    "Sorry, I couldn't produce a ticket from that report.",
+    "",
+]
+
+FIELD_VALUES = {
+    "Title": ["Checkout button unresponsive", "Feature: dark mode", "improvement to search", "", "   ", "**bold** title"],
+    "Description": [
+        "App crashes on launch.",
+        "Multi-line\ndescription with\n- bullets\n- more",
+        "Mentions **Priority:** inline",
+        "",
+        "Stack trace:\n```\nTypeError: x is undefined\n```",
+        "Ends with bold\n**Note:** check logs",
+    ],
+    "Priority": ["High", "Medium", "Low", "Urgent", "high!", "", "**High**", "P1 - critical"],
+    "Recommended Assignee": [
+        "Aaron (Frontend Engineer)",
+        "Bhavik Patel - Founding Engineer",
+        "Nikolas Ioannou, Co-Founder",
+        "(none)",
+        "Rushil Nagarsheth (Founding Engineer) - infra",
+        "",
+        "Jean-Luc Picard",
+    ],
+    "Labels": ["Bug", "Bug, Feature", " , ", "", "Improvement", "core web, backend,", "Core Mobile"],
+    "Attachments": ["None", "- screenshot.png", "", "None\nattachments: none"],
+}
+
+SEPARATORS = ["\n\n", "\n", "\r\n\r\n", "\n\n\n", " ", ""]
+VALUE_GAPS = [" ", "", "\n", "  ", "\n\n", "\t"]
+
+
+def fuzzed_reports(count=2000, seed=1234):
+    """
+    Generates count reports with shuffled, missing, duplicated and malformed sections.
+    The same seed always yields the same corpus.
+    """
+    rng = random.Random(seed)
+    reports = []
+    headers = list(FIELD_VALUES)
+    for _ in range(count):
+        if rng.random() < 0.2:
+            # Mutate a real report: drop, duplicate or mangle one section.
+            report = rng.choice(REAL_REPORTS)
+            mutation = rng.randrange(4)
+            if mutation == 0:
+                report = report.replace(rng.choice(SEPARATORS[:2]), rng.choice(SEPARATORS), 1)
+            elif mutation == 1:
+                report = report + "\n\n" + rng.choice(REAL_REPORTS)
+            elif mutation == 2:
+                report = report.replace("**", "***", 1)
+            else:
+                report = report.replace("\n", "\nattachments: x\n", 1)
+            reports.append(report)
+            continue
+
+        sections = []
+        for header in rng.sample(headers, rng.randint(0, len(headers))):
+            value = rng.choice(FIELD_VALUES[header])
+            sections.append(f"**{header}:**{rng.choice(VALUE_GAPS)}{value}")
+            if rng.random() < 0.05:
+                sections.append(f"**{header}:**{rng.choice(VALUE_GAPS)}{rng.choice(FIELD_VALUES[header])}")
+        report = ""
+        for section in sections:
+            report += section + rng.choice(SEPARATORS)
+        if rng.random() < 0.1:
+            report = "Here is the ticket:\n\n" + report
+        reports.append(report)
+    return reports
@@ -0,0 +1,99 @@
+"""
+Checks parse_ticket and strip_attachments against the original extractors, then times both.
+
+Exits non-zero if any report in the corpus parses differently, or if parse_ticket is less than
+--min-speedup times faster than the extract_* calls, so it can gate changes to parse_fields.
+
+Run from the repository root:
+    python -m benchmarks.parse_fields_bench
+    python -m benchmarks.parse_fields_bench --fuzzed 20000 --repeat 5
+"""
+import argparse
+import re
+import sys
+import timeit
+
+from benchmarks.parse_corpus import REAL_REPORTS, fuzzed_reports
+from parse_fields import (
+    extract_assignee,
+    extract_description,
+    extract_labels,
+    extract_priority,
+    extract_title,
+    parse_ticket,
+    strip_attachments,
+)
+
+
+def legacy_strip_attachments(ticket):
+    # The three passes enrich_bug_report ran before strip_attachments existed.
+    ticket = re.sub(r"(?im)^\s*attachments:.*(?:\n|$)", "", ticket)
+    ticket = re.sub(r"(?is)\*\*Attachments:\*\*.*?(?=\n\*\*|$)", "", ticket)
+    ticket = re.sub(r"(?is)\*\*Attachments:\*\*\s*None.*?(?=\n\*\*|$)", "", ticket)
+    return ticket
+
+
+def legacy_parse(report):
+    return (
+        extract_title(report),
+        extract_description(report),
+        extract_priority(report),
+        extract_assignee(report),
+        extract_labels(report),
+    )
+
+
+def parse_ticket_fields(report):
+    fields = parse_ticket(report)
+    return (fields.title, fields.description, fields.priority, fields.assignee, fields.labels)
+
+
+def check(corpus):
+    mismatches = 0
+    for report in corpus:
+        for cleaned in (report, legacy_strip_attachments(report)):
+            expected, actual = legacy_parse(cleaned), parse_ticket_fields(cleaned)
+            if expected != actual:
+                mismatches += 1
+                print(f"MISMATCH parsing {cleaned!r}\n  extract_*:    {expected!r}\n  parse_ticket: {actual!r}")
+        if legacy_strip_attachments(report) != strip_attachments(report):
+            mismatches += 1
+            print(f"MISMATCH stripping attachments from {report!r}")
+    return mismatches
+
+
+def best_of(statement, corpus, repeat):
+    timer = timeit.Timer(lambda: [statement(report) for report in corpus])
+    return min(timer.repeat(repeat=repeat, number=1)) / len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzzed", type=int, default=5000, help="number of fuzzed reports")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-speedup", type=float, default=1.2, help="required parse_ticket speedup over extract_*")
+    args = parser.parse_args()
+
+    corpus = REAL_REPORTS + fuzzed_reports(args.fuzzed)
+    mismatches = check(corpus)
+    print(f"corpus: {len(REAL_REPORTS)} real + {args.fuzzed} fuzzed reports, {mismatches} mismatches")
+
+    cleaned = [legacy_strip_attachments(report) for report in corpus]
+    rows = [
+        ("extract_*", best_of(legacy_parse, cleaned, args.repeat)),
+        ("parse_ticket", best_of(parse_ticket_fields, cleaned, args.repeat)),
+        ("3x re.sub", best_of(legacy_strip_attachments, corpus, args.repeat)),
+        ("strip_attachments", best_of(strip_attachments, corpus, args.repeat)),
+    ]
+    print(f"\n{'parser':<20}{'us/report':>12}")
+    for name, seconds in rows:
+        print(f"{name:<20}{seconds * 1e6:>12.2f}")
+    speedup = rows[0][1] / rows[1][1]
+    print(f"\nparse speedup: {speedup:.2f}x, strip speedup: {rows[2][1] / rows[3][1]:.2f}x")
+    if speedup < args.min_speedup:
+        print(f"FAIL: parse_ticket is only {speedup:.2f}x faster than extract_* (need {args.min_speedup}x)")
+    return 1 if mismatches or speedup < args.min_speedup else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
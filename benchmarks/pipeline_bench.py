@@ -0,0 +1,68 @@
+"""
+Report latency with the stages run one after another vs as pipeline.Pipeline's dependency graph.
+
+Stages just sleep for the given milliseconds (defaults are typical for a threaded report with a
+screenshot and a log file), so the numbers show the scheduling effect alone:
+    python -m benchmarks.pipeline_bench --runs 5
+    python -m benchmarks.pipeline_bench --enrich-ms 3000 --attachments-ms 1200
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from pipeline import Pipeline, Stage
+
+STAGES = (
+    # name, dependencies, default milliseconds
+    ("ack", (), 80),
+    ("thread_context", (), 250),
+    ("attachments", (), 600),
+    ("logs", (), 400),
+    ("linear_metadata", (), 150),
+    ("enrich", ("thread_context", "attachments", "logs"), 1500),
+    ("create_ticket", ("enrich", "linear_metadata", "thread_context"), 200),
+)
+
+
+def sleeper(seconds):
+    def stage(**inputs):
+        time.sleep(seconds)
+    return stage
+
+
+def run_sequential(durations):
+    start = time.perf_counter()
+    for name, _, _ in STAGES:
+        sleeper(durations[name])()
+    return time.perf_counter() - start
+
+
+def run_pipeline(durations):
+    start = time.perf_counter()
+    pipeline = Pipeline([Stage(name, sleeper(durations[name]), deps=deps) for name, deps, _ in STAGES], label="bench")
+    pipeline.run()
+    return time.perf_counter() - start, pipeline.trace
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    for name, _, default in STAGES:
+        parser.add_argument(f"--{name.replace('_', '-')}-ms", type=float, default=default, dest=name)
+    args = parser.parse_args()
+    durations = {name: getattr(args, name) / 1000 for name, _, _ in STAGES}
+
+    sequential = [run_sequential(durations) for _ in range(args.runs)]
+    results = [run_pipeline(durations) for _ in range(args.runs)]
+    graph = [elapsed for elapsed, _ in results]
+
+    print(f"\nstage sum {sum(durations.values()) * 1000:.0f} ms, median of {args.runs} runs\n")
+    print(f"{'sequential':<12}{statistics.median(sequential) * 1000:>8.0f} ms")
+    print(f"{'pipeline':<12}{statistics.median(graph) * 1000:>8.0f} ms")
+    print(f"\n{results[-1][1].format()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Event latency while the $PORT server is under probe load.
+
+Boots the bot against the local Slack/OpenAI/Linear stand-ins (see loadtest/), then for each server
+mode replays app_mention events while a separate process hammers /healthz and /metrics over
+keep-alive connections, and reports end-to-end event latency next to the probe rate served:
+    python -m benchmarks.probe_bench --rate 10 --duration 15 --probe-concurrency 16
+    python -m benchmarks.probe_bench --probe-rate 200   # fixed probe rate instead of as-fast-as-possible
+
+Modes: "none" (no HTTP server, no probes), "flask" (Werkzeug's threaded development server, the old
+__main__) and "asyncio" (health_server.HealthServer, the default).
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from loadtest.run import boot_bot, collect_results, configure_environment, percentile, replay_events
+from loadtest.slack_stub import SlackStub
+from loadtest.stubs import LatencyModel, LinearStub, OpenAIStub
+
+PROBE_PATHS = ("/healthz", "/metrics")
+
+
+def probe(port, seconds, concurrency, rate):
+    """
+    Sends GETs to PROBE_PATHS from `concurrency` keep-alive connections for `seconds`, at up to `rate`
+    requests/s in total (0 = as fast as the server answers); prints the count.
+    """
+    deadline = time.monotonic() + seconds
+    counts = [0] * concurrency
+    interval = concurrency / rate if rate else 0.0
+
+    def worker(slot):
+        connection = None
+        next_at = time.monotonic()
+        while time.monotonic() < deadline:
+            if interval:
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.monotonic()))
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                connection.request("GET", PROBE_PATHS[counts[slot] % len(PROBE_PATHS)])
+                connection.getresponse().read()
+                counts[slot] += 1
+            except (OSError, http.client.HTTPException):
+                connection = None
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(sum(counts))
+
+
+def start_server(mode, bot):
+    """
+    Starts the $PORT server for a mode on a free local port. Returns (port, stop function).
+    """
+    if mode == "flask":
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", 0, bot.create_flask_app(), threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server.server_port, server.shutdown
+    from health_server import HealthServer
+    server = HealthServer(bot.HTTP_ROUTES, host="127.0.0.1").start()
+    return server.port, server.stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="none,flask,asyncio", help="comma-separated server modes to compare")
+    parser.add_argument("--rate", type=float, default=10.0, help="events per second")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of event replay per mode")
+    parser.add_argument("--probe-concurrency", type=int, default=16, help="concurrent keep-alive probe connections")
+    parser.add_argument("--probe-rate", type=float, default=0.0, help="total probes/s (0 = unthrottled)")
+    parser.add_argument("--openai-ms", type=float, default=300.0, help="median OpenAI latency")
+    parser.add_argument("--linear-ms", type=float, default=100.0, help="median Linear latency")
+    parser.add_argument("--probe", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--probe-seconds", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args.probe, args.probe_seconds, args.probe_concurrency, args.probe_rate)
+        return 0
+
+    slack = SlackStub(latency=LatencyModel(30.0, 0.2)).start()
+    openai_stub = OpenAIStub(latency=LatencyModel(args.openai_ms, 0.3)).start()
+    linear = LinearStub(latency=LatencyModel(args.linear_ms, 0.2)).start()
+    configure_environment(slack, openai_stub, linear, tempfile.mkdtemp(prefix="bugbot-probe-"))
+    bot, pool = boot_bot(slack)
+
+    rows = []
+    first_index = 0
+    for mode in args.modes.split(","):
+        prober, stop = None, None
+        if mode != "none":
+            port, stop = start_server(mode, bot)
+            # The probe load comes from another process so its own threads don't share our GIL.
+            prober = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.probe_bench", "--probe", str(port),
+                 "--probe-seconds", str(args.duration), "--probe-concurrency", str(args.probe_concurrency),
+                 "--probe-rate", str(args.probe_rate)],
+                stdout=subprocess.PIPE, text=True, cwd=os.getcwd(),
+            )
+            time.sleep(0.5)
+        sent, start, send_finished = replay_events(slack, args.rate, args.duration, first_index=first_index)
+        first_index += len(sent)
+        results = collect_results(slack, sent, start, send_finished, drain=30.0)
+        probes = int(prober.communicate()[0].strip() or 0) if prober else 0
+        if stop:
+            stop()
+        latencies = results["latencies"]
+        rows.append((mode, probes / args.duration, percentile(latencies, 50), percentile(latencies, 95),
+                     percentile(latencies, 99), results["missing"]))
+    pool.close()
+
+    probe_load = f"{args.probe_rate:.0f} probes/s" if args.probe_rate else "unthrottled probes"
+    print(f"\n{args.rate:.0f} events/s for {args.duration:.0f}s per mode, {args.probe_concurrency} probe connections, {probe_load}\n")
+    print(f"{'mode':<10}{'probes/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'missing':>9}")
+    for mode, probe_rate, p50, p95, p99, missing in rows:
+        print(f"{mode:<10}{probe_rate:>10.0f}{p50 * 1000:>10.0f}{p95 * 1000:>10.0f}{p99 * 1000:>10.0f}{missing:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
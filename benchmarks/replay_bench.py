@@ -0,0 +1,135 @@
+"""
+Deterministic benchmark of enrich_bug_report and create_linear_ticket over recorded traffic.
+
+Record once against the real APIs (keys from .env), with secrets scrubbed from the cassette:
+    python -m benchmarks.replay_bench --cassette cassettes/baseline.jsonl --record
+Then replay offline as often as needed, optionally saving and comparing results:
+    python -m benchmarks.replay_bench --cassette cassettes/baseline.jsonl --repeat 5 --save before.json
+    python -m benchmarks.replay_bench --cassette cassettes/baseline.jsonl --repeat 5 --compare before.json
+
+--speed scales the recorded upstream response times (0 = no upstream wait, to isolate local overhead).
+Slack is always a local stub here; it is not part of what is measured.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+from loadtest.run import REPORT_TEXTS, percentile
+from loadtest.slack_stub import SlackStub
+
+STAGES = ("enrich", "create_ticket", "total")
+
+
+def summarize(samples):
+    return {
+        stage: {
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "mean": sum(values) / len(values),
+            "n": len(values),
+        }
+        for stage, values in samples.items()
+        if values
+    }
+
+
+def compare(summary, baseline, tolerance):
+    """
+    Prints stage-by-stage p50/p95 changes against a saved baseline. Returns the number of regressions.
+    """
+    regressions = 0
+    print(f"\n{'stage':<15}{'metric':<8}{'baseline ms':>13}{'now ms':>10}{'change':>10}")
+    for stage in STAGES:
+        if stage not in summary or stage not in baseline:
+            continue
+        for metric in ("p50", "p95"):
+            before, after = baseline[stage][metric], summary[stage][metric]
+            change = (after - before) / before if before else 0.0
+            flag = "  REGRESSION" if change > tolerance else ""
+            regressions += bool(flag)
+            print(f"{stage:<15}{metric:<8}{before * 1000:>13.1f}{after * 1000:>10.1f}{change * 100:>9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--record", action="store_true", help="call the real APIs and record the cassette")
+    parser.add_argument("--reports", help="file with one raw bug report per line (default: built-in samples)")
+    parser.add_argument("--repeat", type=int, default=3, help="replay passes over the cassette")
+    parser.add_argument("--speed", type=float, default=1.0, help="scale for recorded response times on replay")
+    parser.add_argument("--save", help="write the summary to this JSON file")
+    parser.add_argument("--compare", help="baseline summary JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p50/p95 slowdown before flagging")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.reports:
+        with open(args.reports, encoding="utf-8") as f:
+            reports = [line.strip() for line in f if line.strip()]
+    else:
+        reports = REPORT_TEXTS
+
+    slack = SlackStub().start()
+    os.environ.update({
+        "HTTP_CASSETTE": args.cassette,
+        "HTTP_CASSETTE_MODE": "record" if args.record else "replay",
+        "HTTP_CASSETTE_SPEED": str(args.speed),
+        "SLACK_API_URL": slack.api_url,
+        "SLACK_BOT_TOKEN": os.getenv("SLACK_BOT_TOKEN") or "xoxb-stub",
+        "SLACK_SIGNING_SECRET": os.getenv("SLACK_SIGNING_SECRET") or "stub-signing-secret",
+        "BUGBOT_DATA_DIR": tempfile.mkdtemp(prefix="bugbot-replay-"),
+    })
+    if not args.record:
+        # Replay never reaches the network; placeholders satisfy the config checks.
+        for name, placeholder in (("OPENAI_API_KEY", "sk-replay"), ("LINEAR_API_KEY", "lin_api_replay"),
+                                  ("LINEAR_TEAM_ID", "team-replay")):
+            os.environ.setdefault(name, placeholder)
+
+    import app as bot
+    from cassette import active_cassette
+    from clients import get_linear_session, get_openai_client
+
+    # Clients are built on first use; build them now so the first sample doesn't include SDK imports.
+    get_openai_client()
+    get_linear_session()
+
+    passes = 1 if args.record else args.repeat
+    samples = {stage: [] for stage in STAGES}
+    for _ in range(passes):
+        if not args.record:
+            active_cassette().rewind()
+        for report in reports:
+            start = time.perf_counter()
+            enriched = bot.enrich_bug_report(report)
+            enriched_at = time.perf_counter()
+            bot.create_linear_ticket(enriched)
+            done = time.perf_counter()
+            samples["enrich"].append(enriched_at - start)
+            samples["create_ticket"].append(done - enriched_at)
+            samples["total"].append(done - start)
+
+    summary = summarize(samples)
+    mode = "recorded" if args.record else f"replayed x{passes} at speed {args.speed}"
+    print(f"{len(reports)} reports, {mode}\n")
+    print(f"{'stage':<15}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for stage, stats in summary.items():
+        print(f"{stage:<15}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['mean'] * 1000:>10.1f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Assignee routing index: top-k search latency and routing accuracy on synthetic ticket history.
+
+Each engineer gets a pool of topic words; tickets mix words from their owner's pool with shared
+filler (and some words from another engineer's pool), and held-out tickets are routed with
+routing_index.Router.suggest using the offline hashing embedder:
+    python -m benchmarks.routing_bench --tickets 5000 --engineers 8 --dimensions 256
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from routing_index import HASHING_DIMENSIONS, HashingEmbedder, Router, VectorIndex
+
+FILLER = ("the when after user page fails error broken does not load again still seeing reported by customer "
+          "on in with app screen button request").split()
+
+
+def make_topics(engineers, words_per_topic, rng):
+    return [[f"topic{engineer}w{word}" for word in range(words_per_topic)] for engineer in range(engineers)]
+
+
+def make_ticket(topics, owner, rng, noise):
+    words = rng.sample(topics[owner], 4) + rng.sample(FILLER, 8)
+    other = rng.randrange(len(topics))
+    words += rng.sample(topics[other], 2) if rng.random() < noise else []
+    rng.shuffle(words)
+    return " ".join(words[:6]), " ".join(words[6:])
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--dimensions", type=int, default=HASHING_DIMENSIONS)
+    parser.add_argument("--engineers", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--words-per-topic", type=int, default=40)
+    parser.add_argument("--noise", type=float, default=0.3, help="share of tickets mentioning another engineer's topic")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    topics = make_topics(args.engineers, args.words_per_topic, rng)
+
+    with tempfile.TemporaryDirectory() as directory:
+        router = Router(HashingEmbedder(args.dimensions), path=f"{directory}/index.npz")
+        history = []
+        for number in range(args.tickets):
+            owner = rng.randrange(args.engineers)
+            title, description = make_ticket(topics, owner, rng, args.noise)
+            history.append({"id": f"issue-{number}", "title": title, "description": description,
+                            "assignee_id": f"engineer-{owner}", "team_id": "team"})
+        start = time.perf_counter()
+        router.add_tickets(history)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        router.index.save(router.path, router.embedder.name, {})
+        VectorIndex.load(router.path, router.embedder.name)
+        persist = time.perf_counter() - start
+
+        embed_times, search_times, correct, routed = [], [], 0, 0
+        for _ in range(args.queries):
+            owner = rng.randrange(args.engineers)
+            text = "\n".join(make_ticket(topics, owner, rng, args.noise))
+            start = time.perf_counter()
+            vector = router.embedder.embed([text])[0]
+            embed_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            router.index.search(vector, team_id="team")
+            search_times.append(time.perf_counter() - start)
+            suggestion = router.suggest(text, "team")
+            if suggestion:
+                routed += 1
+                correct += suggestion[0] == f"engineer-{owner}"
+
+    print(f"\n{args.tickets} tickets, {args.engineers} engineers, {router.embedder.dimensions} dimensions")
+    print(f"build {build * 1000:.0f} ms ({build / args.tickets * 1e6:.0f} us/ticket), save + load {persist * 1000:.0f} ms\n")
+    for name, samples in (("embed", embed_times), ("search", search_times)):
+        print(f"{name:<8}p50 {statistics.median(samples) * 1e6:>7.0f} us   p99 {percentile(samples, 0.99) * 1e6:>7.0f} us")
+    print(f"\nrouted {routed / args.queries:.1%} of queries, {correct / max(routed, 1):.1%} to the right engineer")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
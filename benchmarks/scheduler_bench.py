@@ -0,0 +1,66 @@
+"""
+Queue wait for a quiet channel and an urgent report while another channel floods the bot.
+
+Runs scheduler.Scheduler in-process with jobs that just sleep for the configured service time:
+one channel submits a burst of reports, then a normal report from a second channel and an urgent
+report ("prod down ...") from a third arrive. Compares FIFO against the fair, priority-aware order:
+    python -m benchmarks.scheduler_bench --flood 200 --workers 10 --service-ms 300
+"""
+import argparse
+import sys
+import threading
+import time
+
+from scheduler import Scheduler
+
+
+def run(fair, flood, workers, service):
+    """
+    Returns {label: seconds from submit to a worker picking the report up} for one scheduler mode.
+    """
+    scheduler = Scheduler(workers=workers, fair=fair).start()
+    waits = {}
+    done = threading.Semaphore(0)
+
+    def job(label, submitted_at):
+        def func():
+            if label is not None:
+                waits[label] = time.perf_counter() - submitted_at
+            time.sleep(service)
+            done.release()
+        return func
+
+    flood_started = time.perf_counter()
+    for index in range(flood):
+        scheduler.submit(job(None, flood_started), channel="C-FLOOD", user=f"U{index % 5}",
+                         text=f"Button misaligned on settings page ({index})")
+    for label, channel, text in (
+        ("quiet channel", "C-QUIET", "Export to CSV drops the last row"),
+        ("urgent report", "C-OPS", "prod down: checkout returns 500 for every user"),
+    ):
+        scheduler.submit(job(label, time.perf_counter()), channel=channel, user="U-OTHER", text=text)
+    for _ in range(flood + 2):
+        done.acquire()
+    scheduler.stop()
+    waits["flood drained"] = time.perf_counter() - flood_started
+    return waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flood", type=int, default=200, help="reports queued by the flooding channel")
+    parser.add_argument("--workers", type=int, default=10, help="scheduler worker threads")
+    parser.add_argument("--service-ms", type=float, default=300.0, help="time each report takes once picked up")
+    args = parser.parse_args()
+
+    results = {mode: run(mode == "fair", args.flood, args.workers, args.service_ms / 1000) for mode in ("fifo", "fair")}
+
+    print(f"\n{args.flood} queued reports from one channel, {args.workers} workers, {args.service_ms:.0f} ms each\n")
+    print(f"{'wait (ms)':<16}{'fifo':>10}{'fair':>10}")
+    for label in ("quiet channel", "urgent report", "flood drained"):
+        print(f"{label:<16}{results['fifo'][label] * 1000:>10.0f}{results['fair'][label] * 1000:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
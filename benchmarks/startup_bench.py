@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark: how long a fresh process takes to import app.py and to be ready to connect.
+
+Each run is a new interpreter (so nothing is cached in sys.modules) pointed at a local Slack stub whose
+auth.test answers after --auth-ms, standing in for the round trip to Slack from a Heroku dyno:
+    python -m benchmarks.startup_bench --runs 5 --budget-ms 1500
+
+"import" is `import app`; "ready" additionally waits for bot-token verification, i.e. the point where
+the Socket Mode handler can start. Exits non-zero when the median ready time exceeds --budget-ms.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from loadtest.run import percentile
+from loadtest.slack_stub import BOT_USER_ID, SlackStub
+from loadtest.stubs import LatencyModel
+
+# Modules that are expensive to import and that app.py should not need until they are used.
+HEAVY_MODULES = ("openai", "httpx", "flask", "numpy", "PIL.Image", "slack_bolt.adapter.socket_mode")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.wait_for_slack_auth()
+ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "ready": ready - start,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_once(env):
+    result = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"app import failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--auth-ms", type=float, default=250.0, help="simulated Slack auth.test latency")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="maximum median time to ready")
+    args = parser.parse_args()
+
+    slack = SlackStub(latency=LatencyModel(args.auth_ms)).start()
+    env = dict(os.environ, **{
+        "SLACK_API_URL": slack.api_url,
+        "SLACK_BOT_TOKEN": "xoxb-stub",
+        "SLACK_APP_TOKEN": "xapp-stub",
+        "SLACK_SIGNING_SECRET": "stub-signing-secret",
+        "SLACK_BOT_USER_ID": BOT_USER_ID,
+        "OPENAI_API_KEY": "sk-stub",
+        "BUGBOT_DATA_DIR": tempfile.mkdtemp(prefix="bugbot-startup-"),
+    })
+
+    # One untimed run so the first measurement doesn't include cold .pyc compilation.
+    run_once(env)
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts, auth.test at {args.auth_ms:.0f} ms\n")
+    print(f"{'phase':<10}{'p50 ms':>10}{'max ms':>10}")
+    for phase in ("import", "ready"):
+        values = [run[phase] for run in runs]
+        print(f"{phase:<10}{percentile(values, 50) * 1000:>10.0f}{max(values) * 1000:>10.0f}")
+    loaded = sorted(set(name for run in runs for name in run["loaded"]))
+    print(f"\nheavy modules loaded at import: {', '.join(loaded) or 'none'}")
+
+    ready = percentile([run["ready"] for run in runs], 50) * 1000
+    if ready > args.budget_ms:
+        print(f"\nOVER BUDGET: median ready {ready:.0f} ms > {args.budget_ms:.0f} ms")
+        return 1
+    print(f"\nwithin budget: median ready {ready:.0f} ms <= {args.budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Measures trigger matching cost on a synthetic stream of workspace messages.
+
+Compares the compiled trigger pattern against checking each prefix/keyword one by one,
+and reports the CPU share trigger checks would take at a given message rate.
+
+Run from the repository root:
+    python -m benchmarks.trigger_bench
+    python -m benchmarks.trigger_bench --messages 200000 --rate 500 --keywords 40
+"""
+import argparse
+import random
+import re
+import time
+
+from triggers import compile_triggers
+
+WORDS = (
+    "the deploy is done can someone review my PR lunch anyone standup in five minutes thanks looks good "
+    "merged shipping it the build is green again customer asked about pricing invoice meeting notes "
+    "sounds good I will take a look tomorrow dashboard numbers are up release notes draft"
+).split()
+
+
+def make_messages(count, trigger_rate, prefixes, keywords, seed=7):
+    """
+    Builds chat-like messages of 3-60 words; about trigger_rate of them contain a trigger.
+    """
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 60))]
+        if rng.random() < trigger_rate:
+            if prefixes and rng.random() < 0.7:
+                words.insert(0, rng.choice(prefixes))
+            elif keywords:
+                words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        messages.append(" ".join(words))
+    return messages
+
+
+def naive_match(text, prefixes, keywords):
+    lowered = text.lower()
+    stripped = lowered.lstrip()
+    for prefix in prefixes:
+        if stripped.startswith(prefix.lower()):
+            return True
+    for keyword in keywords:
+        if re.search(rf"(?<!\w){re.escape(keyword)}(?!\w)", lowered):
+            return True
+    return False
+
+
+def timed(label, function, messages):
+    start = time.perf_counter()
+    hits = sum(1 for message in messages if function(message))
+    elapsed = time.perf_counter() - start
+    per_message = elapsed / len(messages)
+    print(f"{label:<12}{per_message * 1e6:>10.2f}{hits:>10}")
+    return per_message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--rate", type=float, default=100.0, help="workspace messages per second to size against")
+    parser.add_argument("--keywords", type=int, default=10, help="number of trigger keywords")
+    parser.add_argument("--trigger-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    prefixes = ["bug!", "ios!", "android!", "web!"]
+    keywords = ["#bug", "crash report"] + [f"#incident-{i}" for i in range(max(0, args.keywords - 2))]
+    messages = make_messages(args.messages, args.trigger_rate, prefixes, keywords)
+    pattern = compile_triggers(prefixes, keywords)
+
+    print(f"{len(messages)} messages, {len(prefixes)} prefixes, {len(keywords)} keywords\n")
+    print(f"{'matcher':<12}{'us/msg':>10}{'hits':>10}")
+    naive = timed("naive", lambda m: naive_match(m, prefixes, keywords), messages)
+    compiled = timed("compiled", lambda m: pattern.search(m) is not None, messages)
+
+    print(f"\nspeedup: {naive / compiled:.1f}x")
+    print(f"CPU share at {args.rate:.0f} msg/s: {compiled * args.rate * 100:.4f}% of one core")
+
+
+if __name__ == "__main__":
+    main()
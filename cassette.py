@@ -0,0 +1,242 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Record/replay of upstream HTTP traffic, for repeatable offline benchmarks.
+#   HTTP_CASSETTE=path/to/file.jsonl  HTTP_CASSETTE_MODE=record|replay
+# HTTP_CASSETTE_SPEED scales recorded response times on replay (1 = as recorded, 0 = instant).
+HTTP_CASSETTE = os.getenv("HTTP_CASSETTE", "")
+HTTP_CASSETTE_MODE = os.getenv("HTTP_CASSETTE_MODE", "replay" if HTTP_CASSETTE else "off")
+HTTP_CASSETTE_SPEED = float(os.getenv("HTTP_CASSETTE_SPEED", 1.0))
+
+# Headers that never get written to a cassette.
+SCRUBBED_HEADERS = {"authorization", "cookie", "set-cookie", "openai-organization", "openai-project", "x-api-key"}
+# Response headers that describe the wire encoding rather than the (decoded) body we store.
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+# API keys and tokens that can appear inside request or response bodies.
+_SECRET_RE = re.compile(r"sk-[A-Za-z0-9_\-]{8,}|xox[abposr]-[A-Za-z0-9\-]+|xapp-[A-Za-z0-9\-]+|lin_api_[A-Za-z0-9]+")
+
+
+class CassetteMiss(Exception):
+    """
+    Raised on replay when a request has no recorded response left.
+    """
+
+
+def scrub(text):
+    return _SECRET_RE.sub("<scrubbed>", text)
+
+
+def _encode_body(body):
+    if body is None:
+        return {"text": ""}
+    if isinstance(body, str):
+        return {"text": scrub(body)}
+    try:
+        return {"text": scrub(body.decode("utf-8"))}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(stored):
+    if "base64" in stored:
+        return base64.b64decode(stored["base64"])
+    return stored["text"].encode("utf-8")
+
+
+def request_key(method, url, body):
+    """
+    Identifies a request by method, URL and a hash of its (scrubbed, JSON-canonicalised) body.
+    Header differences such as SDK retry counters don't affect matching.
+    """
+    text = _encode_body(body).get("text")
+    if text is None:
+        digest_source = body
+    else:
+        try:
+            digest_source = json.dumps(json.loads(text), sort_keys=True).encode("utf-8")
+        except ValueError:
+            digest_source = text.encode("utf-8")
+    return f"{method.upper()} {url} {hashlib.sha256(digest_source).hexdigest()[:16]}"
+
+
+class Cassette:
+    """
+    A JSON Lines file of request/response pairs with their recorded response times.
+    On replay, identical requests receive their recorded responses in recording order.
+    """
+
+    def __init__(self, path, mode, speed=1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError("cassette mode must be 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._recorded = defaultdict(deque)
+        if mode == "replay":
+            self.rewind()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            open(path, "w").close()
+
+    def rewind(self):
+        """
+        Reloads the cassette so every recorded response can be replayed again.
+        """
+        recorded = defaultdict(deque)
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    recorded[interaction["key"]].append(interaction)
+        with self._lock:
+            self._recorded = recorded
+
+    def record(self, method, url, request_headers, request_body, status, response_headers, response_body, elapsed):
+        interaction = {
+            "key": request_key(method, url, request_body),
+            "request": {
+                "method": method.upper(),
+                "url": url,
+                "headers": {k: v for k, v in request_headers.items() if k.lower() not in SCRUBBED_HEADERS},
+                "body": _encode_body(request_body),
+            },
+            "response": {
+                "status": status,
+                "headers": {
+                    k: v for k, v in response_headers.items()
+                    if k.lower() not in SCRUBBED_HEADERS and k.lower() not in _WIRE_HEADERS
+                },
+                "body": _encode_body(response_body),
+            },
+            "elapsed": elapsed,
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(interaction) + "\n")
+
+    def replay(self, method, url, body):
+        """
+        Returns (status, headers, body bytes) for the next recorded response to this request,
+        after sleeping for its recorded time scaled by speed.
+        """
+        key = request_key(method, url, body)
+        with self._lock:
+            queue = self._recorded.get(key)
+            if not queue:
+                raise CassetteMiss(
+                    f"No recorded response for {method.upper()} {url} in {self.path} "
+                    "(replay with the same base URLs, model and team settings used when recording)"
+                )
+            interaction = queue.popleft()
+        if self.speed > 0:
+            time.sleep(interaction["elapsed"] * self.speed)
+        response = interaction["response"]
+        return response["status"], response["headers"], _decode_body(response["body"])
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    requests transport adapter that records through to the network or replays from a cassette.
+    """
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == "replay":
+            status, headers, body = self.cassette.replay(request.method, request.url, request.body)
+            response = requests.Response()
+            response.status_code = status
+            response.headers = requests.structures.CaseInsensitiveDict(headers)
+            response._content = body
+            response.url = request.url
+            response.request = request
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+            return response
+
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        body = response.content
+        self.cassette.record(request.method, request.url, dict(request.headers), request.body,
+                             response.status_code, dict(response.headers), body, time.perf_counter() - start)
+        return response
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """
+    httpx transport (used by the OpenAI client) that records through to the network or replays from a cassette.
+    """
+
+    def __init__(self, cassette, transport=None):
+        self.cassette = cassette
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        body = request.read()
+        if self.cassette.mode == "replay":
+            status, headers, content = self.cassette.replay(request.method, str(request.url), body)
+            return httpx.Response(status, headers=headers, content=content, request=request)
+
+        start = time.perf_counter()
+        response = self.transport.handle_request(request)
+        content = response.read()
+        self.cassette.record(request.method, str(request.url), dict(request.headers), body,
+                             response.status_code, dict(response.headers), content, time.perf_counter() - start)
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    def close(self):
+        self.transport.close()
+
+
+_active_cassette = None
+
+
+def active_cassette():
+    """
+    Returns the process-wide cassette configured by HTTP_CASSETTE, or None when record/replay is off.
+    """
+    global _active_cassette
+    if _active_cassette is None and HTTP_CASSETTE and HTTP_CASSETTE_MODE != "off":
+        _active_cassette = Cassette(HTTP_CASSETTE, HTTP_CASSETTE_MODE, HTTP_CASSETTE_SPEED)
+        logger.info(f"HTTP cassette {HTTP_CASSETTE!r} active in {HTTP_CASSETTE_MODE} mode")
+    return _active_cassette
+
+
+def instrument_session(session):
+    """
+    Mounts the active cassette (if any) on a requests session and returns the session.
+    """
+    cassette = active_cassette()
+    if cassette:
+        adapter = CassetteAdapter(cassette)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    return session
+
+
+def openai_http_client():
+    """
+    Returns an httpx client routed through the active cassette for the OpenAI SDK, or None for its default client.
+    """
+    cassette = active_cassette()
+    if not cassette:
+        return None
+    return httpx.Client(transport=CassetteTransport(cassette), timeout=httpx.Timeout(600.0, connect=5.0))
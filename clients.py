@@ -0,0 +1,114 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Startup mode. When true (the default) the OpenAI client and Linear session are only built on first use
+# and the bot token is verified in the background while listeners register; set to false to verify
+# the token before app.py finishes importing, as Bolt does by default.
+FAST_STARTUP = os.getenv("FAST_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Linear's GraphQL endpoint; can be pointed at a local stand-in (see loadtest/).
+LINEAR_API_URL = os.getenv("LINEAR_API_URL", "https://api.linear.app/graphql")
+
+_lock = threading.Lock()
+_openai_client = None
+_linear_session = None
+
+
+def get_openai_client():
+    """
+    Returns the shared OpenAI client, importing the SDK and building the client on first call.
+    """
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                from openai import OpenAI
+                from cassette import openai_http_client
+                # Goes through the HTTP cassette when HTTP_CASSETTE is set (see cassette.py).
+                _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=openai_http_client())
+    return _openai_client
+
+
+def get_linear_session():
+    """
+    Returns the shared requests session for Linear API calls, creating it on first call.
+    """
+    global _linear_session
+    if _linear_session is None:
+        with _lock:
+            if _linear_session is None:
+                import requests
+                from cassette import instrument_session
+                _linear_session = instrument_session(requests.Session())
+    return _linear_session
+
+
+class TokenVerification:
+    """
+    Bolt's start-up auth.test call, run in a background thread.
+    Start it as early as possible (before slack_bolt is even imported) and build the App with
+    token_verification_enabled=False; attach() hands the result to Bolt's authorization middleware
+    so the first event doesn't repeat the call. wait() blocks until the call returns and raises
+    BoltError for an invalid token, as App(token=...) would at construction.
+    """
+
+    def __init__(self, token, base_url=None):
+        self.token = token
+        self.base_url = base_url
+        self.result = None
+        self.error = None
+        self._apps = []
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._verify, name="slack-token-verification", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _verify(self):
+        try:
+            from slack_sdk import WebClient
+            client = WebClient(token=self.token, base_url=self.base_url) if self.base_url else WebClient(token=self.token)
+            self.result = client.auth_test()
+        except Exception as e:
+            self.error = e
+        with _lock:
+            self._done.set()
+            apps = list(self._apps)
+        for app in apps:
+            self._prime(app)
+
+    def attach(self, app):
+        """
+        Passes the auth.test result to the app's authorization middleware, now or once it arrives.
+        """
+        with _lock:
+            if not self._done.is_set():
+                self._apps.append(app)
+                return
+        self._prime(app)
+
+    def _prime(self, app):
+        if self.result is None:
+            return
+        # SingleTeamAuthorization would otherwise call auth.test itself on the first event.
+        for middleware in getattr(app, "_middleware_list", []):
+            if hasattr(middleware, "auth_test_result") and middleware.auth_test_result is None:
+                middleware.auth_test_result = self.result
+
+    def wait(self, timeout=None):
+        """
+        Waits for verification to finish. Returns the auth.test response.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Slack token verification did not finish in time")
+        if self.error is not None:
+            from slack_bolt.error import BoltError
+            from slack_sdk.errors import SlackApiError
+            if isinstance(self.error, SlackApiError):
+                raise BoltError(f"`token` is invalid (auth.test result: {self.error.response})") from self.error
+            raise self.error
+        return self.result
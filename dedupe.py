@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from slack_bolt.response import BoltResponse
+
+from metrics import Counter
+from store import get_shared_connection
+
+# How long an event_id is remembered. Slack retries an unacknowledged event three times over a few minutes.
+EVENT_DEDUPE_TTL = float(os.getenv("EVENT_DEDUPE_TTL", 600))
+# Upper bound on remembered ids, in case of a burst.
+EVENT_DEDUPE_MAX = int(os.getenv("EVENT_DEDUPE_MAX", 50000))
+# "memory" remembers ids in this process only; "sqlite" shares them between every process using the
+# same BUGBOT_DATA_DIR, or every process and dyno using the same DATABASE_URL (e.g. gunicorn workers
+# serving the HTTP Events API, see wsgi.py).
+EVENT_DEDUPE_BACKEND = os.getenv("EVENT_DEDUPE_BACKEND", "memory")
+
+EVENTS_DB = "events.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_events (
+    event_id TEXT PRIMARY KEY,
+    seen_at DOUBLE PRECISION NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_events_seen_at ON seen_events (seen_at);
+"""
+
+EVENTS_DEDUPED = Counter(
+    "bugbot_events_deduplicated_total",
+    "Events acknowledged and dropped because their event_id was already processed.",
+)
+
+
+class RecentEvents:
+    """
+    Remembers event ids for EVENT_DEDUPE_TTL seconds, oldest first so expiry is a walk from the front.
+    """
+
+    def __init__(self, ttl=EVENT_DEDUPE_TTL, max_size=EVENT_DEDUPE_MAX):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, event_id):
+        """
+        Returns True if event_id was already recorded (and not expired); otherwise records it and returns False.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._seen:
+                oldest, recorded_at = next(iter(self._seen.items()))
+                if now - recorded_at < self.ttl and len(self._seen) < self.max_size:
+                    break
+                self._seen.popitem(last=False)
+            if event_id in self._seen:
+                return True
+            self._seen[event_id] = now
+            return False
+
+
+class SharedEvents:
+    """
+    Event ids claimed in the shared store (SQLite, or Postgres at DATABASE_URL), so a redelivery that lands
+    on another worker process or dyno is still caught.
+    The primary key makes the claim atomic: only the first INSERT for an id succeeds.
+    """
+
+    # Expired rows are purged after this many claims.
+    PURGE_EVERY = 1000
+
+    def __init__(self, ttl=EVENT_DEDUPE_TTL):
+        self.ttl = ttl
+        self._claims = 0
+
+    def seen(self, event_id):
+        """
+        Returns True if event_id was already claimed (and not expired); otherwise claims it and returns False.
+        """
+        now = time.time()
+        connection = get_shared_connection(EVENTS_DB, SCHEMA)
+        with connection:
+            claimed = connection.execute(
+                "INSERT INTO seen_events (event_id, seen_at) VALUES (?, ?) ON CONFLICT (event_id) DO NOTHING",
+                (event_id, now),
+            ).rowcount
+            if not claimed:
+                # Reclaim an id whose previous sighting has expired.
+                claimed = connection.execute(
+                    "UPDATE seen_events SET seen_at = ? WHERE event_id = ? AND seen_at < ?",
+                    (now, event_id, now - self.ttl),
+                ).rowcount
+            self._claims += 1
+            if self._claims % self.PURGE_EVERY == 0:
+                connection.execute("DELETE FROM seen_events WHERE seen_at < ?", (now - self.ttl,))
+        return not claimed
+
+
+_recent = SharedEvents() if EVENT_DEDUPE_BACKEND == "sqlite" else RecentEvents()
+
+
+def drop_duplicate_events(body, next):
+    """
+    Bolt global middleware that acks and drops an event whose event_id was already seen.
+    With several Socket Mode connections, Slack can redeliver an event on a different connection than
+    the one that received it first (e.g. while a connection is being rotated); over HTTP a retry can
+    reach a different worker, hence the sqlite backend.
+    """
+    event_id = body.get("event_id")
+    if event_id and _recent.seen(event_id):
+        EVENTS_DEDUPED.inc()
+        return BoltResponse(status=200, body="")
+    return next()
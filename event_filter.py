@@ -0,0 +1,89 @@
+import json
+import os
+import random
+
+from slack_bolt.response import BoltResponse
+
+from metrics import Counter
+from triggers import match_trigger
+
+# Message subtypes that can never be a bug report (joins, topic changes, deletions, bot chatter...).
+DEFAULT_IGNORED_SUBTYPES = (
+    "bot_message,channel_join,channel_leave,channel_topic,channel_purpose,channel_name,channel_archive,"
+    "channel_unarchive,group_join,group_leave,group_topic,group_purpose,group_name,message_deleted,"
+    "pinned_item,unpinned_item,reminder_add,ekm_access_denied,huddle_thread,channel_convert_to_private"
+)
+IGNORED_MESSAGE_SUBTYPES = frozenset(
+    subtype.strip()
+    for subtype in os.getenv("IGNORED_MESSAGE_SUBTYPES", DEFAULT_IGNORED_SUBTYPES).split(",")
+    if subtype.strip()
+)
+# Optional comma-separated channel IDs. When set, plain message events from other channels are dropped
+# (mentions are always processed).
+BUG_CHANNELS = frozenset(channel.strip() for channel in os.getenv("BUG_CHANNELS", "").split(",") if channel.strip())
+
+# Fraction of passing message events that get logged, and the cap on each logged field.
+EVENT_LOG_SAMPLE_RATE = float(os.getenv("EVENT_LOG_SAMPLE_RATE", 0.01))
+EVENT_LOG_MAX_CHARS = int(os.getenv("EVENT_LOG_MAX_CHARS", 200))
+
+# Message subtypes that can carry a new bug report: plain text, and text with uploaded files.
+REPORTABLE_SUBTYPES = (None, "file_share")
+
+EVENTS_FILTERED = Counter(
+    "bugbot_events_filtered_total",
+    "Events acknowledged and dropped before reaching a listener, by reason.",
+)
+
+# Event fields worth logging; everything else in the payload (blocks, attachments, authorizations...) is skipped.
+_LOGGED_EVENT_FIELDS = ("type", "subtype", "channel", "channel_type", "user", "ts", "thread_ts", "text")
+
+
+def drop_reason(body):
+    """
+    Returns why a message event should be dropped before dispatch, or None if it should be processed.
+    Only looks at a few dict keys so it is cheap enough to run on every event.
+    """
+    event = body.get("event")
+    if not event or event.get("type") != "message":
+        return None
+    subtype = event.get("subtype")
+    if subtype in IGNORED_MESSAGE_SUBTYPES:
+        return "subtype"
+    if subtype is None and event.get("bot_id"):
+        return "bot"
+    if BUG_CHANNELS and event.get("channel") not in BUG_CHANNELS:
+        return "channel"
+    if subtype in REPORTABLE_SUBTYPES and not match_trigger(event.get("text"), event.get("channel")):
+        return "no_trigger"
+    return None
+
+
+def filter_events(body, next):
+    """
+    Bolt global middleware: acknowledges irrelevant message events without running any listener.
+    """
+    reason = drop_reason(body)
+    if reason is None:
+        next()
+        return None
+    EVENTS_FILTERED.inc(reason=reason)
+    # Returning a response without calling next() acks the event and stops dispatch here.
+    return BoltResponse(status=200, body="")
+
+
+def log_event(logger, label, body, sample_rate=EVENT_LOG_SAMPLE_RATE, max_chars=EVENT_LOG_MAX_CHARS):
+    """
+    Logs a sampled, size-capped JSON summary of an event instead of the full payload.
+    """
+    if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+        return
+    event = body.get("event") or {}
+    summary = {"event_id": body.get("event_id")}
+    for field in _LOGGED_EVENT_FIELDS:
+        value = event.get(field)
+        if value is None:
+            continue
+        if isinstance(value, str) and len(value) > max_chars:
+            value = value[:max_chars] + f"...(+{len(value) - max_chars} chars)"
+        summary[field] = value
+    logger.info(f"{label}: {json.dumps(summary, ensure_ascii=False)}")
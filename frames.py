@@ -0,0 +1,117 @@
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+# Upper bound on how many frames of an animation are sent to vision analysis.
+MAX_KEY_FRAMES = int(os.getenv("MAX_KEY_FRAMES", 6))
+# Frames are scored on small grayscale thumbnails; this is the side length in pixels.
+SCORE_THUMB_SIZE = 64
+# Animations longer than this are scored on an evenly strided subset of frames.
+MAX_SCORED_FRAMES = int(os.getenv("MAX_SCORED_FRAMES", 600))
+# Longest side of each key frame handed to the model.
+KEY_FRAME_MAX_SIDE = int(os.getenv("KEY_FRAME_MAX_SIDE", 1024))
+
+
+def is_animated(image):
+    """
+    Returns True if the Pillow image has more than one frame (animated GIF, APNG or WebP).
+    """
+    return bool(getattr(image, "is_animated", False)) and getattr(image, "n_frames", 1) > 1
+
+
+def score_frames(image, max_scored=MAX_SCORED_FRAMES, thumb_size=SCORE_THUMB_SIZE):
+    """
+    Downsamples the frames of an animated image and scores how much each one changes from the previous one.
+    Returns (indices, scores): the frame indices that were scored and the mean absolute pixel difference
+    of each frame against its predecessor (the first frame scores 0).
+    """
+    n_frames = image.n_frames
+    stride = max(1, -(-n_frames // max_scored))
+    indices = list(range(0, n_frames, stride))
+
+    thumbs = np.empty((len(indices), thumb_size * thumb_size), dtype=np.float32)
+    for row, index in enumerate(indices):
+        image.seek(index)
+        thumb = image.convert("L").resize((thumb_size, thumb_size), Image.BILINEAR)
+        thumbs[row] = np.asarray(thumb, dtype=np.float32).ravel()
+
+    scores = np.zeros(len(indices), dtype=np.float32)
+    if len(indices) > 1:
+        scores[1:] = np.abs(np.diff(thumbs, axis=0)).mean(axis=1)
+    return np.asarray(indices), scores
+
+
+def select_key_frames(indices, scores, max_frames=MAX_KEY_FRAMES):
+    """
+    Picks up to max_frames frame indices from the scored frames.
+    The first and last frames are always kept; the rest are the highest-change frames,
+    skipping neighbours of frames already picked so one transition doesn't use up the budget.
+    Returns the chosen frame indices in playback order.
+    """
+    if len(indices) <= max_frames:
+        return [int(i) for i in indices]
+
+    chosen = {0, len(indices) - 1}
+    min_gap = max(1, len(indices) // (max_frames * 2))
+    for position in np.argsort(-scores, kind="stable"):
+        if len(chosen) >= max_frames:
+            break
+        if scores[position] <= 0:
+            break
+        if all(abs(int(position) - other) >= min_gap for other in chosen):
+            chosen.add(int(position))
+    return [int(indices[p]) for p in sorted(chosen)]
+
+
+def encode_frame(image, max_side=KEY_FRAME_MAX_SIDE, quality=85):
+    """
+    Encodes the image's current frame as a downscaled JPEG and returns the bytes.
+    """
+    frame = image.convert("RGB")
+    frame.thumbnail((max_side, max_side))
+    output = io.BytesIO()
+    frame.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+def extract_key_frames(file_data, max_frames=MAX_KEY_FRAMES, max_side=KEY_FRAME_MAX_SIDE):
+    """
+    Samples a bounded number of representative frames from an animated GIF, APNG or WebP.
+    Frames are chosen by frame-difference scoring over downsampled copies, so a 300-frame
+    recording costs at most max_frames images of vision analysis.
+    Returns a list of JPEG-encoded frames in playback order (a single frame for still images).
+    """
+    try:
+        image = Image.open(io.BytesIO(file_data))
+    except Exception as e:
+        raise ValueError(f"Error opening image: {e}")
+
+    if not is_animated(image):
+        return [encode_frame(image, max_side=max_side)]
+
+    indices, scores = score_frames(image)
+    key_frames = []
+    for index in select_key_frames(indices, scores, max_frames=max_frames):
+        image.seek(index)
+        key_frames.append(encode_frame(image, max_side=max_side))
+    return key_frames
+
+
+# Quick test: build a synthetic animation with a few distinct scenes and extract its key frames.
+if __name__ == "__main__":
+    import time
+
+    scenes = [(255, 255, 255), (220, 30, 30), (30, 30, 220), (30, 200, 30)]
+    frames = []
+    for color in scenes:
+        for _ in range(75):
+            frames.append(Image.new("RGB", (800, 600), color))
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=40)
+
+    start = time.perf_counter()
+    result = extract_key_frames(buffer.getvalue())
+    elapsed = time.perf_counter() - start
+    print(f"Extracted {len(result)} key frames from {len(frames)} frames in {elapsed * 1000:.1f} ms")
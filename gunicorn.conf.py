@@ -0,0 +1,15 @@
+import os
+
+# gunicorn settings for the HTTP Events API mode (wsgi.py).
+bind = f"0.0.0.0:{os.getenv('PORT', '5003')}"
+# Worker processes; Heroku sets WEB_CONCURRENCY from the dyno size.
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+# Threads per worker serve Slack's requests and health probes; Bolt runs listeners on its own threads.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+# Requests are acked before listeners run, so anything slower than this is stuck.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 20
+# Each worker imports app.py itself: clients, SQLite connections and background threads are per process.
+preload_app = False
+accesslog = None
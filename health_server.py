@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Small asyncio HTTP/1.1 server for the $PORT binding (health checks, /metrics, /usage).
+# Everything runs on one event-loop thread, so frequent probes cost a single thread's wakeups instead of
+# a thread per request competing with Bolt's listener threads for the GIL. Routes marked blocking
+# (e.g. ones that query SQLite) run on a small bounded thread pool.
+
+# Connections served at once; extra connections get an immediate 503 instead of queueing.
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 64))
+# Threads for blocking routes.
+HTTP_WORKERS = int(os.getenv("HTTP_WORKERS", 1))
+# Idle keep-alive connections and slow clients are dropped after this many seconds.
+HTTP_IDLE_TIMEOUT = float(os.getenv("HTTP_IDLE_TIMEOUT", 15))
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+# Largest request body skipped; nothing served here takes one.
+MAX_REQUEST_BODY = 64 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Route:
+    """
+    A GET route. handler(query) returns (status, content type, body str or bytes); query is parse_qs output.
+    blocking handlers run on the worker pool instead of the event loop.
+    """
+
+    def __init__(self, handler, blocking=False):
+        self.handler = handler
+        self.blocking = blocking
+
+
+def _response(status, content_type, body, keep_alive, head=False):
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    head_bytes = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head_bytes if head else head_bytes + body
+
+
+class HealthServer:
+    """
+    Serves a {path: Route} table. start() runs the server on a daemon thread and returns once it is
+    listening (port 0 picks a free port, see .port); serve_forever() runs it on the calling thread.
+    """
+
+    def __init__(self, routes, host="0.0.0.0", port=0, max_connections=HTTP_MAX_CONNECTIONS, workers=HTTP_WORKERS):
+        self.routes = routes
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+        self.requests = 0
+        self._active = 0
+        self._loop = None
+        self._server = None
+        self._task = None
+        self._started = threading.Event()
+        self._thread = None
+
+    async def _dispatch(self, method, target):
+        if method not in ("GET", "HEAD"):
+            return 405, "text/plain; charset=utf-8", "Method Not Allowed"
+        parts = urlsplit(target)
+        route = self.routes.get(parts.path)
+        if route is None:
+            return 404, "text/plain; charset=utf-8", "Not Found"
+        query = parse_qs(parts.query)
+        try:
+            if route.blocking:
+                return await self._loop.run_in_executor(self.executor, route.handler, query)
+            return route.handler(query)
+        except Exception:
+            logger.exception(f"Error serving {parts.path}")
+            return 500, "text/plain; charset=utf-8", "Internal Server Error"
+
+    async def _handle(self, reader, writer):
+        if self._active >= self.max_connections:
+            writer.write(_response(503, "text/plain; charset=utf-8", "Too many connections", keep_alive=False))
+            await self._close(writer)
+            return
+        self._active += 1
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), HTTP_IDLE_TIMEOUT)
+                if not request_line:
+                    break
+                if len(request_line) > MAX_REQUEST_LINE:
+                    writer.write(_response(400, "text/plain; charset=utf-8", "Bad Request", keep_alive=False))
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    writer.write(_response(400, "text/plain; charset=utf-8", "Bad Request", keep_alive=False))
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADERS + 1):
+                    line = await asyncio.wait_for(reader.readline(), HTTP_IDLE_TIMEOUT)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                else:
+                    # More than MAX_HEADERS lines before the blank one; the rest would be read as a request.
+                    writer.write(_response(431, "text/plain; charset=utf-8", "Request Header Fields Too Large",
+                                           keep_alive=False))
+                    break
+                # Probes don't send bodies; skip one if a client does.
+                length = headers.get("content-length") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    writer.write(_response(400, "text/plain; charset=utf-8", "Bad Request", keep_alive=False))
+                    break
+                length = int(length)
+                if length > MAX_REQUEST_BODY:
+                    writer.write(_response(413, "text/plain; charset=utf-8", "Payload Too Large", keep_alive=False))
+                    break
+                if length:
+                    await reader.readexactly(length)
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                self.requests += 1
+                status, content_type, body = await self._dispatch(method, target)
+                writer.write(_response(status, content_type, body, keep_alive, head=method == "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError:
+            # readline() raises ValueError for a request line or header over the stream's 64 KiB limit.
+            writer.write(_response(400, "text/plain; charset=utf-8", "Bad Request", keep_alive=False))
+        finally:
+            self._active -= 1
+            await self._close(writer)
+
+    async def _close(self, writer):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, reuse_address=True)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        logger.info(f"Health server listening on {self.host}:{self.port}")
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Open keep-alive connections are cancelled when asyncio.run() tears the loop down.
+            self._server.close()
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="health-server", daemon=True)
+        self._thread.start()
+        self._started.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop and self._task:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread:
+            self._thread.join(5)
+        self.executor.shutdown(wait=False)
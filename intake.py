@@ -0,0 +1,319 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from metrics import DEFAULT_BUCKETS, Counter
+from store import get_shared_connection
+
+logger = logging.getLogger(__name__)
+
+# Slack channel id the intake digest is posted to; empty disables the digest.
+DIGEST_CHANNEL = os.getenv("DIGEST_CHANNEL", "")
+# Comma-separated digests to post: "daily" (the previous UTC day) and/or "weekly" (the previous ISO week).
+DIGEST_SCHEDULE = os.getenv("DIGEST_SCHEDULE", "daily,weekly")
+# UTC hour the digests go out, and the weekday of the weekly one (0 = Monday).
+DIGEST_HOUR = int(os.getenv("DIGEST_HOUR", 9))
+DIGEST_WEEKDAY = int(os.getenv("DIGEST_WEEKDAY", 0))
+# Seconds between checks for a due digest.
+DIGEST_CHECK_INTERVAL = float(os.getenv("DIGEST_CHECK_INTERVAL", 300))
+# Entries listed per breakdown (channel, priority, label, assignee) in a digest.
+DIGEST_TOP = int(os.getenv("DIGEST_TOP", 5))
+
+INTAKE_DB = "intake.sqlite3"
+
+BREAKDOWNS = ("channel", "priority", "label", "assignee", "outcome")
+FAILED_OUTCOMES = ("error",)
+DEGRADED_OUTCOMES = ("created_fallback",)
+
+# Rollups are kept per UTC day ("2024-05-06") and per ISO week ("2024-W19"), so any day or week is read
+# from its own rows, never summed from history. dimension "all" (key "") holds the period's totals.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intake_events (
+    ts DOUBLE PRECISION NOT NULL,
+    channel TEXT NOT NULL,
+    "user" TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    priority TEXT,
+    labels TEXT,
+    assignee TEXT,
+    issue_id TEXT,
+    latency DOUBLE PRECISION NOT NULL
+);
+CREATE TABLE IF NOT EXISTS intake_rollups (
+    period TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    reports INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    fallbacks INTEGER NOT NULL DEFAULT 0,
+    latency_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, dimension, key)
+);
+CREATE TABLE IF NOT EXISTS intake_latency (
+    period TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    reports INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, bucket)
+);
+CREATE TABLE IF NOT EXISTS intake_digests (
+    period TEXT PRIMARY KEY,
+    sent_at DOUBLE PRECISION NOT NULL
+);
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO intake_rollups (period, dimension, key, reports, failures, fallbacks, latency_sum)
+VALUES (?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (period, dimension, key) DO UPDATE SET
+    reports = intake_rollups.reports + 1,
+    failures = intake_rollups.failures + excluded.failures,
+    fallbacks = intake_rollups.fallbacks + excluded.fallbacks,
+    latency_sum = intake_rollups.latency_sum + excluded.latency_sum
+"""
+
+_UPSERT_LATENCY = """
+INSERT INTO intake_latency (period, bucket, reports) VALUES (?, ?, 1)
+ON CONFLICT (period, bucket) DO UPDATE SET reports = intake_latency.reports + 1
+"""
+
+DIGESTS = Counter(
+    "bugbot_intake_digests_total",
+    "Intake digests, by kind (daily, weekly) and outcome (posted, empty, error).",
+)
+
+
+def _connection():
+    return get_shared_connection(INTAKE_DB, SCHEMA)
+
+
+def day_period(ts):
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+def week_period(ts):
+    year, week, _ = datetime.fromtimestamp(ts, timezone.utc).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _bucket(latency):
+    # Index into DEFAULT_BUCKETS of the first bound >= latency; len(DEFAULT_BUCKETS) is +Inf.
+    for index, bound in enumerate(DEFAULT_BUCKETS):
+        if latency <= bound:
+            return index
+    return len(DEFAULT_BUCKETS)
+
+
+def record_report(channel, user, outcome, latency, priority=None, labels=(), assignee=None, issue_id=None, ts=None):
+    """
+    Stores one processed report and folds it into the day and week rollups (totals, and per channel,
+    priority, label, assignee and outcome) and latency histograms in the same transaction.
+    """
+    ts = ts if ts is not None else time.time()
+    channel = channel or "unknown"
+    labels = list(labels or ())
+    failed = 1 if outcome in FAILED_OUTCOMES else 0
+    fallback = 1 if outcome in DEGRADED_OUTCOMES else 0
+    keys = [("all", ""), ("channel", channel), ("outcome", outcome)]
+    if not failed:
+        keys += [("priority", priority or "none"), ("assignee", assignee or "none")]
+        keys += [("label", label) for label in labels]
+    bucket = _bucket(latency)
+
+    connection = _connection()
+    with connection:
+        connection.execute(
+            "INSERT INTO intake_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (ts, channel, user or "unknown", outcome, priority, json.dumps(labels), assignee, issue_id, latency),
+        )
+        for period in (day_period(ts), week_period(ts)):
+            connection.executemany(
+                _UPSERT_ROLLUP, [(period, dimension, key, failed, fallback, latency) for dimension, key in keys]
+            )
+            connection.execute(_UPSERT_LATENCY, (period, bucket))
+
+
+def _percentile(histogram, total, fraction):
+    # Upper bound of the bucket holding the given fraction of reports (None past the last bound).
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= fraction * total:
+            return DEFAULT_BUCKETS[bucket] if bucket < len(DEFAULT_BUCKETS) else None
+    return None
+
+
+def query_period(period):
+    """
+    Returns the intake of one day ("2024-05-06") or ISO week ("2024-W19"): report, failure and fallback
+    counts, latency (mean, and p50/p95 as histogram bucket bounds in seconds) and reports per channel,
+    priority, label, assignee and outcome, largest first. Reads only that period's rollup rows.
+    """
+    connection = _connection()
+    rows = connection.execute(
+        "SELECT dimension, key, reports, failures, fallbacks, latency_sum FROM intake_rollups WHERE period = ? "
+        "ORDER BY reports DESC, key",
+        (period,),
+    ).fetchall()
+    histogram = {
+        row["bucket"]: row["reports"]
+        for row in connection.execute("SELECT bucket, reports FROM intake_latency WHERE period = ?", (period,))
+    }
+    totals = next((row for row in rows if row["dimension"] == "all"), None)
+    reports = totals["reports"] if totals else 0
+    return {
+        "period": period,
+        "reports": reports,
+        "failures": totals["failures"] if totals else 0,
+        "fallbacks": totals["fallbacks"] if totals else 0,
+        "failure_rate": round(totals["failures"] / reports, 4) if reports else 0.0,
+        "latency": {
+            "mean_seconds": round(totals["latency_sum"] / reports, 3) if reports else None,
+            "p50_seconds": _percentile(histogram, reports, 0.5) if reports else None,
+            "p95_seconds": _percentile(histogram, reports, 0.95) if reports else None,
+        },
+        "by": {
+            dimension: [{dimension: row["key"], "reports": row["reports"], "failures": row["failures"]}
+                        for row in rows if row["dimension"] == dimension]
+            for dimension in BREAKDOWNS
+        },
+    }
+
+
+def _latency_text(seconds, prefix="≤"):
+    return f"{prefix}{seconds:g}s" if seconds is not None else f">{DEFAULT_BUCKETS[-1]:g}s"
+
+
+def format_digest(summary, title, names=None, top=DIGEST_TOP):
+    """
+    Returns Slack mrkdwn for a query_period() result. names maps assignee ids to display names.
+    """
+    names = names or {}
+    if not summary["reports"]:
+        return f"*{title}*\nNo bug reports."
+    latency = summary["latency"]
+    lines = [
+        f"*{title}*",
+        f"{summary['reports']} reports, {summary['failures']} failed ({summary['failure_rate']:.1%}), "
+        f"{summary['fallbacks']} filed before enrichment finished",
+        f"Time to ticket link: mean {latency['mean_seconds']:.1f}s, p50 {_latency_text(latency['p50_seconds'])}, "
+        f"p95 {_latency_text(latency['p95_seconds'])}",
+    ]
+    formatters = {
+        "channel": lambda key: f"<#{key}>" if key != "unknown" else key,
+        "assignee": lambda key: names.get(key, key),
+    }
+    for dimension in ("channel", "priority", "label", "assignee"):
+        entries = summary["by"][dimension]
+        if not entries:
+            continue
+        shown = ", ".join(f"{formatters.get(dimension, str)(entry[dimension])} {entry['reports']}" for entry in entries[:top])
+        more = f", +{len(entries) - top} more" if len(entries) > top else ""
+        lines.append(f"By {dimension}: {shown}{more}")
+    return "\n".join(lines)
+
+
+def due_digests(now=None, schedule=DIGEST_SCHEDULE):
+    """
+    Returns (kind, period, title) for each scheduled digest whose latest send time has passed:
+    the previous day's after DIGEST_HOUR, the previous week's after DIGEST_HOUR on DIGEST_WEEKDAY.
+    Whether it was already sent is checked when claiming it.
+    """
+    now = datetime.fromtimestamp(now if now is not None else time.time(), timezone.utc)
+    kinds = {kind.strip() for kind in schedule.split(",") if kind.strip()}
+    due = []
+    send_time = now.replace(hour=DIGEST_HOUR, minute=0, second=0, microsecond=0)
+    if "daily" in kinds:
+        # The latest daily send time at or before now, and the day before it.
+        sent_on = send_time if send_time <= now else send_time - timedelta(days=1)
+        day = sent_on - timedelta(days=1)
+        due.append(("daily", day_period(day.timestamp()), f"Bug intake for {day:%a %d %b %Y}"))
+    if "weekly" in kinds:
+        weekly = send_time - timedelta(days=(now.weekday() - DIGEST_WEEKDAY) % 7)
+        if weekly > now:
+            weekly -= timedelta(days=7)
+        week = weekly - timedelta(days=7)
+        period = week_period(week.timestamp())
+        due.append(("weekly", period, f"Bug intake for week {period}"))
+    return due
+
+
+def _claim(period):
+    connection = _connection()
+    with connection:
+        cursor = connection.execute(
+            "INSERT INTO intake_digests (period, sent_at) VALUES (?, ?) ON CONFLICT (period) DO NOTHING",
+            (period, time.time()),
+        )
+    return cursor.rowcount == 1
+
+
+def _release(period):
+    connection = _connection()
+    with connection:
+        connection.execute("DELETE FROM intake_digests WHERE period = ?", (period,))
+
+
+def post_due_digests(client, channel=DIGEST_CHANNEL, names=None, now=None):
+    """
+    Posts every due digest that hasn't been posted yet. Each period is claimed in the shared store first, so
+    restarts and several processes or dynos sharing it post it once; a failed post is released
+    and retried at the next check. Periods without reports are claimed but not posted.
+    """
+    for kind, period, title in due_digests(now):
+        if not _claim(period):
+            continue
+        summary = query_period(period)
+        if not summary["reports"]:
+            DIGESTS.inc(kind=kind, outcome="empty")
+            continue
+        try:
+            client.chat_postMessage(channel=channel, text=format_digest(summary, title, names() if names else None))
+            DIGESTS.inc(kind=kind, outcome="posted")
+        except Exception as e:
+            logger.warning(f"Failed to post the {kind} intake digest for {period}: {e}")
+            DIGESTS.inc(kind=kind, outcome="error")
+            _release(period)
+
+
+def start_digests(client, names=None, interval=DIGEST_CHECK_INTERVAL):
+    """
+    Starts a background thread posting due digests to DIGEST_CHANNEL every interval seconds (nothing
+    when DIGEST_CHANNEL is empty). names is an optional callable returning {assignee id: name}.
+    """
+    if not DIGEST_CHANNEL:
+        return None
+
+    def run():
+        while True:
+            try:
+                post_due_digests(client, names=names)
+            except Exception as e:
+                logger.warning(f"Intake digest check failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="intake-digest", daemon=True)
+    thread.start()
+    return thread
+
+
+# CLI: python intake.py --period week [--json]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show bug intake from the local rollups.")
+    parser.add_argument("--period", default="day",
+                        help="day, week, yesterday, last-week, or a period such as 2024-05-06 or 2024-W19")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of the digest text")
+    args = parser.parse_args()
+
+    now = time.time()
+    period = {
+        "day": day_period(now),
+        "week": week_period(now),
+        "yesterday": day_period(now - 86400),
+        "last-week": week_period(now - 7 * 86400),
+    }.get(args.period, args.period)
+    result = query_period(period)
+    print(json.dumps(result, indent=2) if args.json else format_digest(result, f"Bug intake for {period}"))
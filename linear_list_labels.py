@@ -19,6 +19,8 @@ from parse_fields import extract_title, extract_priority, extract_assignee, extr
 
 # Load environment variables from the .env file.
 load_dotenv()
+# Reads LINEAR_TEAM_ID and the label id variables, so it is imported after the .env file is loaded.
+import routing_config
 
 # Set OpenAI API key.
 
@@ -43,7 +45,7 @@ def enrich_bug_report(raw_text):
         f"{raw_text}\n"
     )
 
-    response = client.chat.completions.create(model="gpt-4o",
+    response = client.chat.completions.create(model=routing_config.route_for(None).model,
     messages=[
         {
             "role": "system",
@@ -67,11 +69,12 @@ def enrich_bug_report(raw_text):
     return ticket
 
 def create_linear_ticket(enriched_report):
+    # Team, label and assignee ids come from the default route of the shared routing config.
+    route = routing_config.route_for(None)
     LINEAR_API_KEY = os.getenv("LINEAR_API_KEY")
-    LINEAR_TEAM_ID = os.getenv("LINEAR_TEAM_ID")
 
-    if not LINEAR_API_KEY or not LINEAR_TEAM_ID:
-        raise ValueError("Please ensure LINEAR_API_KEY and LINEAR_TEAM_ID are set in your environment.")
+    if not LINEAR_API_KEY or not route.team_id:
+        raise ValueError("Please ensure LINEAR_API_KEY and LINEAR_TEAM_ID (or a routing config team) are set.")
 
     # Extract fields from the GPT output.
     title = extract_title(enriched_report)
@@ -80,50 +83,25 @@ def create_linear_ticket(enriched_report):
     assignee_name = extract_assignee(enriched_report)
     labels = extract_labels(enriched_report)
 
-    if not labels:
-        labels = ["Bug"]
-
     priority_map = {"low": 0, "medium": 1, "high": 2}
     priority = priority_map.get(priority_str.lower(), 1) if priority_str else 1
 
     # Normalize assignee name for case-insensitive matching.
     assignee_name = assignee_name.lower() if assignee_name else ""
-    ASSIGNEE_MAP = {
-        "": "",
-        "nikolas ioannou": "93d4b23a-0c5a-4dc1-81d8-45d82684e9d4",
-        "bhavik patel": "14543ff1-21dd-4e1d-ad23-bbf33d814ac0",
-        "rushil nagarsheth": "094f80e8-8853-40ca-837f-81e0b2b2b07f",
-        "aaron": "f5bc2d04-c905-4aa2-a25f-bbaa1e4af763",
-    }
+    assignee_id = route.assignees.get(assignee_name) or route.fallback_assignee
+    print("Extracted assignee:", assignee_name)
 
-    assignee_id = ASSIGNEE_MAP.get(assignee_name)
-    if not assignee_id:
-        print(f"Warning: Assignee '{assignee_name}' not found in the mapping. Falling back to 'aaron'.")
-        assignee_id = ASSIGNEE_MAP["aaron"]
-
-    TICKET_TYPE_MAP = {
-        "Bug Bot": os.getenv("LINEAR_BUG_LABEL_ID", "74ecf219-8bfd-4944-b106-4b42273f84a8"),
-        "In QA": os.getenv("LINEAR_IN_QA_LABEL_ID", "ce778bdc-39e1-4a1b-a546-488fde56252b"),
-        "Internal Admin": os.getenv("LINEAR_CORE_WEB_LABEL_ID", "031c70bb-cc93-40ec-a3dd-7ed36bc19b23"),
-        "Core Web": os.getenv("LINEAR_BUG_LAB", "1d8a8a3d-5813-439f-a421-641875357c99"),
-        "Core Mobile": os.getenv("LINEAR_BUG_LABEL_ID", "361e454d-9f41-494f-95ad-04301dbb3231"),
-        "Backend": os.getenv("LINEAR_BUG_LABEL_ID", "c3aa8f63-f8c8-4d22-915e-6ddab30829d7"),
-        # "QA'd --> Functional": os.getenv("LINEAR_INTERNAL_ADMIN_LABEL_ID", "d8a01af7-45ed-4257-b039-7f1c0d4fab92"),
-        # "Feature": os.getenv("LINEAR_FEATURE_LABEL_ID", "504d1625-23fb-41ac-afea-e46bcabb4e53"),
-        # "Improvement": os.getenv("LINEAR_IMPROVEMENT_LABEL_ID", "3688793e-2c4c-4e5b-a261-81f365f283f8")
-
-    }
     mapped_labels = []
-    for label in labels:
-        normalized = label.strip().capitalize()
-        if normalized in TICKET_TYPE_MAP:
-            mapped_labels.append(TICKET_TYPE_MAP[normalized])
+    for label in labels or []:
+        label_id = route.labels.get(label.strip().lower())
+        if label_id and label_id not in mapped_labels:
+            mapped_labels.append(label_id)
     if not mapped_labels:
-        mapped_labels = [TICKET_TYPE_MAP["Bug"]]
+        mapped_labels = list(route.default_labels)
 
     variables = {
         "input": {
-            "teamId": LINEAR_TEAM_ID,
+            "teamId": route.team_id,
             "title": title,
             "description": description,
             "priority": priority
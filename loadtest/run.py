@@ -0,0 +1,197 @@
+"""
+Offline end-to-end load test for the bot.
+
+Starts local Slack (Web API + Socket Mode), OpenAI and Linear stand-ins, points app.py at them,
+connects the real Socket Mode handler, replays synthetic app_mention events at a fixed rate and
+reports end-to-end latency (event sent -> threaded reply posted), throughput and error rates.
+
+Run from the repository root:
+    python -m loadtest.run --rate 20 --duration 30
+    python -m loadtest.run --rate 50 --openai-ms 1500 --openai-sigma 0.5 --openai-errors 0.02
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from loadtest.slack_stub import BOT_USER_ID, SlackStub
+from loadtest.stubs import LatencyModel, LinearStub, OpenAIStub
+
+REPORT_TEXTS = [
+    "the checkout button does nothing on iOS when I tap it",
+    "login with Google loops back to the sign-in page on Safari",
+    "wallet balance shows $0.00 for a few seconds after opening the tab",
+    "push notifications arrive twice on Android 14",
+]
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of an unsorted list (None for an empty list).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(round(pct / 100 * len(ordered) + 0.5))))
+    return ordered[rank - 1]
+
+
+def configure_environment(slack, openai_stub, linear, data_dir):
+    os.environ.update({
+        "SLACK_BOT_TOKEN": "xoxb-stub",
+        "SLACK_APP_TOKEN": "xapp-stub",
+        "SLACK_SIGNING_SECRET": "stub-signing-secret",
+        "SLACK_BOT_USER_ID": BOT_USER_ID,
+        "SLACK_API_URL": slack.api_url,
+        "OPENAI_API_KEY": "sk-stub",
+        "OPENAI_BASE_URL": f"{openai_stub.url}/v1",
+        "LINEAR_API_KEY": "lin_api_stub",
+        "LINEAR_TEAM_ID": "team-stub",
+        "LINEAR_API_URL": f"{linear.url}/graphql",
+        "BUGBOT_DATA_DIR": data_dir,
+        # Synthetic traffic comes from a handful of users, far above any real per-user limit.
+        "RATE_LIMIT_USER": "",
+        "RATE_LIMIT_CHANNEL": "",
+    })
+
+
+def mention_event(index, channel="CLOADTEST", user="ULOADTEST"):
+    ts = f"{time.time():.6f}{index % 10}"
+    return {
+        "type": "app_mention",
+        "user": user,
+        "text": f"<@{BOT_USER_ID}> {REPORT_TEXTS[index % len(REPORT_TEXTS)]} (report {index})",
+        "ts": ts,
+        "event_ts": ts,
+        "channel": channel,
+    }
+
+
+def boot_bot(slack, connections=None, max_age=0):
+    """
+    Imports app.py and connects a Socket Mode pool to the Slack stub, with the same boot sequence
+    as app.py's __main__ (warm-up runs while Socket Mode connects). max_age > 0 rotates connections.
+    Returns (app module, pool) once the bot is connected and warmed up.
+    """
+    # Import only after the environment points every client at the stand-ins.
+    import app as bot
+    from socket_pool import SOCKET_MODE_CONNECTIONS, SocketModePool
+    from warmup import start_warm_up, wait_until_ready
+
+    start_warm_up()
+    import routing_index
+    routing_index.start_sync()
+    bot.wait_for_slack_auth()
+    pool = SocketModePool(bot.app, os.environ["SLACK_APP_TOKEN"], size=connections or SOCKET_MODE_CONNECTIONS,
+                          max_age=max_age)
+    bot.socket_pool = pool.connect()
+    if not slack.wait_for_connections(pool.size, timeout=10):
+        raise RuntimeError("Socket Mode clients never connected to the stub")
+    wait_until_ready(timeout=30)
+    return bot, pool
+
+
+def replay_events(slack, rate, duration, channels=4, first_index=0):
+    """
+    Sends app_mention events at a fixed rate. Returns ({thread ts: send time}, start, send_finished).
+    """
+    sent = {}
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    index = 0
+    while True:
+        scheduled = start + index * interval
+        if scheduled - start >= duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        number = first_index + index
+        event = mention_event(number, channel=f"CLOAD{number % channels}", user=f"ULOAD{number % channels}")
+        sent[event["ts"]] = time.perf_counter()
+        slack.send_event(event)
+        index += 1
+    return sent, start, time.perf_counter()
+
+
+def collect_results(slack, sent, start, send_finished, drain):
+    """
+    Waits up to drain seconds for every reply, then returns latencies and counts for the sent events.
+    """
+    with slack.reply_arrived:
+        slack.reply_arrived.wait_for(lambda: all(ts in slack.replies for ts in sent), timeout=drain)
+
+    latencies, successes, failures = [], 0, 0
+    last_reply = send_finished
+    for ts, sent_at in sent.items():
+        replies = slack.replies.get(ts)
+        if not replies:
+            continue
+        replied_at, text = replies[-1]
+        latencies.append(replied_at - sent_at)
+        last_reply = max(last_reply, replied_at)
+        if "ticket has been created" in text:
+            successes += 1
+        else:
+            failures += 1
+    return {
+        "sent": len(sent),
+        "send_seconds": send_finished - start,
+        "latencies": latencies,
+        "successes": successes,
+        "failures": failures,
+        "missing": len(sent) - len(latencies),
+        "elapsed": last_reply - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10.0, help="events per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of event replay")
+    parser.add_argument("--drain", type=float, default=60.0, help="max seconds to wait for outstanding replies")
+    parser.add_argument("--channels", type=int, default=4, help="distinct channels/users to spread events over")
+    parser.add_argument("--openai-ms", type=float, default=800.0, help="median OpenAI latency")
+    parser.add_argument("--openai-sigma", type=float, default=0.3, help="log-normal spread of OpenAI latency")
+    parser.add_argument("--openai-errors", type=float, default=0.0, help="fraction of OpenAI calls that fail")
+    parser.add_argument("--linear-ms", type=float, default=150.0, help="median Linear latency")
+    parser.add_argument("--linear-sigma", type=float, default=0.2)
+    parser.add_argument("--linear-errors", type=float, default=0.0)
+    parser.add_argument("--slack-ms", type=float, default=30.0, help="median Slack Web API latency")
+    parser.add_argument("--connections", type=int, help="Socket Mode connections (default: SOCKET_MODE_CONNECTIONS)")
+    parser.add_argument("--rotate-every", type=float, default=0.0, help="rotate each connection after this many seconds")
+    args = parser.parse_args()
+
+    slack = SlackStub(latency=LatencyModel(args.slack_ms, 0.2)).start()
+    openai_stub = OpenAIStub(latency=LatencyModel(args.openai_ms, args.openai_sigma, args.openai_errors, (500, 429))).start()
+    linear = LinearStub(latency=LatencyModel(args.linear_ms, args.linear_sigma, args.linear_errors)).start()
+    configure_environment(slack, openai_stub, linear, tempfile.mkdtemp(prefix="bugbot-loadtest-"))
+
+    try:
+        bot, pool = boot_bot(slack, args.connections, args.rotate_every)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    sent, start, send_finished = replay_events(slack, args.rate, args.duration, args.channels)
+    results = collect_results(slack, sent, start, send_finished, args.drain)
+    pool.close()
+
+    latencies = results["latencies"]
+    print(f"events sent:        {results['sent']} over {results['send_seconds']:.1f}s ({results['sent'] / results['send_seconds']:.1f}/s)")
+    print(f"replies:            {len(latencies)} ({results['successes']} tickets, {results['failures']} error replies, {results['missing']} missing)")
+    print(f"throughput:         {results['successes'] / results['elapsed']:.2f} tickets/s")
+    print(f"error rate:         {(results['failures'] + results['missing']) / max(1, results['sent']) * 100:.2f}%")
+    for pct in (50, 95, 99):
+        value = percentile(latencies, pct)
+        print(f"p{pct} latency:        {value * 1000:.0f} ms" if value is not None else f"p{pct} latency:        n/a")
+    print(f"upstream requests:  openai={openai_stub.requests} linear={linear.requests} slack={slack.requests}")
+    for health in pool.health():
+        print(f"connection {health['slot']}:       {health['events']} events, delivery p50 {health['delivery_p50_ms']} ms, "
+              f"age {health['age_seconds']}s")
+    return 0 if results["missing"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
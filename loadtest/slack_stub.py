@@ -0,0 +1,188 @@
+"""
+Local stand-in for Slack: the Web API methods the bot calls plus a Socket Mode WebSocket endpoint
+that pushes synthetic events to whichever clients are connected.
+"""
+import itertools
+import json
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs, urlsplit
+
+from loadtest import websocket
+from loadtest.stubs import JsonHandler, LatencyModel, StubServer
+
+BOT_USER_ID = "UBOTSTUB"
+
+
+class SocketModeConnection:
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.open = True
+
+    def send(self, payload, opcode=websocket.OPCODE_TEXT):
+        with self.lock:
+            self.wfile.write(websocket.encode_frame(payload, opcode))
+            self.wfile.flush()
+
+
+class SlackHandler(JsonHandler):
+    def do_GET(self):
+        if self.headers.get("Upgrade", "").lower() != "websocket":
+            # Read-only Web API methods (users.info, conversations.replies) arrive as GETs.
+            parts = urlsplit(self.path)
+            if not parts.path.startswith("/api/"):
+                self.send_json(404, {"ok": False, "error": "not_found"})
+                return
+            self.stub.count_request()
+            args = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            self.send_json(200, self.stub.handle_api(parts.path.rsplit("/", 1)[-1], args))
+            return
+        self.wfile.write(websocket.handshake_response(self.headers["Sec-WebSocket-Key"]))
+        self.wfile.flush()
+        connection = SocketModeConnection(self.wfile)
+        self.stub.add_connection(connection)
+        try:
+            connection.send(json.dumps({"type": "hello", "num_connections": len(self.stub.connections),
+                                        "connection_info": {"app_id": "ASTUB"}}))
+            while True:
+                opcode, payload = websocket.read_frame(self.rfile)
+                if opcode == websocket.OPCODE_PING:
+                    connection.send(payload, websocket.OPCODE_PONG)
+                elif opcode == websocket.OPCODE_TEXT:
+                    self.stub.record_ack(json.loads(payload))
+                elif opcode == websocket.OPCODE_CLOSE:
+                    break
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.stub.remove_connection(connection)
+            self.close_connection = True
+
+    def do_POST(self):
+        self.stub.count_request()
+        method = self.path.rsplit("/", 1)[-1]
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if "json" in (self.headers.get("Content-Type") or ""):
+            args = json.loads(raw or b"{}")
+        else:
+            args = {key: values[0] for key, values in parse_qs(raw.decode("utf-8")).items()}
+        delay, status = self.stub.latency.sample()
+        time.sleep(delay)
+        if status:
+            self.send_json(status, {"ok": False, "error": "ratelimited" if status == 429 else "fatal_error"},
+                           headers={"Retry-After": "1"} if status == 429 else None)
+            return
+        self.send_json(200, self.stub.handle_api(method, args))
+
+
+class SlackStub(StubServer):
+    """
+    Slack Web API at <url>/api/ (set SLACK_API_URL to it) and a Socket Mode endpoint handed out by
+    apps.connections.open. Events pushed with send_event() rotate across open connections;
+    chat.postMessage calls are recorded per thread_ts so a driver can measure end-to-end latency.
+    """
+
+    handler_class = SlackHandler
+
+    def __init__(self, latency=None, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency or LatencyModel()
+        self.connections = []
+        self.connection_opened = threading.Condition(self.lock)
+        self._rotation = itertools.count()
+        self.replies = {}
+        self.reply_arrived = threading.Condition(threading.Lock())
+        self.acks = {}
+        self.threads = {}
+
+    @property
+    def api_url(self):
+        return f"{self.url}/api/"
+
+    def add_connection(self, connection):
+        with self.connection_opened:
+            self.connections.append(connection)
+            self.connection_opened.notify_all()
+
+    def remove_connection(self, connection):
+        with self.lock:
+            connection.open = False
+            if connection in self.connections:
+                self.connections.remove(connection)
+
+    def wait_for_connections(self, count=1, timeout=10.0):
+        with self.connection_opened:
+            return self.connection_opened.wait_for(lambda: len(self.connections) >= count, timeout)
+
+    def record_ack(self, message):
+        envelope_id = message.get("envelope_id")
+        if envelope_id:
+            self.acks[envelope_id] = time.perf_counter()
+
+    def handle_api(self, method, args):
+        if method == "auth.test":
+            return {"ok": True, "url": "https://stub.slack.com/", "team": "Stub", "user": "bugbot",
+                    "team_id": "TSTUB", "user_id": BOT_USER_ID, "bot_id": "BSTUB"}
+        if method == "apps.connections.open":
+            return {"ok": True, "url": f"{self.url.replace('http://', 'ws://')}/link/?ticket={uuid.uuid4().hex}"}
+        if method == "chat.postMessage":
+            ts = f"{time.time():.6f}"
+            with self.reply_arrived:
+                self.replies.setdefault(args.get("thread_ts"), []).append((time.perf_counter(), args.get("text", "")))
+                self.reply_arrived.notify_all()
+            return {"ok": True, "channel": args.get("channel"), "ts": ts, "message": {"text": args.get("text"), "ts": ts}}
+        if method == "users.info":
+            user = args.get("user", "U0")
+            return {"ok": True, "user": {"id": user, "name": user.lower(), "real_name": f"User {user}",
+                                         "profile": {"display_name": user.lower(), "real_name": f"User {user}"}}}
+        if method == "conversations.replies":
+            # Threads added with add_thread(), paged like Slack: oldest filter, limit and a numeric cursor.
+            messages = self.threads.get((args.get("channel"), args.get("ts")), [])
+            oldest = float(args.get("oldest") or 0)
+            # The parent message is always returned, whatever oldest says.
+            messages = messages[:1] + [m for m in messages[1:] if float(m["ts"]) > oldest]
+            start, limit = int(args.get("cursor") or 0), int(args.get("limit") or 1000)
+            page = messages[start:start + limit]
+            more = start + limit < len(messages)
+            return {"ok": True, "messages": page, "has_more": more,
+                    "response_metadata": {"next_cursor": str(start + limit) if more else ""}}
+        return {"ok": True}
+
+    def add_thread(self, channel, messages):
+        """
+        Makes conversations.replies return messages (dicts with ts, user, text; parent first) for the
+        thread rooted at the first one.
+        """
+        self.threads[(channel, messages[0]["ts"])] = list(messages)
+
+    def send_event(self, event, event_id=None):
+        """
+        Pushes one events_api envelope to the next open Socket Mode connection, skipping (and forgetting)
+        connections that turn out to be closed. Returns the envelope id, or None when no client is connected.
+        """
+        body = {
+            "token": "stub",
+            "team_id": "TSTUB",
+            "api_app_id": "ASTUB",
+            "event": event,
+            "type": "event_callback",
+            "event_id": event_id or f"Ev{uuid.uuid4().hex[:12].upper()}",
+            "event_time": int(time.time()),
+            "authorizations": [{"team_id": "TSTUB", "user_id": BOT_USER_ID, "is_bot": True}],
+        }
+        envelope_id = str(uuid.uuid4())
+        envelope = json.dumps({"envelope_id": envelope_id, "payload": body, "type": "events_api",
+                               "accepts_response_payload": False, "retry_attempt": 0, "retry_reason": ""})
+        while True:
+            with self.lock:
+                if not self.connections:
+                    return None
+                connection = self.connections[next(self._rotation) % len(self.connections)]
+            try:
+                connection.send(envelope)
+                return envelope_id
+            except (OSError, ValueError):
+                self.remove_connection(connection)
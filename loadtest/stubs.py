@@ -0,0 +1,203 @@
+"""
+Local stand-ins for the OpenAI and Linear HTTP APIs with configurable latency and error rates.
+"""
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_TICKET = (
+    "**Description:** The checkout button does nothing when tapped on iOS; no network request is sent.\n\n"
+    "**Priority:** High\n\n"
+    "**Recommended Assignee:** Aaron (Frontend Engineer)\n\n"
+    "**Labels:** Bug\n\n"
+    "**Title:** Checkout button unresponsive on iOS"
+)
+
+STUB_MEMBERS = [
+    {"id": "user-aaron", "name": "Aaron", "displayName": "aaron", "active": True},
+    {"id": "user-bhavik", "name": "Bhavik Patel", "displayName": "bhavik", "active": True},
+]
+STUB_LABELS = [{"id": "label-bug", "name": "Bug"}, {"id": "label-feature", "name": "Feature"}]
+STUB_COMPLETED_ISSUES = [
+    {"id": "issue-1", "title": "Checkout button unresponsive on iOS", "description": "Tapping pay does nothing.",
+     "completedAt": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(time.time() - 7200)), "assignee": {"id": "user-aaron"}},
+    {"id": "issue-2", "title": "Webhook retries time out", "description": "Payment webhooks return 504.",
+     "completedAt": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(time.time() - 3600)), "assignee": {"id": "user-bhavik"}},
+]
+
+
+class LatencyModel:
+    """
+    Log-normal response latency around a median, plus a probability of answering with an error status.
+    """
+
+    def __init__(self, median_ms=0.0, sigma=0.0, error_rate=0.0, error_statuses=(500,)):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """
+        Returns (delay in seconds, error status or None) for one request.
+        """
+        with self._lock:
+            delay = self.median_ms / 1000 * math.exp(self.sigma * self._random.gauss(0, 1)) if self.median_ms else 0.0
+            status = self._random.choice(self.error_statuses) if self._random.random() < self.error_rate else None
+        return delay, status
+
+
+class StubServer:
+    """
+    Runs a ThreadingHTTPServer for a handler class on a free local port in a daemon thread.
+    """
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, host="127.0.0.1", port=0):
+        handler = type(self.handler_class.__name__, (self.handler_class,), {"stub": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return {}
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class OpenAIHandler(JsonHandler):
+    def do_GET(self):
+        # Model lookups, as made by the boot warm-up.
+        self.stub.count_request()
+        model = self.path.rstrip("/").rsplit("/", 1)[-1]
+        self.send_json(200, {"id": model, "object": "model", "created": 0, "owned_by": "stub"})
+
+    def do_POST(self):
+        self.stub.count_request()
+        request = self.read_json()
+        delay, status = self.stub.latency.sample()
+        time.sleep(delay)
+        if status:
+            self.send_json(status, {"error": {"message": "stub error", "type": "server_error", "code": None}},
+                           headers={"Retry-After": "0"} if status == 429 else None)
+            return
+        prompt_chars = len(json.dumps(request.get("messages", [])))
+        self.send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.stub.ticket}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(self.stub.ticket) // 4,
+                "total_tokens": prompt_chars // 4 + len(self.stub.ticket) // 4,
+                "prompt_tokens_details": {"cached_tokens": 0},
+            },
+        })
+
+
+class OpenAIStub(StubServer):
+    """
+    OpenAI-compatible /v1/chat/completions that always answers with the same structured ticket.
+    Point the OpenAI client at it with OPENAI_BASE_URL=<url>/v1.
+    """
+
+    handler_class = OpenAIHandler
+
+    def __init__(self, latency=None, ticket=STUB_TICKET, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency or LatencyModel()
+        self.ticket = ticket
+
+
+class LinearHandler(JsonHandler):
+    def do_POST(self):
+        self.stub.count_request()
+        request = self.read_json()
+        delay, status = self.stub.latency.sample()
+        time.sleep(delay)
+        if status:
+            self.send_json(status, {"errors": [{"message": "stub error"}]})
+            return
+        query = request.get("query", "")
+        issue_id = str(uuid.uuid4())
+        issue = {"id": issue_id, "identifier": "BUG-1", "title": "stub", "url": f"https://linear.app/stub/issue/{issue_id}"}
+        if "issueCreate" in query:
+            self.send_json(200, {"data": {"issueCreate": {"success": True, "issue": issue}}})
+        elif "issueUpdate" in query:
+            self.send_json(200, {"data": {"issueUpdate": {"success": True, "issue": issue}}})
+        elif "issueLabels" in query:
+            self.send_json(200, {"data": {
+                "team": {"id": (request.get("variables") or {}).get("teamId") or "team-stub", "name": "Stub",
+                         "members": {"nodes": STUB_MEMBERS}, "labels": {"nodes": STUB_LABELS}},
+                "issueLabels": {"nodes": []},
+            }})
+        elif "CompletedIssues" in query:
+            since = (request.get("variables") or {}).get("since") or ""
+            self.send_json(200, {"data": {"issues": {
+                "nodes": [issue for issue in STUB_COMPLETED_ISSUES if issue["completedAt"] > since],
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+            }}})
+        else:
+            self.send_json(200, {"data": {}})
+
+
+class LinearStub(StubServer):
+    """
+    Linear GraphQL endpoint that accepts issueCreate/issueUpdate mutations, the warm-up metadata query and the
+    routing index's completed-issues query.
+    Point the bot at it with LINEAR_API_URL=<url>/graphql.
+    """
+
+    handler_class = LinearHandler
+
+    def __init__(self, latency=None, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency or LatencyModel()
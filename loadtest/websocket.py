@@ -0,0 +1,73 @@
+"""
+Just enough of RFC 6455 (server side) to speak Socket Mode to slack_sdk's built-in client.
+"""
+import base64
+import hashlib
+import struct
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def accept_key(client_key):
+    """
+    Returns the Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key.
+    """
+    digest = hashlib.sha1((client_key + _GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def handshake_response(client_key):
+    return (
+        "HTTP/1.1 101 Switching Protocols\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {accept_key(client_key)}\r\n\r\n"
+    ).encode("ascii")
+
+
+def encode_frame(payload, opcode=OPCODE_TEXT):
+    """
+    Builds an unmasked (server-to-client) frame.
+    """
+    data = payload.encode("utf-8") if isinstance(payload, str) else payload
+    header = bytes([0x80 | opcode])
+    if len(data) <= 125:
+        header += bytes([len(data)])
+    elif len(data) <= 0xFFFF:
+        header += bytes([126]) + struct.pack("!H", len(data))
+    else:
+        header += bytes([127]) + struct.pack("!Q", len(data))
+    return header + data
+
+
+def _read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise ConnectionError("WebSocket closed")
+        data += chunk
+    return data
+
+
+def read_frame(stream):
+    """
+    Reads one (possibly masked) frame from a file-like stream. Returns (opcode, payload bytes).
+    """
+    first, second = _read_exact(stream, 2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", _read_exact(stream, 2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", _read_exact(stream, 8))[0]
+    mask = _read_exact(stream, 4) if second & 0x80 else None
+    payload = _read_exact(stream, length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
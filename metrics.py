@@ -0,0 +1,207 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# Latency buckets in seconds, from fast local stages up to slow LLM calls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Every metric registers itself here so render() can expose it.
+REGISTRY = []
+
+
+def _label_key(labels):
+    # Values are exposed as text anyway; as strings, keys with e.g. status=200 and status="error" still sort.
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    """
+    A monotonically increasing count, one series per label combination.
+    """
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge:
+    """
+    A value that can go up and down (e.g. reports currently in flight).
+    """
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values, one series per label combination.
+    """
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (non-cumulative), then sum and count.
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(labels))
+        return series[2] if series else 0
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the wall-clock duration of the with-block, even if it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+def render():
+    """
+    Returns every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Metrics recorded on the bug report hot path.
+STAGE_LATENCY = Histogram(
+    "bugbot_stage_duration_seconds",
+    "Time spent in each stage of processing a bug report (slack_delivery, ack, thread_context, attachments, logs, "
+    "linear_metadata, preprocess, enrich, create_ticket, say, upgrade_ticket, update_ticket) "
+    "and in each boot warm-up step (warmup_openai, warmup_linear, warmup_imports, warmup_routing).",
+)
+QUEUE_WAIT = Histogram(
+    "bugbot_queue_wait_seconds",
+    "Time between Bolt receiving an event and its listener starting to run.",
+)
+UPSTREAM_RESPONSES = Counter(
+    "bugbot_upstream_responses_total",
+    "Responses from upstream APIs by upstream and HTTP status (or 'error' when no response was received).",
+)
+IN_FLIGHT = Gauge(
+    "bugbot_reports_in_flight",
+    "Bug reports currently being processed.",
+)
+IN_FLIGHT.set(0)
+REPORTS = Counter(
+    "bugbot_reports_total",
+    "Bug reports handled, by outcome.",
+)
+TICKET_UPGRADES = Counter(
+    "bugbot_ticket_upgrades_total",
+    "Fallback tickets (created when enrichment missed its deadline) updated with GPT's answer, by outcome.",
+)
+READY = Gauge(
+    "bugbot_ready",
+    "1 once the boot warm-up (upstream connections, Linear metadata) has finished.",
+)
+READY.set(0)
+
+
+@contextmanager
+def track_stage(stage):
+    """
+    Records the duration of one pipeline stage in STAGE_LATENCY.
+    """
+    with STAGE_LATENCY.time(stage=stage):
+        yield
+
+
+def record_upstream(upstream, status):
+    """
+    Counts one upstream response (or transport failure) for the given upstream ('openai', 'linear', 'slack').
+    """
+    UPSTREAM_RESPONSES.inc(upstream=upstream, status=status)
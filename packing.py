@@ -0,0 +1,102 @@
+import io
+import math
+import os
+
+from PIL import Image, ImageDraw
+
+# Packing is opt-in: it trades per-screenshot resolution for fewer image tokens and a shorter request.
+PACK_SCREENSHOTS = os.getenv("PACK_SCREENSHOTS", "false").lower() == "true"
+# Side length of each composite canvas. OpenAI scales anything larger down to fit 2048x2048 anyway.
+PACK_CANVAS_SIDE = int(os.getenv("PACK_CANVAS_SIDE", 2048))
+# Each screenshot is downscaled so its longest side is at most this many pixels before packing.
+PACK_MAX_SIDE = int(os.getenv("PACK_MAX_SIDE", 1024))
+PACK_PADDING = 8
+
+PACKED_IMAGES_NOTE = (
+    "Some images are composites of several screenshots; each screenshot is labelled "
+    "with its number in its top-left corner."
+)
+
+
+def estimate_image_tokens(width, height):
+    """
+    Estimates the prompt tokens a high-detail image costs with gpt-4o.
+    The image is scaled to fit 2048x2048, then its shortest side to 768px, and billed
+    170 tokens per 512px tile plus a flat 85.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def shelf_pack(sizes, canvas_side=PACK_CANVAS_SIDE, padding=PACK_PADDING):
+    """
+    Bin-packs rectangles onto square canvases using shelves (rows), tallest rectangles first.
+    sizes is a list of (width, height) no larger than canvas_side.
+    Returns a list of canvases, each a list of (index, x, y) placements.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True)
+    canvases = []
+    for i in order:
+        width, height = sizes[i]
+        placed = False
+        for canvas in canvases:
+            x, y, shelf_height = canvas["cursor_x"], canvas["shelf_y"], canvas["shelf_height"]
+            if x + width > canvas_side:
+                # Would open a new shelf below the current one; the canvas only changes if the rectangle fits
+                # there, so a later, shorter rectangle can still use the rest of the current shelf.
+                x, y, shelf_height = 0, y + shelf_height + padding, 0
+            if y + height <= canvas_side and x + width <= canvas_side:
+                canvas["placements"].append((i, x, y))
+                canvas["cursor_x"] = x + width + padding
+                canvas["shelf_y"] = y
+                canvas["shelf_height"] = max(shelf_height, height)
+                placed = True
+                break
+        if not placed:
+            canvases.append({"placements": [(i, 0, 0)], "cursor_x": width + padding, "shelf_y": 0, "shelf_height": height})
+    return [canvas["placements"] for canvas in canvases]
+
+
+def draw_label(draw, x, y, text):
+    """
+    Draws a small numbered tag at (x, y) so the model can refer to individual screenshots.
+    """
+    left, top, right, bottom = draw.textbbox((x + 4, y + 2), text)
+    draw.rectangle((x, y, right + 4, bottom + 2), fill=(255, 230, 0))
+    draw.text((x + 4, y + 2), text, fill=(0, 0, 0))
+
+
+def pack_images(images, canvas_side=PACK_CANVAS_SIDE, max_side=PACK_MAX_SIDE):
+    """
+    Packs several screenshots into as few composite canvases as possible, each screenshot
+    labelled #1, #2, ... in attachment order.
+    images is a list of (image_bytes, mimetype) tuples; returns the composites in the same form.
+    A single image is returned unchanged.
+    """
+    if len(images) < 2:
+        return list(images)
+
+    tiles = []
+    for image_bytes, _ in images:
+        tile = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        tile.thumbnail((min(max_side, canvas_side), min(max_side, canvas_side)))
+        tiles.append(tile)
+
+    composites = []
+    for placements in shelf_pack([tile.size for tile in tiles], canvas_side=canvas_side):
+        # Crop the canvas to what was used so empty space isn't billed as tiles.
+        used_width = max(x + tiles[i].width for i, x, _ in placements)
+        used_height = max(y + tiles[i].height for i, _, y in placements)
+        canvas = Image.new("RGB", (used_width, used_height), (255, 255, 255))
+        draw = ImageDraw.Draw(canvas)
+        for i, x, y in placements:
+            canvas.paste(tiles[i], (x, y))
+            draw_label(draw, x, y, f"#{i + 1}")
+        output = io.BytesIO()
+        canvas.save(output, format="JPEG", quality=85)
+        composites.append((output.getvalue(), "image/jpeg"))
+    return composites
@@ -78,6 +78,197 @@ def extract_title(enriched_report):
         return match.group(1).strip()
     return "Bug Report Ticket"
 
+# Single-pass parser.
+# The extract_* functions above each search the whole report, and their \s* prefixes can cross lines
+# and backtrack. parse_ticket tokenizes the report once: one findall over the **Header:** markers
+# whose lookahead also captures the whitespace after each header and the rest of the line where its
+# value starts. Each field is then resolved from its first token with string operations; the later
+# tokens of a header are only looked at when the first doesn't match (an empty or unusual value),
+# reproducing what the extract_* regexes fall through to, backtracking included.
+
+TICKET_HEADERS = ("Title", "Description", "Priority", "Recommended Assignee", "Labels")
+
+# Only the opening "**" is consumed so a header's closing "**" can still open the next one, and a
+# header inside another header's value line is still found, exactly as the per-field re.search calls
+# see them. Each token is (header, whitespace after it (across lines), rest of that line).
+_FIELD_RE = re.compile(r"\*\*(?=(Title|Description|Priority|Recommended Assignee|Labels):\*\*(\s*)([^\n]*))")
+_WORD_RE = re.compile(r"\w+")
+_DESCRIPTION_HEADER = "**Description:**"
+
+# Stray "attachments:" lines, then "**Attachments:**" blocks up to the next header or end-of-string.
+# (A separate "**Attachments:** None" pass is unnecessary: the block pattern already removes it.)
+_ATTACHMENT_LINES_RE = re.compile(r"(?im)^\s*attachments:.*(?:\n|$)")
+_ATTACHMENT_BLOCKS_RE = re.compile(r"(?is)\*\*Attachments:\*\*.*?(?=\n\*\*|$)")
+
+
+class TicketFields:
+    """
+    All fields of an enriched report, as parse_ticket returns them.
+    Values and fallbacks are the same as the matching extract_* function.
+    """
+    __slots__ = ("title", "description", "priority", "assignee", "labels")
+
+    def __init__(self, title, description, priority, assignee, labels):
+        self.title = title
+        self.description = description
+        self.priority = priority
+        self.assignee = assignee
+        self.labels = labels
+
+    def __repr__(self):
+        return (
+            f"TicketFields(title={self.title!r}, description={self.description!r}, priority={self.priority!r}, "
+            f"assignee={self.assignee!r}, labels={self.labels!r})"
+        )
+
+
+def _line_value(tokens, header):
+    """
+    Returns what \\s*(.+) captures after the first of the header's tokens where it matches, or None.
+    """
+    for name, gap, value in tokens:
+        if name == header:
+            if value:
+                return value
+            # The gap runs to the end of the report; backtracking lets (.+) take one non-newline space.
+            if gap.strip("\n"):
+                return ""
+    return None
+
+
+def _priority_value(tokens):
+    for name, gap, value in tokens:
+        if name == "Priority":
+            word = _WORD_RE.match(value)
+            if word:
+                return word.group()
+    return None
+
+
+def _assignee_value(tokens):
+    # ([^(\n]+) after the gap; a value starting with "(" (or none) backtracks into the gap, which only
+    # matches if it has a non-newline space, leaving whitespace that strips to "".
+    for name, gap, value in tokens:
+        if name == "Recommended Assignee":
+            if value and value[0] != "(":
+                return value.partition("(")[0]
+            if gap.strip("\n"):
+                return ""
+    return None
+
+
+def _description_at(report, start):
+    # (.+?)(?=\n\*\*|$) with DOTALL from the first character after the gap: up to the next line
+    # starting with "**", or the end of the report ($ also matches before a final newline).
+    end = len(report) - 1 if report.endswith("\n") else len(report)
+    boundary = report.find("\n**", start + 1, end)
+    return report[start:boundary if boundary >= 0 else end]
+
+
+def _description_value(report, tokens):
+    # Tokens and occurrences of the header string line up: each occurrence is one token.
+    position = -1
+    for name, gap, value in tokens:
+        if name != "Description":
+            continue
+        position = report.find(_DESCRIPTION_HEADER, position + 1)
+        if value:
+            return _description_at(report, position + len(_DESCRIPTION_HEADER) + len(gap))
+        if gap:
+            return ""
+    return None
+
+
+def parse_ticket(enriched_report):
+    """
+    Parses every field of the enriched report in one pass over its **Header:** markers.
+    Returns a TicketFields with the same values (and fallbacks) as extract_title, extract_description,
+    extract_priority, extract_assignee and extract_labels.
+    """
+    tokens = _FIELD_RE.findall(enriched_report)
+    # The first token of each header (reversed, so earlier tokens overwrite later ones).
+    first = {token[0]: token for token in reversed(tokens)}
+
+    token = first.get("Title")
+    title = None if token is None else token[2] or _line_value(tokens, "Title")
+
+    token = first.get("Description")
+    if token is None:
+        description = None
+    elif token[2]:
+        start = enriched_report.find(_DESCRIPTION_HEADER) + len(_DESCRIPTION_HEADER) + len(token[1])
+        description = _description_at(enriched_report, start)
+    else:
+        description = _description_value(enriched_report, tokens)
+    description = description.strip() if description is not None else "No description provided."
+
+    token = first.get("Priority")
+    priority = None
+    if token is not None:
+        word = _WORD_RE.match(token[2])
+        priority = word.group() if word else _priority_value(tokens)
+
+    token = first.get("Recommended Assignee")
+    assignee = None
+    if token is not None:
+        value = token[2]
+        # The capture never contains "(", so only the dash/comma role suffix needs removing.
+        assignee = value.partition("(")[0] if value and value[0] != "(" else _assignee_value(tokens)
+        if assignee is not None:
+            assignee = assignee.strip().partition("-")[0].partition(",")[0].strip()
+
+    token = first.get("Labels")
+    labels = None
+    if token is not None:
+        labels_str = token[2] or _line_value(tokens, "Labels")
+        if labels_str:
+            labels = [label.strip() for label in labels_str.split(",") if label.strip()] or None
+    if labels is None:
+        # Fallback: examine the title for keywords.
+        lowered = title.strip().lower() if title else ""
+        if "feature" in lowered:
+            labels = ["Feature"]
+        elif "improvement" in lowered:
+            labels = ["Improvement"]
+        else:
+            labels = ["Bug"]
+
+    title = title.strip() if title is not None else "Bug Report Ticket"
+    return TicketFields(title, description, priority, assignee, labels)
+
+
+def strip_attachments(ticket):
+    """
+    Removes any 'attachments:' lines and **Attachments:** sections from GPT output.
+    """
+    return _ATTACHMENT_BLOCKS_RE.sub("", _ATTACHMENT_LINES_RE.sub("", ticket))
+
+# Slack markup in a raw report: <@U123>, <#C123|name>, <https://url|text>, <https://url>.
+_SLACK_MARKUP_RE = re.compile(r"<([@#!][^>|]*)(?:\|([^>]*))?>|<([^>|]+)(?:\|([^>]*))?>")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+FALLBACK_TITLE_LENGTH = 80
+
+
+def guess_title(raw_text, max_length=FALLBACK_TITLE_LENGTH):
+    """
+    Returns a title for a raw report without asking GPT: its first sentence of the first non-empty
+    line, with Slack markup flattened, cut at a word boundary to max_length characters.
+    """
+    text = _SLACK_MARKUP_RE.sub(lambda m: m.group(2) or m.group(4) or m.group(3) or "", raw_text)
+    line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+    title = " ".join(_SENTENCE_END_RE.split(line, 1)[0].split())
+    if len(title) > max_length:
+        title = title[:max_length].rsplit(" ", 1)[0].rstrip(",;:-") + "…"
+    return title[:1].upper() + title[1:] if title else "Bug Report Ticket"
+
+
+def fallback_ticket(raw_text, priority="Medium", labels=("Bug",)):
+    """
+    Returns TicketFields built only from the raw text: guess_title, the text itself as the description,
+    and a default priority and label. Used when GPT misses the enrichment deadline.
+    """
+    return TicketFields(guess_title(raw_text), raw_text.strip(), priority, None, list(labels))
+
 # Quick test of these functions using a sample enriched report.
 if __name__ == "__main__":
     sample_report = """
@@ -95,4 +286,5 @@ if __name__ == "__main__":
     print("Extracted Title:", extract_title(sample_report))
     print("Extracted Priority:", extract_priority(sample_report))
     print("Extracted Assignee:", extract_assignee(sample_report))
-    print("Extracted Labels:", extract_labels(sample_report))
\ No newline at end of file
+    print("Extracted Labels:", extract_labels(sample_report))
+    print("Parsed Ticket:", parse_ticket(sample_report))
\ No newline at end of file
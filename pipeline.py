@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import STAGE_LATENCY, Counter
+
+logger = logging.getLogger(__name__)
+
+# Threads running pipeline stages, shared by every report in flight.
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 32))
+# Recent report traces kept for /traces.
+PIPELINE_TRACES = int(os.getenv("PIPELINE_TRACES", 50))
+
+CRITICAL_STAGE = Counter(
+    "bugbot_pipeline_critical_stage_total",
+    "Reports whose critical path went through each pipeline stage.",
+)
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+_traces = deque(maxlen=PIPELINE_TRACES)
+
+
+class Stage:
+    """
+    One step of a pipeline. func is called with the results of its dependencies as keyword arguments
+    (by stage name). An optional stage that raises is logged and yields default instead of failing
+    the run.
+    """
+
+    def __init__(self, name, func, deps=(), optional=False, default=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.optional = optional
+        self.default = default
+
+
+class Trace:
+    """
+    Timings of one pipeline run: when each stage became ready, started and finished, relative to the
+    start of the run, and the critical path through them.
+    """
+
+    def __init__(self, label, stages):
+        self.label = label
+        self.stages = stages
+        self.started_at = time.time()
+        self.timings = {}
+        self.statuses = {}
+        self._origin = time.perf_counter()
+
+    def now(self):
+        return time.perf_counter() - self._origin
+
+    def critical_path(self):
+        """
+        Returns stage names from the first to the last stage of the chain that determined the total
+        time: starting from the stage that finished last, follow the dependency that finished last.
+        """
+        finished = {name: timing for name, timing in self.timings.items() if timing.get("end") is not None}
+        if not finished:
+            return []
+        name = max(finished, key=lambda stage: finished[stage]["end"])
+        path = [name]
+        while True:
+            deps = [dep for dep in self.stages[name].deps if dep in finished]
+            if not deps:
+                return path[::-1]
+            name = max(deps, key=lambda dep: finished[dep]["end"])
+            path.append(name)
+
+    def as_dict(self):
+        total = max((timing["end"] for timing in self.timings.values() if timing.get("end") is not None), default=0.0)
+        return {
+            "label": self.label,
+            "started_at": round(self.started_at, 3),
+            "total_ms": round(total * 1000, 1),
+            "sum_of_stages_ms": round(sum(t["end"] - t["start"] for t in self.timings.values() if t.get("end") is not None) * 1000, 1),
+            "critical_path": self.critical_path(),
+            "stages": {
+                name: {
+                    "ready_ms": round(timing["ready"] * 1000, 1),
+                    "start_ms": round(timing["start"] * 1000, 1) if timing.get("start") is not None else None,
+                    "duration_ms": round((timing["end"] - timing["start"]) * 1000, 1) if timing.get("end") is not None else None,
+                    "status": self.statuses.get(name, "pending"),
+                }
+                for name, timing in self.timings.items()
+            },
+        }
+
+    def format(self):
+        """
+        Returns a one-line summary: total time, critical path with stage durations.
+        """
+        data = self.as_dict()
+        path = " -> ".join(f"{name} {data['stages'][name]['duration_ms']:.0f}ms" for name in data["critical_path"])
+        return (f"{self.label}: {data['total_ms']:.0f}ms total ({data['sum_of_stages_ms']:.0f}ms of stages), "
+                f"critical path {path}")
+
+
+class Pipeline:
+    """
+    Runs stages as a dependency graph: every stage starts on the shared pool as soon as all of its
+    dependencies have finished, so independent work (thread context, attachments, Linear metadata,
+    the acknowledgement) overlaps and the total approaches the longest chain rather than the sum.
+    """
+
+    def __init__(self, stages, label="pipeline"):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stages {missing}")
+        self.trace = Trace(label, self.stages)
+        self.results = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._error = None
+        self._remaining = len(self.stages)
+
+    def _submit_ready(self):
+        # Called with the lock held.
+        for name, stage in self.stages.items():
+            if name in self.trace.timings:
+                continue
+            if all(dep in self.results for dep in stage.deps):
+                self.trace.timings[name] = {"ready": self.trace.now(), "start": None, "end": None}
+                _executor.submit(self._run_stage, stage)
+
+    def _run_stage(self, stage):
+        timing = self.trace.timings[stage.name]
+        timing["start"] = self.trace.now()
+        try:
+            result = stage.func(**{dep: self.results[dep] for dep in stage.deps})
+            status = "ok"
+        except Exception as e:
+            if not stage.optional:
+                timing["end"] = self.trace.now()
+                self.trace.statuses[stage.name] = "error"
+                with self._lock:
+                    if self._error is None:
+                        self._error = e
+                self._done.set()
+                return
+            logger.warning(f"Optional stage {stage.name} failed: {e}")
+            result, status = stage.default, "failed"
+        timing["end"] = self.trace.now()
+        self.trace.statuses[stage.name] = status
+        STAGE_LATENCY.observe(timing["end"] - timing["start"], stage=stage.name)
+        with self._lock:
+            self.results[stage.name] = result
+            self._remaining -= 1
+            if self._remaining == 0:
+                self._done.set()
+            elif self._error is None:
+                self._submit_ready()
+
+    def run(self):
+        """
+        Runs every stage and returns {stage name: result}. Raises the first error of a required stage
+        (stages already running finish in the background; their dependents never start).
+        The trace is kept for /traces either way.
+        """
+        with self._lock:
+            self._submit_ready()
+        self._done.wait()
+        _traces.append(self.trace)
+        for name in self.trace.critical_path():
+            CRITICAL_STAGE.inc(stage=name)
+        logger.info(self.trace.format())
+        if self._error is not None:
+            raise self._error
+        return self.results
+
+
+def recent_traces():
+    """
+    Returns the most recent pipeline traces as dicts, newest first.
+    """
+    return [trace.as_dict() for trace in reversed(_traces)]
@@ -0,0 +1,271 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from clients import get_openai_client
+from metrics import Counter, record_upstream
+from slack_context import THREAD_CONTEXT_MAX_CHARS, trim_thread
+from store import get_connection
+from usage import record_completion_usage
+
+logger = logging.getLogger(__name__)
+
+# Bounds the report text in the enrichment prompt. Longer pastes are condensed locally: repeated log
+# lines collapsed, then stack traces and error lines kept alongside the start of the prose.
+REPORT_MAX_CHARS = int(os.getenv("REPORT_MAX_CHARS", 6000))
+# Threads longer than THREAD_CONTEXT_MAX_CHARS are summarized in chunks of this many messages. Chunk
+# boundaries never move as a thread grows, so each chunk's summary is cached and reused.
+THREAD_SUMMARY_CHUNK = int(os.getenv("THREAD_SUMMARY_CHUNK", 25))
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 4))
+# Frame lines kept from each end of a long stack trace.
+TRACE_HEAD_LINES = 8
+TRACE_TAIL_LINES = 4
+
+SUMMARIES_DB = "summaries.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    digest TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+SUMMARY_CACHE = Counter(
+    "bugbot_summary_cache_total",
+    "Thread chunk summaries, by result (hit = reused from the cache, miss = summarized by GPT).",
+)
+PREPROCESSED = Counter(
+    "bugbot_preprocessed_chars_total",
+    "Characters of report and thread text before and after preprocessing, by stage (input, output).",
+)
+
+# Digits and hex ids vary between otherwise identical log lines.
+_VARIABLE_RE = re.compile(r"0x[0-9a-fA-F]+|\b[0-9a-fA-F]{8,}\b|\d+")
+_LOG_LINE_RE = re.compile(
+    r"^\s*(?:\[?\d{4}-\d{2}-\d{2}[T ]\d|\[?\d{2}:\d{2}:\d{2}|(?:TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|FATAL|CRITICAL)\b"
+    r"|at\s+\S|File \"|\tat )"
+)
+_ERROR_LINE_RE = re.compile(
+    r"\b(?:ERROR|FATAL|CRITICAL|PANIC|panic:|Exception|Error:|Traceback|segfault|Segmentation fault|"
+    r"[A-Z]\w*(?:Exception|Error)\b|HTTP [45]\d\d|status(?: code)?[ =:]+5\d\d)"
+)
+_PY_TRACE_START_RE = re.compile(r"^Traceback \(most recent call last\):")
+_FRAME_RE = re.compile(r"^\s+(?:at\s|File \"|\.\.\. \d+ more)")
+_CAUSE_RE = re.compile(r"^(?:Caused by:|During handling of the above exception)")
+
+
+def _normalize(line):
+    return _VARIABLE_RE.sub("#", line.strip())
+
+
+def dedupe_lines(text):
+    """
+    Collapses runs of log lines that differ only in numbers or ids into the first line plus a count.
+    """
+    out = []
+    previous, repeats = None, 0
+    for line in text.splitlines():
+        key = _normalize(line) if _LOG_LINE_RE.match(line) else None
+        if key is not None and key == previous:
+            repeats += 1
+            continue
+        if repeats:
+            out.append(f"    [repeated {repeats} more time{'s' if repeats > 1 else ''}]")
+        out.append(line)
+        previous, repeats = key, 0
+    if repeats:
+        out.append(f"    [repeated {repeats} more time{'s' if repeats > 1 else ''}]")
+    return "\n".join(out)
+
+
+def _trim_frames(frames):
+    if len(frames) <= TRACE_HEAD_LINES + TRACE_TAIL_LINES:
+        return frames
+    hidden = len(frames) - TRACE_HEAD_LINES - TRACE_TAIL_LINES
+    return frames[:TRACE_HEAD_LINES] + [f"    [... {hidden} lines]"] + frames[-TRACE_TAIL_LINES:]
+
+
+def extract_errors(text):
+    """
+    Returns the stack traces (Python, and Java/JavaScript style "at ..." frames, with long frame lists
+    shortened) and other error lines found in text, in order and without duplicates.
+    """
+    lines = text.splitlines()
+    found, seen = [], set()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if _PY_TRACE_START_RE.match(line) or (i + 1 < len(lines) and _ERROR_LINE_RE.search(line) and _FRAME_RE.match(lines[i + 1])):
+            block, frames = [line], []
+            i += 1
+            while i < len(lines):
+                current = lines[i]
+                # Python frames are followed by an indented source line.
+                if _FRAME_RE.match(current) or (frames and current.startswith("    ")):
+                    frames.append(current)
+                elif _CAUSE_RE.match(current):
+                    block += _trim_frames(frames) + [current]
+                    frames = []
+                else:
+                    break
+                i += 1
+            block += _trim_frames(frames)
+            # A Python traceback ends with the exception line itself.
+            if block[0].startswith("Traceback") and i < len(lines) and lines[i].strip():
+                block.append(lines[i])
+                i += 1
+            trace = "\n".join(block)
+            key = _normalize(trace)
+            if key not in seen:
+                seen.add(key)
+                found.append(trace)
+            continue
+        if _ERROR_LINE_RE.search(line):
+            key = _normalize(line)
+            if key not in seen:
+                seen.add(key)
+                found.append(line.strip())
+        i += 1
+    return found
+
+
+def condense_report(text, max_chars=REPORT_MAX_CHARS):
+    """
+    Returns the report text bounded to about max_chars, without any upstream call. Repeated log lines
+    are collapsed first; if that isn't enough, the start of the prose is kept alongside the stack
+    traces and error lines extracted from the rest, or, when those come to almost nothing, the start
+    and end of the text.
+    """
+    condensed = dedupe_lines(text)
+    if len(condensed) <= max_chars:
+        return condensed
+    # Prose is what the reporter wrote: not log lines, trace frames or error lines.
+    prose = "\n".join(
+        line for line in condensed.splitlines()
+        if not _LOG_LINE_RE.match(line) and not line.startswith((" ", "\t")) and not _ERROR_LINE_RE.search(line)
+    ).strip()
+    prose_budget = max_chars // 3
+    if len(prose) > prose_budget:
+        prose = prose[:prose_budget].rsplit(" ", 1)[0] + " [...]"
+    errors, size = [], 0
+    budget = max_chars - len(prose)
+    for error in extract_errors(condensed):
+        if size + len(error) + 2 > budget:
+            errors.append("[further errors omitted]")
+            break
+        errors.append(error)
+        size += len(error) + 2
+    parts = [prose] if prose else []
+    if errors:
+        parts.append("Errors and stack traces extracted from the pasted logs:\n" + "\n\n".join(errors))
+    condensed_report = "\n\n".join(parts)
+    # Indented pastes without error lines (code, YAML, JSON, quiet logs) leave almost nothing above;
+    # keep the start and end of the paste instead.
+    if len(condensed_report) < max_chars // 10:
+        return head_and_tail(condensed, max_chars)
+    return condensed_report
+
+
+def head_and_tail(text, max_chars):
+    """
+    Returns the first two thirds and last third of max_chars of text, cut at line breaks, with a marker
+    for what was left out.
+    """
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars * 2 // 3].rsplit("\n", 1)[0]
+    tail = text[-(max_chars // 3):].split("\n", 1)[-1]
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head}\n[... {omitted} characters omitted ...]\n{tail}"
+
+
+def _digest(text):
+    return hashlib.sha256(f"{SUMMARY_MODEL}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _cached_summary(digest):
+    row = get_connection(SUMMARIES_DB, SCHEMA).execute(
+        "SELECT summary FROM summaries WHERE digest = ?", (digest,)
+    ).fetchone()
+    return row["summary"] if row else None
+
+
+def summarize(text, channel=None, user=None):
+    """
+    Returns a short summary of a chunk of thread messages, from the cache when the same chunk was
+    summarized before.
+    """
+    digest = _digest(text)
+    summary = _cached_summary(digest)
+    if summary is not None:
+        SUMMARY_CACHE.inc(result="hit")
+        return summary
+    SUMMARY_CACHE.inc(result="miss")
+    try:
+        response = get_openai_client().chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": (
+                    "Summarize this part of a Slack thread about a bug in at most five short bullet points. "
+                    "Keep symptoms, affected platforms and versions, steps to reproduce, error messages and "
+                    "anything already ruled out. Drop greetings and chatter."
+                )},
+                {"role": "user", "content": text},
+            ],
+            temperature=0,
+        )
+    except Exception:
+        record_upstream("openai", "error")
+        raise
+    record_upstream("openai", 200)
+    record_completion_usage(response, channel=channel, user=user)
+    summary = response.choices[0].message.content.strip()
+    connection = get_connection(SUMMARIES_DB, SCHEMA)
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO summaries (digest, summary, created_at) VALUES (?, ?, ?)",
+            (digest, summary, time.time()),
+        )
+    return summary
+
+
+def condense_thread(lines, channel=None, user=None, max_chars=THREAD_CONTEXT_MAX_CHARS):
+    """
+    Returns thread context of at most about max_chars from "Name: text" lines (see slack_context).
+    Short threads are passed through. Longer ones are map-reduced: every complete chunk of
+    THREAD_SUMMARY_CHUNK messages is summarized (cached by content hash, so only new chunks cost a
+    call), the unfinished last chunk is kept verbatim, and the joined summaries are summarized once
+    more if they still don't fit.
+    """
+    lines = [dedupe_lines(line) for line in lines]
+    if sum(len(line) + 1 for line in lines) <= max_chars:
+        return "\n".join(lines)
+    complete = len(lines) // THREAD_SUMMARY_CHUNK * THREAD_SUMMARY_CHUNK
+    chunks = [lines[start:start + THREAD_SUMMARY_CHUNK] for start in range(0, complete, THREAD_SUMMARY_CHUNK)]
+    with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as executor:
+        summaries = list(executor.map(lambda chunk: summarize("\n".join(chunk), channel, user), chunks))
+    summary = "\n".join(
+        f"[Messages {index * THREAD_SUMMARY_CHUNK + 1}-{(index + 1) * THREAD_SUMMARY_CHUNK}]\n{text}"
+        for index, text in enumerate(summaries)
+    )
+    if len(summary) > max_chars // 2:
+        summary = "[Earlier messages]\n" + summarize(summary, channel, user)[:max_chars // 2]
+    recent = trim_thread(lines[complete:], max_chars - len(summary)) if complete < len(lines) else ""
+    return f"Summary of the thread so far:\n{summary}" + (f"\n\nLatest messages:\n{recent}" if recent else "")
+
+
+def preprocess(raw_text, thread, channel=None, user=None):
+    """
+    Returns (report text, thread context) bounded for the enrichment prompt: condense_report on the
+    report and condense_thread on the thread lines.
+    """
+    report = condense_report(raw_text)
+    context = condense_thread(thread, channel, user) if thread else ""
+    PREPROCESSED.inc(len(raw_text) + sum(len(line) + 1 for line in thread or ()), stage="input")
+    PREPROCESSED.inc(len(report) + len(context), stage="output")
+    return report, context
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+from metrics import Counter
+
+# Token-bucket limits on bug reports, as "<reports>/<seconds>": a user may file 5 reports at once and
+# then one every 12 seconds with "5/60". Empty or 0 disables a limit. Checked before any OpenAI or
+# Linear call, so a user @mentioning the bot in a loop only costs a dictionary lookup.
+RATE_LIMIT_USER = os.getenv("RATE_LIMIT_USER", "5/60")
+RATE_LIMIT_CHANNEL = os.getenv("RATE_LIMIT_CHANNEL", "30/60")
+RATE_LIMIT_GLOBAL = os.getenv("RATE_LIMIT_GLOBAL", "")
+
+# Scopes in the order they are checked.
+SCOPES = ("user", "channel", "global")
+
+RATE_LIMITED = Counter(
+    "bugbot_rate_limited_total",
+    "Bug reports refused by a token-bucket limit, by scope (user, channel, global).",
+)
+
+
+def parse_limit(spec):
+    """
+    Parses "<capacity>/<seconds>" (or just "<capacity>", per minute) into (capacity, tokens per second).
+    Returns None when the limit is disabled.
+    """
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    capacity, _, seconds = spec.partition("/")
+    capacity, seconds = float(capacity), float(seconds or 60)
+    if capacity <= 0 or seconds <= 0:
+        return None
+    return capacity, capacity / seconds
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated_at", "throttled")
+
+    def __init__(self, capacity, rate, now):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = now
+        # Set once a request is refused, so the reporter is told only once per throttled spell.
+        self.throttled = False
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return self.tokens
+
+    def retry_after(self):
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class Throttled:
+    """
+    Why a report was refused: the scope that ran out, seconds until it has a token again, and whether
+    this is the first refusal since the bucket last allowed a report (only that one gets a reply).
+    """
+
+    __slots__ = ("scope", "retry_after", "notify")
+
+    def __init__(self, scope, retry_after, notify):
+        self.scope = scope
+        self.retry_after = retry_after
+        self.notify = notify
+
+
+class RateLimiter:
+    """
+    Per-user, per-channel and global token buckets. check() refills and takes one token from each
+    applicable bucket, all or nothing, in constant time. Buckets that have refilled completely are
+    the same as new ones, so they are swept away every SWEEP_EVERY checks to bound memory.
+    """
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self, user=RATE_LIMIT_USER, channel=RATE_LIMIT_CHANNEL, global_=RATE_LIMIT_GLOBAL):
+        self.limits = {"user": parse_limit(user), "channel": parse_limit(channel), "global": parse_limit(global_)}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._checks = 0
+
+    def _bucket(self, scope, key, now):
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            capacity, rate = self.limits[scope]
+            bucket = self._buckets[(scope, key)] = TokenBucket(capacity, rate, now)
+        else:
+            bucket.refill(now)
+        return bucket
+
+    def check(self, user=None, channel=None):
+        """
+        Returns None if the report may go ahead (and charges it to every bucket), otherwise a Throttled
+        for the first scope without a token.
+        """
+        keys = {"user": user or "unknown", "channel": channel or "unknown", "global": ""}
+        now = time.monotonic()
+        with self._lock:
+            self._checks += 1
+            if self._checks % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+            buckets = [(scope, self._bucket(scope, keys[scope], now)) for scope in SCOPES if self.limits[scope]]
+            for scope, bucket in buckets:
+                if bucket.tokens < 1:
+                    notify = not bucket.throttled
+                    bucket.throttled = True
+                    RATE_LIMITED.inc(scope=scope)
+                    return Throttled(scope, bucket.retry_after(), notify)
+            for _, bucket in buckets:
+                bucket.tokens -= 1
+                bucket.throttled = False
+        return None
+
+    def _sweep(self, now):
+        full = [key for key, bucket in self._buckets.items() if bucket.refill(now) >= bucket.capacity]
+        for key in full:
+            del self._buckets[key]
+
+
+_limiter = RateLimiter()
+
+
+def check(user=None, channel=None):
+    """
+    Checks a report against the configured limits. See RateLimiter.check.
+    """
+    return _limiter.check(user, channel)
@@ -0,0 +1,250 @@
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# JSON file mapping Slack channels to a Linear team, fallback labels, assignee pool and model (see
+# compile_table for the format). It is compiled once per change and re-read when it changes on disk,
+# so routing a channel differently needs neither a deploy nor a restart. Without the file, every
+# channel gets the built-in route below.
+ROUTING_CONFIG = os.getenv("ROUTING_CONFIG", "routing.json")
+# Seconds between checks of the config file for changes.
+ROUTING_CONFIG_POLL = float(os.getenv("ROUTING_CONFIG_POLL", 5))
+# Model used to enrich reports in channels whose route doesn't name one.
+ENRICH_MODEL = os.getenv("ENRICH_MODEL", "gpt-4o")
+
+# Label ids by name for the built-in route.
+DEFAULT_LABEL_IDS = {
+    "Bug": os.getenv("LINEAR_BUG_LABEL_ID", "dfcf45d1-f4a4-4ab8-8aef-3960defc8450"),
+    "In QA": os.getenv("LINEAR_IN_QA_LABEL_ID", "ce778bdc-39e1-4a1b-a546-488fde56252b"),
+    "Internal Admin": os.getenv("LINEAR_INTERNAL_ADMIN_LABEL_ID", "031c70bb-cc93-40ec-a3dd-7ed36bc19b23"),
+    "Core Web": os.getenv("LINEAR_CORE_WEB_LABEL_ID", "1d8a8a3d-5813-439f-a421-641875357c99"),
+    "Core Mobile": os.getenv("LINEAR_CORE_MOBILE_LABEL_ID", "361e454d-9f41-494f-95ad-04301dbb3231"),
+    "Backend": os.getenv("LINEAR_BACKEND_LABEL_ID", "c3aa8f63-f8c8-4d22-915e-6ddab30829d7"),
+    "QA'd --> Functional": os.getenv("LINEAR_QA_FUNCTIONAL_LABEL_ID", "d8a01af7-45ed-4257-b039-7f1c0d4fab92"),
+    "Feature": os.getenv("LINEAR_FEATURE_LABEL_ID", "504d1625-23fb-41ac-afea-e46bcabb4e53"),
+    "Improvement": os.getenv("LINEAR_IMPROVEMENT_LABEL_ID", "3688793e-2c4c-4e5b-a261-81f365f283f8"),
+}
+# Assignee ids by the names GPT recommends, for the built-in route.
+DEFAULT_ASSIGNEES = {
+    "tut50103": "a788f89f-f3cd-4a56-8194-b2986a91f306",
+    "nikolas ioannou": "4c6b43ac-b384-42eb-8715-cfa156f58400",
+    "bhavik patel": "a788f89f-f3cd-4a56-8194-b2986a91f306",
+    "kp07usa": "4c6b43ac-b384-42eb-8715-cfa156f58400",
+    "rushil nagarsheth": "4c6b43ac-b384-42eb-8715-cfa156f58400",
+    "manas": "a788f89f-f3cd-4a56-8194-b2986a91f306",
+    "aaron": "a788f89f-f3cd-4a56-8194-b2986a91f306",
+}
+
+ROUTE_KEYS = ("team", "labels", "default_labels", "assignees", "fallback_assignee", "model")
+
+CONFIG_RELOADS = Counter(
+    "bugbot_routing_config_reloads_total",
+    "Routing config reloads after a file change, by outcome (ok, error = kept the previous config).",
+)
+
+
+class Route:
+    """
+    Where a channel's reports go, compiled from the routing config. Names are lower-cased; mappings
+    are read-only and attributes can't be reassigned, so a route can be shared between threads.
+    pool is the set of assignee ids the channel may use, or None for anyone on the team.
+    """
+
+    __slots__ = ("name", "team_id", "labels", "default_labels", "assignees", "pool", "fallback_assignee", "model")
+
+    def __init__(self, name, team_id, labels, default_labels, assignees, pool, fallback_assignee, model):
+        for slot, value in zip(self.__slots__, (name, team_id, MappingProxyType(dict(labels)), tuple(default_labels),
+                                                MappingProxyType(dict(assignees)), pool, fallback_assignee, model)):
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Route is immutable")
+
+    def allows(self, assignee_id):
+        return assignee_id is not None and (self.pool is None or assignee_id in self.pool)
+
+    def __repr__(self):
+        return f"Route({self.name!r}, team={self.team_id!r}, model={self.model!r})"
+
+
+class RoutingTable:
+    """
+    Routes by channel id plus the default route, built once by compile_table. Lookups are a dict get.
+    """
+
+    def __init__(self, default, channels, source=None):
+        self.default = default
+        self.channels = MappingProxyType(dict(channels))
+        self.source = source
+
+    def route_for(self, channel):
+        return self.channels.get(channel, self.default)
+
+    def team_ids(self):
+        """
+        Returns every Linear team id a report can be filed in, default route first.
+        """
+        ids = [self.default.team_id] + [route.team_id for route in self.channels.values()]
+        return list(dict.fromkeys(team_id for team_id in ids if team_id))
+
+
+def _compile_route(name, entry, base, restrict=True):
+    # base holds the inherited settings in the same shape the returned dict has. With restrict, an entry
+    # that lists its own assignees may only use them.
+    unknown = set(entry) - set(ROUTE_KEYS)
+    if unknown:
+        raise ValueError(f"Route {name!r}: unknown keys {sorted(unknown)} (expected {', '.join(ROUTE_KEYS)})")
+    settings = dict(base)
+    settings["labels"] = {**base["labels"], **{
+        label.strip().lower(): label_id for label, label_id in (entry.get("labels") or {}).items()}}
+    if "assignees" in entry:
+        settings["assignees"] = {assignee.strip().lower(): user_id for assignee, user_id in entry["assignees"].items()}
+        settings["pool"] = frozenset(settings["assignees"].values()) if restrict else None
+        settings["fallback_assignee"] = None
+    for key in ("team", "default_labels", "fallback_assignee", "model"):
+        if key in entry:
+            settings[key] = entry[key]
+
+    default_labels = []
+    for label in settings["default_labels"]:
+        label_id = settings["labels"].get(label.strip().lower())
+        if label_id is None:
+            raise ValueError(f"Route {name!r}: default label {label!r} is not in its labels")
+        default_labels.append(label_id)
+    fallback = settings["fallback_assignee"]
+    fallback_id = settings["assignees"].get(fallback.strip().lower()) if fallback else None
+    if fallback and fallback_id is None:
+        raise ValueError(f"Route {name!r}: fallback assignee {fallback!r} is not in its assignees")
+    route = Route(name, settings["team"], settings["labels"], default_labels, settings["assignees"],
+                  settings["pool"], fallback_id, settings["model"])
+    return route, settings
+
+
+def compile_table(config, source=None):
+    """
+    Compiles a routing config into a RoutingTable, raising ValueError if it is inconsistent:
+        {"default": {"team": "<team id>", "labels": {"Bug": "<label id>", ...}, "default_labels": ["Bug"],
+                     "assignees": {"aaron": "<user id>", ...}, "fallback_assignee": "aaron", "model": "gpt-4o"},
+         "channels": {"C0123": {"team": "<team id>", "default_labels": ["Core Mobile"], "model": "gpt-4o-mini"}}}
+    Every key is optional. The default route starts from the built-in one (LINEAR_TEAM_ID, the label and
+    assignee ids above, ENRICH_MODEL) and each channel from the default. labels add to the inherited
+    ones. default_labels are a fallback, applied only when none of GPT's labels resolve to a label id.
+    A channel's assignees replace the inherited names and restrict it to those people (the default's
+    only name people; anyone on the team can still be assigned).
+    """
+    unknown = set(config) - {"default", "channels"}
+    if unknown:
+        raise ValueError(f"Unknown routing config keys {sorted(unknown)} (expected default, channels)")
+    builtin = {
+        "team": os.getenv("LINEAR_TEAM_ID"),
+        "labels": {label.lower(): label_id for label, label_id in DEFAULT_LABEL_IDS.items()},
+        "default_labels": ["Bug"],
+        "assignees": dict(DEFAULT_ASSIGNEES),
+        "pool": None,
+        "fallback_assignee": "aaron",
+        "model": ENRICH_MODEL,
+    }
+    default, base = _compile_route("default", config.get("default") or {}, builtin, restrict=False)
+    channels = {
+        channel: _compile_route(channel, entry or {}, base)[0]
+        for channel, entry in (config.get("channels") or {}).items()
+    }
+    return RoutingTable(default, channels, source)
+
+
+def load_table(path=ROUTING_CONFIG):
+    """
+    Returns the compiled table for the config file at path, or the built-in routes if there is no file.
+    """
+    if not path or not os.path.exists(path):
+        return compile_table({})
+    with open(path, encoding="utf-8") as f:
+        return compile_table(json.load(f), source=path)
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, TypeError):
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+# The current table. Replaced as a whole on reload (a single reference assignment), never mutated, so
+# readers need no lock and a report sees one consistent route.
+_table = load_table()
+_signature_seen = _signature(ROUTING_CONFIG)
+# Callbacks run with (previous table, new table) after a reload swaps in a new table; see on_reload.
+_reload_callbacks = []
+
+
+def current():
+    return _table
+
+
+def route_for(channel):
+    """
+    Returns the Route for a channel (the default route for None or unconfigured channels).
+    """
+    return _table.route_for(channel)
+
+
+def reload_if_changed(path=ROUTING_CONFIG):
+    """
+    Recompiles the table if the config file changed (or appeared or disappeared) since the last load and
+    swaps it in. A config that fails to load is logged and the previous table stays in use.
+    Returns True if a new table was swapped in.
+    """
+    global _table, _signature_seen
+    signature = _signature(path)
+    if signature == _signature_seen:
+        return False
+    _signature_seen = signature
+    try:
+        table = load_table(path)
+    except Exception as e:
+        logger.error(f"Keeping the previous routing config; {path} failed to load: {e}")
+        CONFIG_RELOADS.inc(outcome="error")
+        return False
+    previous, _table = _table, table
+    CONFIG_RELOADS.inc(outcome="ok")
+    logger.info(f"Reloaded routing config from {path}: {len(table.channels)} channel routes")
+    for callback in list(_reload_callbacks):
+        try:
+            callback(previous, table)
+        except Exception as e:
+            logger.warning(f"Routing config reload callback {getattr(callback, '__name__', callback)} failed: {e}")
+    return True
+
+
+def on_reload(callback):
+    """
+    Registers callback(previous, table) to run after each reload that swaps in a new table, on the thread
+    that reloaded it (e.g. to load Linear data for teams the new config routes to). A callback that
+    raises is logged; the new table stays in use.
+    """
+    _reload_callbacks.append(callback)
+
+
+def start_watching(interval=ROUTING_CONFIG_POLL):
+    """
+    Starts a background thread that reloads the routing config when the file changes.
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_if_changed()
+            except Exception as e:
+                logger.warning(f"Routing config check failed: {e}")
+
+    thread = threading.Thread(target=run, name="routing-config", daemon=True)
+    thread.start()
+    return thread
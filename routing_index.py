@@ -0,0 +1,402 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import routing_config
+from clients import LINEAR_API_URL, get_linear_session, get_openai_client
+from metrics import Counter, Gauge, record_upstream
+from store import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Assignee routing from past tickets: a new report goes to whoever closed the most similar ones.
+# "hashing" embeds locally with the hashing trick (no network, deterministic); "openai" uses
+# ROUTING_EMBEDDING_MODEL. Changing it discards the saved index, which is rebuilt from Linear.
+ROUTING_EMBEDDER = os.getenv("ROUTING_EMBEDDER", "hashing")
+ROUTING_EMBEDDING_MODEL = os.getenv("ROUTING_EMBEDDING_MODEL", "text-embedding-3-small")
+# Neighbours that vote, the similarity-weighted vote share the winner needs, and the index size below
+# which routing defers to GPT's suggestion.
+ROUTING_TOP_K = int(os.getenv("ROUTING_TOP_K", 10))
+ROUTING_MIN_SCORE = float(os.getenv("ROUTING_MIN_SCORE", 0.5))
+ROUTING_MIN_TICKETS = int(os.getenv("ROUTING_MIN_TICKETS", 20))
+# Completed Linear issues are pulled into the index every ROUTING_SYNC_INTERVAL seconds. Each team's
+# first sync, including a team that a routing config reload adds later, goes back ROUTING_HISTORY_DAYS.
+ROUTING_SYNC_INTERVAL = float(os.getenv("ROUTING_SYNC_INTERVAL", 900))
+ROUTING_HISTORY_DAYS = int(os.getenv("ROUTING_HISTORY_DAYS", 180))
+HASHING_DIMENSIONS = 512
+SYNC_PAGE_SIZE = 100
+
+INDEX_FILE = "routing_index.npz"
+
+COMPLETED_ISSUES_QUERY = """
+query CompletedIssues($teamId: ID!, $since: DateTimeOrDuration!, $first: Int!, $after: String) {
+  issues(
+    first: $first
+    after: $after
+    filter: { team: { id: { eq: $teamId } }, completedAt: { gt: $since }, assignee: { null: false } }
+  ) {
+    nodes { id title description completedAt assignee { id } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+ROUTING_DECISIONS = Counter(
+    "bugbot_routing_decisions_total",
+    "Assignee choices, by source (index = similar past tickets, model = GPT's suggestion, default).",
+)
+ROUTING_INDEX_SIZE = Gauge(
+    "bugbot_routing_index_tickets",
+    "Completed tickets in the assignee routing index.",
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    Embeds text without a model: words and word pairs are hashed into a fixed number of signed
+    buckets (the hashing trick), weighted by log term frequency and L2-normalized.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimensions=HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _bucket(self, token):
+        digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        return digest % self.dimensions, 1.0 if digest >> 63 else -1.0
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN_RE.findall(text.lower())
+            counts = {}
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                bucket, sign = self._bucket(token)
+                vectors[row, bucket] += sign * (1.0 + np.log(count))
+        return _normalize(vectors)
+
+
+class OpenAIEmbedder:
+    """
+    Embeds text with an OpenAI embedding model.
+    """
+
+    def __init__(self, model=ROUTING_EMBEDDING_MODEL):
+        self.model = model
+        self.name = f"openai:{model}"
+
+    def embed(self, texts):
+        try:
+            response = get_openai_client().embeddings.create(model=self.model, input=list(texts))
+        except Exception:
+            record_upstream("openai", "error")
+            raise
+        record_upstream("openai", 200)
+        return _normalize(np.array([item.embedding for item in response.data], dtype=np.float32))
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def make_embedder(name=ROUTING_EMBEDDER):
+    if name == "openai":
+        return OpenAIEmbedder()
+    if name == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown ROUTING_EMBEDDER {name!r} (expected hashing or openai)")
+
+
+class VectorIndex:
+    """
+    Unit vectors of past tickets with their issue, assignee and Linear team ids, in one preallocated
+    float32 matrix that doubles when full, so adding a ticket is amortized O(1). search() is one
+    matrix-vector product plus a partial sort, over one team's rows when a team is given.
+    """
+
+    def __init__(self, dimensions, capacity=1024):
+        self.dimensions = dimensions
+        self._vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        # Each row's team as a small integer code, so a team filter is one vectorized comparison.
+        self._team_codes = np.zeros(capacity, dtype=np.int32)
+        self._codes = {}
+        self.issue_ids = []
+        self.assignees = []
+        self.teams = []
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.issue_ids)
+
+    def add(self, vectors, issue_ids, assignees, teams):
+        """
+        Adds (or replaces, by issue id) tickets with their vectors.
+        """
+        with self._lock:
+            for vector, issue_id, assignee, team_id in zip(vectors, issue_ids, assignees, teams):
+                position = self._positions.get(issue_id)
+                if position is None:
+                    position = len(self.issue_ids)
+                    if position == len(self._vectors):
+                        grown = np.zeros((2 * len(self._vectors), self.dimensions), dtype=np.float32)
+                        grown[:position] = self._vectors
+                        self._vectors = grown
+                        self._team_codes = np.concatenate([self._team_codes, np.zeros_like(self._team_codes)])
+                    self.issue_ids.append(issue_id)
+                    self.assignees.append(assignee)
+                    self.teams.append(team_id)
+                    self._positions[issue_id] = position
+                else:
+                    self.assignees[position] = assignee
+                    self.teams[position] = team_id
+                self._vectors[position] = vector
+                self._team_codes[position] = self._codes.setdefault(team_id, len(self._codes))
+
+    def count(self, team_id):
+        """
+        Returns the number of tickets indexed for a team.
+        """
+        with self._lock:
+            code = self._codes.get(team_id)
+            return 0 if code is None else int(np.count_nonzero(self._team_codes[:len(self.issue_ids)] == code))
+
+    def search(self, vector, k=ROUTING_TOP_K, team_id=None):
+        """
+        Returns up to k (cosine similarity, issue id, assignee id) tuples, most similar first, from the
+        tickets of team_id (all tickets if None).
+        """
+        with self._lock:
+            total = len(self.issue_ids)
+            if team_id is None:
+                rows = None
+            else:
+                code = self._codes.get(team_id)
+                if code is None:
+                    return []
+                rows = np.flatnonzero(self._team_codes[:total] == code)
+            count = total if rows is None else len(rows)
+            if count == 0:
+                return []
+            # Scoring every row and then selecting the team's is cheaper than copying its rows out first.
+            scores = self._vectors[:total] @ vector
+            if rows is not None:
+                scores = scores[rows]
+            k = min(k, count)
+            top = np.argpartition(scores, count - k)[count - k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            if rows is not None:
+                return [(float(scores[i]), self.issue_ids[rows[i]], self.assignees[rows[i]]) for i in top]
+            return [(float(scores[i]), self.issue_ids[i], self.assignees[i]) for i in top]
+
+    def save(self, path, embedder_name, synced_until):
+        """
+        Writes the index with synced_until ({team id: latest completedAt synced}) stored as JSON.
+        """
+        # A temporary file of its own: every gunicorn worker runs a sync and may save at the same time.
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".routing_index-", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f, self._lock:
+                count = len(self.issue_ids)
+                np.savez(f, vectors=self._vectors[:count], issue_ids=np.array(self.issue_ids, dtype=object),
+                         assignees=np.array(self.assignees, dtype=object), teams=np.array(self.teams, dtype=object),
+                         embedder=embedder_name,
+                         synced_until=json.dumps(synced_until))
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path, embedder_name):
+        """
+        Returns (index, synced_until by team id) from a saved file, or (None, {}) if there is none, it
+        can't be read or it was built with a different embedder; the next sync then rebuilds it from Linear.
+        """
+        if not os.path.exists(path):
+            return None, {}
+        try:
+            with np.load(path, allow_pickle=True) as data:
+                if str(data["embedder"]) != embedder_name:
+                    return None, {}
+                vectors = data["vectors"]
+                index = cls(vectors.shape[1], capacity=max(1024, len(vectors)))
+                index.add(vectors, list(data["issue_ids"]), list(data["assignees"]), list(data["teams"]))
+                return index, json.loads(str(data["synced_until"]))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable routing index {path}: {e}")
+            return None, {}
+
+
+class Router:
+    """
+    The embedder, its index of completed tickets and the Linear sync that keeps the index current.
+    """
+
+    def __init__(self, embedder=None, path=None):
+        self.embedder = embedder or make_embedder()
+        self.path = path or os.path.join(DATA_DIR, INDEX_FILE)
+        self.index, self.synced_until = VectorIndex.load(self.path, self.embedder.name)
+        self._sync_lock = threading.Lock()
+        self._sync_requested = threading.Event()
+
+    def add_tickets(self, issues):
+        """
+        Adds issues ({"id", "title", "description", "assignee_id", "team_id"}) to the index.
+        """
+        if not issues:
+            return
+        vectors = self.embedder.embed([f"{issue['title']}\n{issue.get('description') or ''}" for issue in issues])
+        if self.index is None:
+            self.index = VectorIndex(vectors.shape[1])
+        self.index.add(vectors, [issue["id"] for issue in issues], [issue["assignee_id"] for issue in issues],
+                       [issue["team_id"] for issue in issues])
+        ROUTING_INDEX_SIZE.set(len(self.index))
+
+    def suggest(self, text, team_id, k=ROUTING_TOP_K):
+        """
+        Returns (assignee id, vote share) from the k most similar past tickets of the Linear team the
+        report is filed in, or None when that team has too few indexed tickets or no assignee wins at
+        least ROUTING_MIN_SCORE of the similarity-weighted vote. Only the team's own tickets vote, since
+        Linear rejects an assignee from another team.
+        """
+        if self.index is None or self.index.count(team_id) < ROUTING_MIN_TICKETS:
+            return None
+        neighbours = self.index.search(self.embedder.embed([text])[0], k, team_id=team_id)
+        votes = {}
+        for score, _, assignee in neighbours:
+            if score > 0:
+                votes[assignee] = votes.get(assignee, 0.0) + score
+        total = sum(votes.values())
+        if not total:
+            return None
+        assignee, weight = max(votes.items(), key=lambda item: item[1])
+        share = weight / total
+        return (assignee, share) if share >= ROUTING_MIN_SCORE else None
+
+    def sync(self):
+        """
+        Pulls issues completed since each routed team's last sync from Linear into the index and saves it.
+        A team without a last sync (new, or added to the routing config since) starts ROUTING_HISTORY_DAYS back.
+        Returns the number of issues added.
+        """
+        with self._sync_lock:
+            history_start = (datetime.now(timezone.utc) - timedelta(days=ROUTING_HISTORY_DAYS)).isoformat()
+            added = 0
+            try:
+                for team_id in routing_config.current().team_ids():
+                    issues, latest = self._completed_issues(team_id, self.synced_until.get(team_id) or history_start)
+                    self.add_tickets(issues)
+                    self.synced_until[team_id] = latest
+                    added += len(issues)
+            finally:
+                # Teams synced before a failure keep their progress.
+                if self.index is not None:
+                    self.index.save(self.path, self.embedder.name, dict(self.synced_until))
+            return added
+
+    def _completed_issues(self, team_id, since):
+        """
+        Returns a team's issues completed after since and the latest completedAt among them (since if none).
+        """
+        issues, latest, after = [], since, None
+        while True:
+            page = _linear_query(COMPLETED_ISSUES_QUERY, {
+                "teamId": team_id, "since": since, "first": SYNC_PAGE_SIZE, "after": after,
+            })["issues"]
+            for node in page["nodes"]:
+                issues.append({"id": node["id"], "title": node.get("title") or "", "description": node.get("description"),
+                               "assignee_id": node["assignee"]["id"], "team_id": team_id})
+                latest = max(latest, node.get("completedAt") or latest)
+            if not page["pageInfo"]["hasNextPage"]:
+                return issues, latest
+            after = page["pageInfo"]["endCursor"]
+
+    def request_sync(self):
+        """
+        Makes run_sync start its next sync now instead of at the end of its interval.
+        """
+        self._sync_requested.set()
+
+    def run_sync(self, interval=ROUTING_SYNC_INTERVAL):
+        while True:
+            try:
+                added = self.sync()
+                if added:
+                    logger.info(f"Routing index: added {added} completed tickets ({len(self.index)} total)")
+            except Exception as e:
+                logger.warning(f"Routing index sync failed: {e}")
+            self._sync_requested.wait(interval)
+            self._sync_requested.clear()
+
+
+def _linear_query(query, variables):
+    try:
+        response = get_linear_session().post(
+            LINEAR_API_URL,
+            headers={"Content-Type": "application/json", "Authorization": os.getenv("LINEAR_API_KEY")},
+            json={"query": query, "variables": variables},
+        )
+    except Exception:
+        record_upstream("linear", "error")
+        raise
+    record_upstream("linear", response.status_code)
+    result = response.json()
+    if "errors" in result:
+        raise Exception(f"Linear API error: {result['errors']}")
+    return result["data"]
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """
+    Returns the process-wide router, loading the saved index on first call.
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = Router()
+                if _router.index is not None:
+                    ROUTING_INDEX_SIZE.set(len(_router.index))
+    return _router
+
+
+def _sync_added_teams(previous, table):
+    if set(table.team_ids()) - set(previous.team_ids()):
+        get_router().request_sync()
+
+
+def start_sync():
+    """
+    Loads the index and starts the background Linear sync (first run immediately). A routing config reload
+    that adds a team starts a sync right away, which backfills that team's history.
+    """
+    thread = threading.Thread(target=get_router().run_sync, name="routing-sync", daemon=True)
+    thread.start()
+    routing_config.on_reload(_sync_added_teams)
+    return thread
+
+
+def suggest_assignee(text, team_id):
+    """
+    Returns (assignee id, vote share) for a report's text in a Linear team, or None. See Router.suggest.
+    """
+    return get_router().suggest(text, team_id)
@@ -15,6 +15,8 @@ from parse_fields import extract_title, extract_priority, extract_assignee, extr
 
 # Load environment variables from the .env file.
 load_dotenv()
+# Reads LINEAR_TEAM_ID and the label id variables, so it is imported after the .env file is loaded.
+import routing_config
 
 # Set OpenAI API key.
 
@@ -38,7 +40,7 @@ def enrich_bug_report(raw_text):
         f"{raw_text}\n"
     )
 
-    response = client.chat.completions.create(model="gpt-4o",
+    response = client.chat.completions.create(model=routing_config.route_for(None).model,
     messages=[
         {
             "role": "system",
@@ -62,11 +64,12 @@ def enrich_bug_report(raw_text):
     return ticket
 
 def create_linear_ticket(enriched_report):
+    # Team, label and assignee ids come from the default route of the shared routing config.
+    route = routing_config.route_for(None)
     LINEAR_API_KEY = os.getenv("LINEAR_API_KEY")
-    LINEAR_TEAM_ID = os.getenv("LINEAR_TEAM_ID")
 
-    if not LINEAR_API_KEY or not LINEAR_TEAM_ID:
-        raise ValueError("Please ensure LINEAR_API_KEY and LINEAR_TEAM_ID are set in your environment.")
+    if not LINEAR_API_KEY or not route.team_id:
+        raise ValueError("Please ensure LINEAR_API_KEY and LINEAR_TEAM_ID (or a routing config team) are set.")
 
     # Extract fields from the GPT output.
     title = extract_title(enriched_report)
@@ -75,43 +78,25 @@ def create_linear_ticket(enriched_report):
     assignee_name = extract_assignee(enriched_report)
     labels = extract_labels(enriched_report)
 
-    if not labels:
-        labels = ["Bug"]
-
     priority_map = {"low": 0, "medium": 1, "high": 2}
     priority = priority_map.get(priority_str.lower(), 1) if priority_str else 1
 
     # Normalize assignee name for case-insensitive matching.
     assignee_name = assignee_name.lower() if assignee_name else ""
-    ASSIGNEE_MAP = {
-        "tut50103": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-        "nikolas ioannou": "4c6b43ac-b384-42eb-8715-cfa156f58400",
-        "bhavik patel": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-        "kp07usa": "4c6b43ac-b384-42eb-8715-cfa156f58400",
-        "rushil nagarsheth": "4c6b43ac-b384-42eb-8715-cfa156f58400",
-        "manas": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-        "aaron": "a788f89f-f3cd-4a56-8194-b2986a91f306",
-    }
-
-    assignee_id = ASSIGNEE_MAP.get(assignee_name, ASSIGNEE_MAP["kp07usa"])  # Use kp07usa as fallback
+    assignee_id = route.assignees.get(assignee_name) or route.fallback_assignee
     print("Extracted assignee:", assignee_name)
 
-    TICKET_TYPE_MAP = {
-        "Bug": os.getenv("LINEAR_BUG_LABEL_ID", "74ecf219-8bfd-4944-b106-4b42273f84a8"),
-        "Feature": os.getenv("LINEAR_FEATURE_LABEL_ID", "504d1625-23fb-41ac-afea-e46bcabb4e53"),
-        "Improvement": os.getenv("LINEAR_IMPROVEMENT_LABEL_ID", "3688793e-2c4c-4e5b-a261-81f365f283f8")
-    }
     mapped_labels = []
-    for label in labels:
-        normalized = label.strip().capitalize()
-        if normalized in TICKET_TYPE_MAP:
-            mapped_labels.append(TICKET_TYPE_MAP[normalized])
+    for label in labels or []:
+        label_id = route.labels.get(label.strip().lower())
+        if label_id and label_id not in mapped_labels:
+            mapped_labels.append(label_id)
     if not mapped_labels:
-        mapped_labels = [TICKET_TYPE_MAP["Bug"]]
+        mapped_labels = list(route.default_labels)
 
     variables = {
         "input": {
-            "teamId": LINEAR_TEAM_ID,
+            "teamId": route.team_id,
             "title": title,
             "description": description,
             "priority": priority
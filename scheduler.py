@@ -0,0 +1,191 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Worker threads running enrichment and ticket creation for queued reports.
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", 10))
+# Reports containing any of these phrases (comma-separated, case-insensitive, whole words) jump the queue.
+URGENCY_KEYWORDS = os.getenv(
+    "URGENCY_KEYWORDS",
+    "prod down,production down,outage,urgent,sev1,sev 1,p0,data loss,can't log in,cannot log in,all users,"
+    "payments failing,checkout broken,site down,500 errors",
+)
+# Optional per-channel weights as JSON, e.g. {"C0123": 3}: a weight-3 channel gets three times the share
+# of workers of a weight-1 channel while both have reports waiting.
+SCHEDULER_CHANNEL_WEIGHTS = os.getenv("SCHEDULER_CHANNEL_WEIGHTS", "")
+
+# Priority classes, served strictly in this order.
+PRIORITY_CLASSES = ("urgent", "normal")
+
+SCHEDULER_WAIT = Histogram(
+    "bugbot_scheduler_wait_seconds",
+    "Time a bug report waited in the scheduler before a worker picked it up, by priority class.",
+)
+SCHEDULER_DEPTH = Gauge(
+    "bugbot_scheduler_queue_depth",
+    "Bug reports waiting in the scheduler, by priority class.",
+)
+SCHEDULED = Counter(
+    "bugbot_scheduler_reports_total",
+    "Bug reports submitted to the scheduler, by priority class.",
+)
+for _priority in PRIORITY_CLASSES:
+    SCHEDULER_DEPTH.set(0, priority=_priority)
+
+
+def compile_urgency(keywords):
+    """
+    Compiles urgency phrases into one case-insensitive whole-word regex, or None if there are none.
+    Spaces in a phrase match any run of whitespace.
+    """
+    phrases = [k.strip() for k in keywords.split(",") if k.strip()]
+    if not phrases:
+        return None
+    alternatives = "|".join(
+        r"\s+".join(re.escape(word) for word in phrase.split())
+        for phrase in sorted(phrases, key=len, reverse=True)
+    )
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+
+_URGENCY_RE = compile_urgency(URGENCY_KEYWORDS)
+
+
+def classify(text):
+    """
+    Returns the priority class for a report: 'urgent' if it mentions an urgency phrase, else 'normal'.
+    """
+    if _URGENCY_RE is not None and text and _URGENCY_RE.search(text):
+        return "urgent"
+    return "normal"
+
+
+class Job:
+    __slots__ = ("func", "channel", "user", "priority", "tag", "seq", "enqueued_at")
+
+    def __init__(self, func, channel, user, priority, tag, seq):
+        self.func = func
+        self.channel = channel
+        self.user = user
+        self.priority = priority
+        self.tag = tag
+        self.seq = seq
+        self.enqueued_at = time.perf_counter()
+
+    def __lt__(self, other):
+        return (self.tag, self.seq) < (other.tag, other.seq)
+
+
+class Scheduler:
+    """
+    Runs submitted report jobs on a fixed pool of worker threads.
+    Urgent reports are always served before normal ones. Within a class, jobs are ordered by
+    start-time fair queuing over both the channel and the user: a job's tag is
+    max(virtual time, channel's last tag, user's last tag) + 1/weight. A channel or user that floods
+    the queue therefore only pushes back its own later reports, and a quiet channel's report is served
+    next. fair=False gives one plain FIFO queue with no urgency promotion, the order Bolt's listener
+    pool used before (for comparison).
+    """
+
+    def __init__(self, workers=SCHEDULER_WORKERS, weights=None, fair=True):
+        self.workers = workers
+        self.weights = weights or {}
+        self.fair = fair
+        self._queues = {priority: [] for priority in PRIORITY_CLASSES}
+        self._virtual_time = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._last_tag = {priority: {} for priority in PRIORITY_CLASSES}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopped = False
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"report-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, func, channel=None, user=None, text=""):
+        """
+        Queues func() to run on a worker. Returns the priority class the report was given.
+        """
+        priority = classify(text) if self.fair else "normal"
+        channel_key, user_key = ("channel", channel or "unknown"), ("user", user or "unknown")
+        with self._cond:
+            seq = next(self._seq)
+            if self.fair:
+                last_tag = self._last_tag[priority]
+                start = max(self._virtual_time[priority], last_tag.get(channel_key, 0.0), last_tag.get(user_key, 0.0))
+                tag = start + 1.0 / self.weights.get(channel, 1)
+                last_tag[channel_key] = last_tag[user_key] = tag
+            else:
+                tag = float(seq)
+            heapq.heappush(self._queues[priority], Job(func, channel, user, priority, tag, seq))
+            SCHEDULER_DEPTH.inc(priority=priority)
+            SCHEDULED.inc(priority=priority)
+            self._cond.notify()
+        return priority
+
+    def _next_job(self):
+        for priority in PRIORITY_CLASSES:
+            queue = self._queues[priority]
+            if queue:
+                job = heapq.heappop(queue)
+                self._virtual_time[priority] = max(self._virtual_time[priority], job.tag - 1.0 / self.weights.get(job.channel, 1))
+                if not queue:
+                    # Nothing waiting in this class: idle flows no longer carry a backlog.
+                    self._last_tag[priority].clear()
+                return job
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._stopped:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+            SCHEDULER_DEPTH.dec(priority=job.priority)
+            SCHEDULER_WAIT.observe(time.perf_counter() - job.enqueued_at, priority=job.priority)
+            try:
+                job.func()
+            except Exception:
+                logger.exception("Scheduled bug report failed")
+
+    def depth(self):
+        with self._cond:
+            return {priority: len(queue) for priority, queue in self._queues.items()}
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Returns the process-wide scheduler, starting its workers on first call.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                weights = json.loads(SCHEDULER_CHANNEL_WEIGHTS) if SCHEDULER_CHANNEL_WEIGHTS else {}
+                _scheduler = Scheduler(weights=weights).start()
+    return _scheduler
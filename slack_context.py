@@ -0,0 +1,210 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from slack_sdk.errors import SlackApiError
+
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# How long users.info results are reused.
+SLACK_USER_CACHE_TTL = float(os.getenv("SLACK_USER_CACHE_TTL", 3600))
+# How long a thread snapshot is trusted before new replies are fetched again (only replies newer than
+# the snapshot are requested).
+SLACK_THREAD_CACHE_TTL = float(os.getenv("SLACK_THREAD_CACHE_TTL", 30))
+# Characters of thread context passed to enrichment; the thread's first message and its latest
+# replies are kept.
+THREAD_CONTEXT_MAX_CHARS = int(os.getenv("THREAD_CONTEXT_MAX_CHARS", 6000))
+CACHE_MAX_ENTRIES = 2000
+REPLIES_PAGE_SIZE = 200
+# Retries of a rate-limited call, each after Slack's Retry-After (capped).
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_AFTER = 10.0
+
+SLACK_CACHE = Counter(
+    "bugbot_slack_cache_total",
+    "Slack context lookups, by cache (users, threads) and result (hit, miss, refresh).",
+)
+SLACK_RATE_LIMITED = Counter(
+    "bugbot_slack_rate_limited_total",
+    "Slack Web API calls answered with 429 while fetching thread context, by method.",
+)
+
+_MENTION_RE = re.compile(r"<@([UW][A-Z0-9]+)(?:\|[^>]*)?>")
+
+
+class TTLCache:
+    """
+    A small thread-safe mapping whose entries expire ttl seconds after they were set, oldest evicted
+    first beyond max_size.
+    """
+
+    def __init__(self, ttl, max_size=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns (value, age in seconds) or (None, None) if the key is missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            value, stored_at = entry
+            if now - stored_at >= self.ttl:
+                return None, None
+            return value, now - stored_at
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def peek(self, key):
+        """
+        Returns the stored value even if it has expired, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+
+_users = TTLCache(SLACK_USER_CACHE_TTL)
+_threads = TTLCache(SLACK_THREAD_CACHE_TTL)
+
+
+def call_with_backoff(method, **kwargs):
+    """
+    Calls a WebClient method, sleeping for Slack's Retry-After and retrying when it answers 429.
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        try:
+            return method(**kwargs)
+        except SlackApiError as e:
+            if e.response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                raise
+            SLACK_RATE_LIMITED.inc(method=method.__name__)
+            retry_after = float(e.response.headers.get("Retry-After", 1))
+            time.sleep(min(retry_after, MAX_RETRY_AFTER))
+
+
+def user_name(client, user_id):
+    """
+    Returns a user's display name (falling back to real name, then the id), cached for SLACK_USER_CACHE_TTL.
+    """
+    name, _ = _users.get(user_id)
+    if name is not None:
+        SLACK_CACHE.inc(cache="users", result="hit")
+        return name
+    SLACK_CACHE.inc(cache="users", result="miss")
+    try:
+        user = call_with_backoff(client.users_info, user=user_id)["user"]
+    except SlackApiError as e:
+        logger.warning(f"users.info failed for {user_id}: {e}")
+        return user_id
+    profile = user.get("profile") or {}
+    name = profile.get("display_name") or profile.get("real_name") or user.get("real_name") or user.get("name") or user_id
+    _users.set(user_id, name)
+    return name
+
+
+class ThreadSnapshot:
+    """
+    The messages of a thread fetched so far, oldest first, and the newest ts among them.
+    """
+
+    __slots__ = ("messages", "latest_ts")
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.latest_ts = messages[-1]["ts"] if messages else None
+
+
+def _fetch_replies(client, channel, thread_ts, oldest=None):
+    messages = []
+    cursor = None
+    while True:
+        params = {"channel": channel, "ts": thread_ts, "limit": REPLIES_PAGE_SIZE}
+        if oldest:
+            params["oldest"] = oldest
+        if cursor:
+            params["cursor"] = cursor
+        response = call_with_backoff(client.conversations_replies, **params)
+        messages.extend(response.get("messages", []))
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            return messages
+
+
+def thread_messages(client, channel, thread_ts):
+    """
+    Returns every message in a thread, oldest first. A snapshot younger than SLACK_THREAD_CACHE_TTL is
+    returned as is; an older one is extended with only the replies posted after it.
+    """
+    key = (channel, thread_ts)
+    snapshot, _ = _threads.get(key)
+    if snapshot is not None:
+        SLACK_CACHE.inc(cache="threads", result="hit")
+        return snapshot.messages
+    stale = _threads.peek(key)
+    if stale is not None and stale.latest_ts is not None:
+        SLACK_CACHE.inc(cache="threads", result="refresh")
+        # conversations.replies always returns the parent too; drop anything already in the snapshot.
+        newer = [m for m in _fetch_replies(client, channel, thread_ts, oldest=stale.latest_ts)
+                 if float(m["ts"]) > float(stale.latest_ts)]
+        snapshot = ThreadSnapshot(stale.messages + newer)
+    else:
+        SLACK_CACHE.inc(cache="threads", result="miss")
+        snapshot = ThreadSnapshot(sorted(_fetch_replies(client, channel, thread_ts), key=lambda m: float(m["ts"])))
+    _threads.set(key, snapshot)
+    return snapshot.messages
+
+
+def _format_message(client, message):
+    author = user_name(client, message["user"]) if message.get("user") else message.get("username", "bot")
+    text = _MENTION_RE.sub(lambda m: "@" + user_name(client, m.group(1)), message.get("text", ""))
+    return f"{author}: {text.strip()}"
+
+
+def thread_lines(client, channel, thread_ts, before_ts=None):
+    """
+    Returns the thread as "Name: text" strings, one per message, or [] if it can't be fetched.
+    Only messages before before_ts (the mention itself) are included.
+    """
+    try:
+        messages = thread_messages(client, channel, thread_ts)
+    except SlackApiError as e:
+        logger.warning(f"Could not fetch thread {thread_ts} in {channel}: {e}")
+        return []
+    if before_ts is not None:
+        messages = [m for m in messages if float(m["ts"]) < float(before_ts)]
+    return [_format_message(client, message) for message in messages if message.get("text")]
+
+
+def trim_thread(lines, max_chars=THREAD_CONTEXT_MAX_CHARS):
+    """
+    Joins thread lines into at most about max_chars: the first message is kept and the oldest replies
+    after it are dropped.
+    """
+    if not lines:
+        return ""
+    kept, size = [], len(lines[0])
+    for line in reversed(lines[1:]):
+        if size + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        size += len(line) + 1
+    omitted = len(lines) - 1 - len(kept)
+    head = [lines[0][:max_chars]] + ([f"[{omitted} earlier replies omitted]"] if omitted else [])
+    return "\n".join(head + kept[::-1])
+
@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Concurrent Socket Mode connections (Slack allows up to 10 per app). Events are spread across them,
+# so one reconnecting connection doesn't stall delivery.
+SOCKET_MODE_CONNECTIONS = int(os.getenv("SOCKET_MODE_CONNECTIONS", 2))
+# Each connection is replaced after this many seconds, staggered across slots, with the replacement
+# connected before the old one closes. 0 disables proactive rotation.
+SOCKET_MODE_MAX_AGE = float(os.getenv("SOCKET_MODE_MAX_AGE", 3600))
+# A connection still down this long after dropping (the client reconnects by itself first) is replaced.
+SOCKET_MODE_RECONNECT_GRACE = float(os.getenv("SOCKET_MODE_RECONNECT_GRACE", 30))
+# After rotation the old connection stays open this long so envelopes it already received are acked.
+SOCKET_MODE_DRAIN_SECONDS = float(os.getenv("SOCKET_MODE_DRAIN_SECONDS", 2))
+SOCKET_MODE_CHECK_INTERVAL = 5.0
+
+SOCKET_CONNECTED = Gauge(
+    "bugbot_socket_mode_connected",
+    "1 while the Socket Mode connection in this pool slot is open.",
+)
+SOCKET_EVENTS = Counter(
+    "bugbot_socket_mode_events_total",
+    "Socket Mode envelopes received, by pool slot.",
+)
+SOCKET_DELIVERY = Histogram(
+    "bugbot_socket_mode_delivery_seconds",
+    "Time from Slack's event timestamp to the envelope arriving on a pool connection, by pool slot.",
+)
+SOCKET_ROTATIONS = Counter(
+    "bugbot_socket_mode_rotations_total",
+    "Pool connections replaced, by slot and reason (max_age, unhealthy).",
+)
+
+
+class PooledConnection:
+    """
+    One SocketModeHandler in a pool slot, with the counters the pool reports as its health.
+    """
+
+    def __init__(self, slot, handler):
+        self.slot = str(slot)
+        self.handler = handler
+        self.opened_at = time.monotonic()
+        self.events = 0
+        self.last_event_at = None
+        self.down_since = None
+        self.expires_at = None
+        self.delivery = deque(maxlen=200)
+        # Runs ahead of Bolt's own listener, so it sees the envelope as soon as it is read off the socket.
+        handler.client.socket_mode_request_listeners.insert(0, self._on_request)
+
+    def _on_request(self, client, req):
+        self.events += 1
+        self.last_event_at = time.monotonic()
+        SOCKET_EVENTS.inc(slot=self.slot)
+        event = (req.payload or {}).get("event") or {}
+        event_ts = event.get("event_ts") or event.get("ts")
+        if event_ts:
+            latency = max(0.0, time.time() - float(event_ts))
+            self.delivery.append(latency)
+            SOCKET_DELIVERY.observe(latency, slot=self.slot)
+
+    def is_connected(self):
+        return self.handler.client.is_connected()
+
+    def health(self):
+        delivery = sorted(self.delivery)
+        now = time.monotonic()
+        return {
+            "slot": self.slot,
+            "connected": self.is_connected(),
+            "session_id": self.handler.client.session_id(),
+            "age_seconds": round(now - self.opened_at, 1),
+            "events": self.events,
+            "last_event_seconds_ago": round(now - self.last_event_at, 1) if self.last_event_at else None,
+            "delivery_p50_ms": round(delivery[len(delivery) // 2] * 1000, 1) if delivery else None,
+        }
+
+
+class SocketModePool:
+    """
+    Keeps `size` Socket Mode connections open for one Bolt app. All of them dispatch into the same app,
+    so listeners, middleware and Bolt's worker pool are shared. A monitor thread replaces connections
+    that exceed max_age (new one connected before the old one closes) or stay down past the grace period.
+    """
+
+    def __init__(self, app, app_token=None, size=SOCKET_MODE_CONNECTIONS, max_age=SOCKET_MODE_MAX_AGE):
+        self.app = app
+        self.app_token = app_token or os.environ["SLACK_APP_TOKEN"]
+        self.size = max(1, size)
+        self.max_age = max_age
+        self.connections = [None] * self.size
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._monitor = threading.Thread(target=self._run_monitor, name="socket-mode-pool", daemon=True)
+
+    def _open(self, slot, first=False):
+        from slack_bolt.adapter.socket_mode import SocketModeHandler
+        connection = PooledConnection(slot, SocketModeHandler(self.app, self.app_token))
+        connection.handler.connect()
+        if self.max_age:
+            # Stagger the first generation so the slots don't all turn over together.
+            max_age = self.max_age * (1 + slot / self.size) if first else self.max_age
+            connection.expires_at = connection.opened_at + max_age
+        SOCKET_CONNECTED.set(1, slot=connection.slot)
+        return connection
+
+    def connect(self):
+        """
+        Opens every slot (in parallel) and starts the monitor. Returns once all connections are up.
+        """
+        threads = [threading.Thread(target=self._fill, args=(slot,)) for slot in range(self.size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if not any(self.connections):
+            raise RuntimeError("No Socket Mode connection could be opened")
+        self._monitor.start()
+        return self
+
+    def _fill(self, slot):
+        try:
+            self.connections[slot] = self._open(slot, first=True)
+        except Exception as e:
+            logger.error(f"Socket Mode slot {slot} failed to connect: {e}")
+
+    def start(self):
+        """
+        Connects and blocks the calling thread, like SocketModeHandler.start().
+        """
+        self.connect()
+        self._closed.wait()
+
+    def rotate(self, slot, reason):
+        """
+        Replaces the connection in a slot. The replacement is connected before the old one is closed,
+        so the slot never stops receiving, and the old one gets SOCKET_MODE_DRAIN_SECONDS to ack what it
+        already received. Anything Slack still redelivers is dropped by the event_id check in dedupe.py.
+        """
+        replacement = self._open(slot)
+        with self._lock:
+            old, self.connections[slot] = self.connections[slot], replacement
+        SOCKET_ROTATIONS.inc(slot=str(slot), reason=reason)
+        logger.info(f"Rotated Socket Mode slot {slot} ({reason})")
+        if old is not None:
+            threading.Timer(SOCKET_MODE_DRAIN_SECONDS, old.handler.close).start()
+
+    def _run_monitor(self):
+        while not self._closed.wait(SOCKET_MODE_CHECK_INTERVAL):
+            now = time.monotonic()
+            for slot in range(self.size):
+                connection = self.connections[slot]
+                try:
+                    if connection is None:
+                        self.rotate(slot, "unhealthy")
+                        continue
+                    connected = connection.is_connected()
+                    SOCKET_CONNECTED.set(1 if connected else 0, slot=connection.slot)
+                    if connected:
+                        connection.down_since = None
+                    elif connection.down_since is None:
+                        connection.down_since = now
+                    if connection.down_since is not None and now - connection.down_since >= SOCKET_MODE_RECONNECT_GRACE:
+                        self.rotate(slot, "unhealthy")
+                    elif connection.expires_at is not None and now >= connection.expires_at:
+                        self.rotate(slot, "max_age")
+                except Exception as e:
+                    logger.error(f"Socket Mode slot {slot} rotation failed: {e}")
+
+    def health(self):
+        return [connection.health() for connection in self.connections if connection is not None]
+
+    def close(self):
+        self._closed.set()
+        for connection in self.connections:
+            if connection is not None:
+                connection.handler.close()
+                SOCKET_CONNECTED.set(0, slot=connection.slot)
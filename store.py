@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import threading
+
+# Local state (usage, rollups, ticket mappings) lives in SQLite files under this directory.
+DATA_DIR = os.getenv("BUGBOT_DATA_DIR", "data")
+# Postgres URL (Heroku Postgres sets it) for the state every process and dyno must agree on: seen event
+# ids, message-to-ticket records and intake rollups and digest claims. Unset keeps those in DATA_DIR too.
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+# Any fixed key: held while a new Postgres connection runs its schema, so concurrent boots don't race.
+_SCHEMA_LOCK = 0x6275676274
+
+_local = threading.local()
+
+
+def get_connection(filename, schema=None):
+    """
+    Returns this thread's SQLite connection to DATA_DIR/filename, opening it on first use.
+    Connections use WAL so readers (the Flask endpoints, the CLI) never block the bot's writes.
+    schema is an optional SQL script run once per new connection (use CREATE ... IF NOT EXISTS).
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    path = os.path.join(DATA_DIR, filename)
+    connection = connections.get(path)
+    if connection is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if schema:
+            connection.executescript(schema)
+        connections[path] = connection
+    return connection
+
+
+class PostgresConnection:
+    """
+    A psycopg2 connection used like the sqlite3 ones: execute() takes ? placeholders and returns a cursor
+    whose rows are read by column name, statements outside `with connection:` commit on their own, and a
+    `with` block is one transaction.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._connection.autocommit = True
+
+    @property
+    def closed(self):
+        return self._connection.closed
+
+    def execute(self, sql, parameters=None):
+        from psycopg2.extras import DictCursor
+
+        cursor = self._connection.cursor(cursor_factory=DictCursor)
+        cursor.execute(sql.replace("?", "%s"), parameters)
+        return cursor
+
+    def executemany(self, sql, parameters):
+        cursor = self._connection.cursor()
+        cursor.executemany(sql.replace("?", "%s"), parameters)
+        return cursor
+
+    def __enter__(self):
+        self._connection.cursor().execute("BEGIN")
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if not self._connection.closed:
+            self._connection.cursor().execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def get_shared_connection(filename, schema=None):
+    """
+    Returns this thread's connection for state shared between processes and dynos: Postgres at DATABASE_URL
+    when it is set, otherwise get_connection(filename, schema). SQL must run on both, so use
+    INSERT ... ON CONFLICT rather than INSERT OR IGNORE / OR REPLACE, DOUBLE PRECISION for timestamps,
+    and quote reserved words such as "user". A connection the server dropped is reopened on the next call.
+    """
+    if not DATABASE_URL:
+        return get_connection(filename, schema)
+    import psycopg2
+
+    connection = getattr(_local, "postgres", None)
+    if connection is None or connection.closed:
+        connection = _local.postgres = PostgresConnection(psycopg2.connect(DATABASE_URL))
+        _local.schemas = set()
+    if schema and filename not in _local.schemas:
+        with connection:
+            connection.execute("SELECT pg_advisory_xact_lock(?)", (_SCHEMA_LOCK,))
+            connection.execute(schema)
+        _local.schemas.add(filename)
+    return connection
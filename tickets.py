@@ -0,0 +1,110 @@
+import difflib
+import json
+import os
+import re
+import time
+
+from metrics import Counter
+from store import get_shared_connection
+
+# Edits whose word-level similarity to the reported text is below this are re-enriched; smaller
+# edits (typos, punctuation) leave the ticket alone.
+EDIT_SIMILARITY_THRESHOLD = float(os.getenv("EDIT_SIMILARITY_THRESHOLD", 0.85))
+
+TICKETS_DB = "tickets.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_tickets (
+    channel TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    issue_id TEXT NOT NULL,
+    url TEXT,
+    text TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    updated_at DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (channel, ts)
+);
+"""
+
+REPORT_EDITS = Counter(
+    "bugbot_report_edits_total",
+    "Edits to reported Slack messages, by outcome (minor, updated, unchanged, error).",
+)
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _connection():
+    return get_shared_connection(TICKETS_DB, SCHEMA)
+
+
+def record_ticket(channel, ts, ticket, text, fields):
+    """
+    Remembers which Linear issue a Slack message became, with the report text and the issue fields
+    (issue_input output) it was created or last updated with.
+    """
+    connection = _connection()
+    with connection:
+        connection.execute(
+            "INSERT INTO report_tickets (channel, ts, issue_id, url, text, fields, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (channel, ts) DO UPDATE SET issue_id = excluded.issue_id, "
+            "url = excluded.url, text = excluded.text, fields = excluded.fields, updated_at = excluded.updated_at",
+            (channel, ts, ticket["id"], ticket.get("url"), text, json.dumps(fields), time.time()),
+        )
+
+
+def update_fields(issue_id, fields, text=None):
+    """
+    Stores the fields (and optionally the report text) an issue now has.
+    """
+    connection = _connection()
+    with connection:
+        if text is None:
+            connection.execute("UPDATE report_tickets SET fields = ?, updated_at = ? WHERE issue_id = ?",
+                               (json.dumps(fields), time.time(), issue_id))
+        else:
+            connection.execute("UPDATE report_tickets SET fields = ?, text = ?, updated_at = ? WHERE issue_id = ?",
+                               (json.dumps(fields), text, time.time(), issue_id))
+
+
+def find_ticket(channel, ts):
+    """
+    Returns {"issue_id", "url", "text", "fields"} for the message's ticket, or None.
+    """
+    row = _connection().execute(
+        "SELECT issue_id, url, text, fields FROM report_tickets WHERE channel = ? AND ts = ?", (channel, ts)
+    ).fetchone()
+    if row is None:
+        return None
+    return {"issue_id": row["issue_id"], "url": row["url"], "text": row["text"], "fields": json.loads(row["fields"])}
+
+
+def similarity(old, new):
+    """
+    Returns how similar two texts are, from 0.0 to 1.0, comparing words and punctuation locally.
+    """
+    old_words, new_words = _WORD_RE.findall(old.lower()), _WORD_RE.findall(new.lower())
+    if not old_words and not new_words:
+        return 1.0
+    return difflib.SequenceMatcher(None, old_words, new_words, autojunk=False).ratio()
+
+
+def is_material(old, new, threshold=EDIT_SIMILARITY_THRESHOLD):
+    """
+    Returns True if an edit changes a report enough to re-enrich it.
+    """
+    return similarity(old, new) < threshold
+
+
+def changed_fields(old_fields, new_fields):
+    """
+    Returns only the entries of new_fields that differ from old_fields (label ids compared as sets).
+    """
+    changes = {}
+    for key, value in new_fields.items():
+        old = old_fields.get(key)
+        if key == "labelIds" and old is not None and sorted(old) == sorted(value):
+            continue
+        if old != value:
+            changes[key] = value
+    return changes
@@ -0,0 +1,84 @@
+import json
+import os
+import re
+
+# Plain channel messages become bug reports when they start with one of these prefixes
+# or contain one of these keywords (comma-separated, case-insensitive).
+BUG_TRIGGER_PREFIXES = os.getenv("BUG_TRIGGER_PREFIXES", "bug!")
+BUG_TRIGGER_KEYWORDS = os.getenv("BUG_TRIGGER_KEYWORDS", "")
+# Optional per-channel overrides, as JSON: {"C0123": {"prefixes": ["bug!", "ios!"], "keywords": ["#crash"]}}.
+# A channel with empty prefixes and keywords never triggers.
+BUG_TRIGGER_CONFIG = os.getenv("BUG_TRIGGER_CONFIG", "")
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def compile_triggers(prefixes, keywords):
+    """
+    Compiles trigger prefixes and keywords into one case-insensitive regex, or None if there are none.
+    Prefixes only match at the start of the message; keywords match anywhere as whole words.
+    The prefix group is named so callers can strip it from the report text.
+    """
+    branches = []
+    if prefixes:
+        # Longest first so "bug!!" wins over "bug!".
+        alternatives = "|".join(re.escape(p) for p in sorted(prefixes, key=len, reverse=True))
+        branches.append(rf"\A\s*(?P<prefix>{alternatives})")
+    if keywords:
+        alternatives = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+        branches.append(rf"(?<!\w)(?P<keyword>{alternatives})(?!\w)")
+    if not branches:
+        return None
+    return re.compile("|".join(branches), re.IGNORECASE)
+
+
+def build_trigger_table(default_prefixes, default_keywords, channel_config=None):
+    """
+    Compiles the default trigger pattern and one pattern per configured channel.
+    Returns (default_pattern, {channel_id: pattern}).
+    """
+    default = compile_triggers(default_prefixes, default_keywords)
+    table = {}
+    for channel, config in (channel_config or {}).items():
+        table[channel] = compile_triggers(
+            config.get("prefixes", default_prefixes),
+            config.get("keywords", default_keywords),
+        )
+    return default, table
+
+
+_DEFAULT_PATTERN, _CHANNEL_PATTERNS = build_trigger_table(
+    _split(BUG_TRIGGER_PREFIXES),
+    _split(BUG_TRIGGER_KEYWORDS),
+    json.loads(BUG_TRIGGER_CONFIG) if BUG_TRIGGER_CONFIG else None,
+)
+
+
+def match_trigger(text, channel=None):
+    """
+    Checks a plain message against the triggers for its channel.
+    Returns the regex match (with a 'prefix' or 'keyword' group set) or None.
+    """
+    pattern = _CHANNEL_PATTERNS.get(channel, _DEFAULT_PATTERN)
+    if pattern is None or not text:
+        return None
+    return pattern.search(text)
+
+
+def strip_trigger(text, match):
+    """
+    Removes a matched prefix from the start of the message; keyword matches leave the text as is.
+    """
+    if match.group("prefix") is not None:
+        return text[match.end():].strip()
+    return text.strip()
+
+
+# Quick test of the trigger matching.
+if __name__ == "__main__":
+    samples = ["bug! checkout button does nothing", "  BUG! login loops", "no bugs here", "debug! not a trigger"]
+    for sample in samples:
+        match = match_trigger(sample)
+        print(f"{sample!r}: {strip_trigger(sample, match) if match else None!r}")
@@ -0,0 +1,183 @@
+import argparse
+import json
+import logging
+import time
+
+from store import get_connection
+
+logger = logging.getLogger(__name__)
+
+USAGE_DB = "usage.sqlite3"
+
+# USD per 1M tokens: (prompt, cached prompt, completion). Dated model names match by prefix.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+DIMENSIONS = ("channel", "user", "model")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_events (
+    ts REAL NOT NULL,
+    channel TEXT NOT NULL,
+    user TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS usage_rollups (
+    day TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, dimension, key)
+);
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO usage_rollups (day, dimension, key, requests, prompt_tokens, completion_tokens, cached_tokens, cost_usd)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (day, dimension, key) DO UPDATE SET
+    requests = requests + 1,
+    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+    completion_tokens = completion_tokens + excluded.completion_tokens,
+    cached_tokens = cached_tokens + excluded.cached_tokens,
+    cost_usd = cost_usd + excluded.cost_usd
+"""
+
+
+def _connection():
+    return get_connection(USAGE_DB, SCHEMA)
+
+
+def model_prices(model):
+    """
+    Returns the (prompt, cached prompt, completion) USD prices per 1M tokens for a model name, or None if unknown.
+    """
+    for prefix, prices in MODEL_PRICES.items():
+        if model.startswith(prefix):
+            return prices
+    return None
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens=0):
+    """
+    Returns the USD cost of one completion; cached prompt tokens are billed at the cached rate.
+    Unknown models cost 0 so they still show up in token counts.
+    """
+    prices = model_prices(model)
+    if not prices:
+        return 0.0
+    prompt_price, cached_price, completion_price = prices
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * prompt_price + cached_tokens * cached_price + completion_tokens * completion_price) / 1_000_000
+
+
+def record_usage(model, prompt_tokens, completion_tokens, cached_tokens=0, channel=None, user=None, ts=None):
+    """
+    Stores one completion's token counts and folds them into the per-day rollups for its
+    channel, user and model in the same transaction.
+    """
+    ts = ts if ts is not None else time.time()
+    channel = channel or "unknown"
+    user = user or "unknown"
+    cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+    day = time.strftime("%Y-%m-%d", time.gmtime(ts))
+    counts = (prompt_tokens, completion_tokens, cached_tokens, cost)
+
+    connection = _connection()
+    with connection:
+        connection.execute(
+            "INSERT INTO usage_events VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (ts, channel, user, model, prompt_tokens, completion_tokens, cached_tokens, cost),
+        )
+        connection.executemany(
+            _UPSERT_ROLLUP,
+            [(day, "channel", channel) + counts, (day, "user", user) + counts, (day, "model", model) + counts],
+        )
+
+
+def record_completion_usage(response, channel=None, user=None):
+    """
+    Records the usage block of an OpenAI chat completion response.
+    Accounting must never fail a bug report, so errors are logged and swallowed.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    try:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        record_usage(
+            response.model,
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            cached_tokens,
+            channel=channel,
+            user=user,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to record token usage: {e}")
+
+
+def query_usage(dimension="channel", days=30, now=None):
+    """
+    Returns token and cost totals per channel, user or model over the last `days` UTC days
+    (including today), most expensive first. Reads only the daily rollups, never raw events.
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"dimension must be one of {', '.join(DIMENSIONS)}")
+    now = now if now is not None else time.time()
+    since = time.strftime("%Y-%m-%d", time.gmtime(now - (days - 1) * 86400))
+    rows = _connection().execute(
+        """
+        SELECT key, SUM(requests) AS requests, SUM(prompt_tokens) AS prompt_tokens,
+               SUM(completion_tokens) AS completion_tokens, SUM(cached_tokens) AS cached_tokens,
+               SUM(cost_usd) AS cost_usd
+        FROM usage_rollups
+        WHERE dimension = ? AND day >= ?
+        GROUP BY key
+        ORDER BY cost_usd DESC, key
+        """,
+        (dimension, since),
+    ).fetchall()
+    return [
+        {
+            dimension: row["key"],
+            "requests": row["requests"],
+            "prompt_tokens": row["prompt_tokens"],
+            "completion_tokens": row["completion_tokens"],
+            "cached_tokens": row["cached_tokens"],
+            "cost_usd": round(row["cost_usd"], 6),
+        }
+        for row in rows
+    ]
+
+
+# CLI: python usage.py --by channel --days 7 [--json]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show OpenAI token usage and cost from the local usage store.")
+    parser.add_argument("--by", choices=DIMENSIONS, default="channel")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = query_usage(args.by, args.days)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.by:<28}{'requests':>10}{'prompt':>12}{'cached':>10}{'completion':>12}{'cost USD':>12}")
+        for row in results:
+            print(
+                f"{row[args.by]:<28}{row['requests']:>10}{row['prompt_tokens']:>12}{row['cached_tokens']:>10}"
+                f"{row['completion_tokens']:>12}{row['cost_usd']:>12.4f}"
+            )
@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+import time
+
+from clients import LINEAR_API_URL, get_linear_session, get_openai_client
+import routing_config
+from metrics import READY, record_upstream, track_stage
+
+logger = logging.getLogger(__name__)
+
+# Set to false to skip the boot warm-up (the bot then reports ready immediately).
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Upper bound for each warm-up step; a slow upstream must not hold readiness forever.
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 15))
+
+TEAM_METADATA_QUERY = """
+query TeamMetadata($teamId: String!) {
+  team(id: $teamId) {
+    id
+    name
+    members { nodes { id name displayName active } }
+    labels(first: 250) { nodes { id name } }
+  }
+  issueLabels(first: 250, filter: { team: { null: true } }) { nodes { id name } }
+}
+"""
+
+# Linear team members and labels (the team's own plus workspace ones) by lower-cased name, per team id:
+# {team_id: {"users": {...}, "labels": {...}}}. Filled in by prefetch_linear_metadata(); a ticket only
+# resolves names against its own team's entry (see team_metadata), since Linear rejects another team's
+# labels and assignees.
+LINEAR_METADATA = {}
+
+_ready = threading.Event()
+_status = {"state": "idle", "steps": {}}
+_status_lock = threading.Lock()
+
+
+def _set_step(step, result):
+    with _status_lock:
+        _status["steps"][step] = result
+
+
+def warm_openai():
+    """
+    Builds the OpenAI client and opens a pooled TLS connection with a cheap model lookup.
+    """
+    client = get_openai_client()
+    try:
+        client.with_options(timeout=WARMUP_TIMEOUT, max_retries=0).models.retrieve("gpt-4o")
+    except Exception as e:
+        record_upstream("openai", getattr(e, "status_code", None) or "error")
+        raise
+    record_upstream("openai", 200)
+
+
+def _team_metadata(api_key, team_id):
+    try:
+        response = get_linear_session().post(
+            LINEAR_API_URL,
+            headers={"Content-Type": "application/json", "Authorization": api_key},
+            json={"query": TEAM_METADATA_QUERY, "variables": {"teamId": team_id}},
+            timeout=WARMUP_TIMEOUT,
+        )
+    except Exception:
+        record_upstream("linear", "error")
+        raise
+    record_upstream("linear", response.status_code)
+    result = response.json()
+    if "errors" in result:
+        raise Exception(f"Linear API error: {result['errors']}")
+    return result.get("data") or {}
+
+
+def team_metadata(team_id):
+    """
+    Returns the prefetched {"users", "labels"} name-to-id maps for a Linear team, empty if it isn't loaded.
+    """
+    return LINEAR_METADATA.get(team_id) or {"users": {}, "labels": {}}
+
+
+def prefetch_linear_metadata(team_ids=None):
+    """
+    Opens the pooled Linear connection and loads the members and labels of each team in team_ids
+    (default: every team in the routing config) into LINEAR_METADATA, so create_linear_ticket can
+    resolve names the routes don't know. Returns the number of users and labels loaded.
+    """
+    api_key = os.getenv("LINEAR_API_KEY")
+    team_ids = routing_config.current().team_ids() if team_ids is None else team_ids
+    if not api_key or not team_ids:
+        raise ValueError("LINEAR_API_KEY and a team (LINEAR_TEAM_ID or the routing config) must be set "
+                         "to prefetch Linear metadata.")
+    loaded_users = loaded_labels = 0
+    for team_id in team_ids:
+        data = _team_metadata(api_key, team_id)
+        team = data.get("team") or {}
+        users, labels = {}, {}
+        for member in (team.get("members") or {}).get("nodes", []):
+            if member.get("active") is False:
+                continue
+            for name in (member.get("name"), member.get("displayName")):
+                if name:
+                    users.setdefault(name.lower(), member["id"])
+        # The team's own labels first, so they win over a workspace label of the same name.
+        for label in (team.get("labels") or {}).get("nodes", []) + (data.get("issueLabels") or {}).get("nodes", []):
+            labels.setdefault(label["name"].lower(), label["id"])
+        # One assignment per team, so a reader sees either the old entry or the complete new one.
+        LINEAR_METADATA[team_id] = {"users": users, "labels": labels}
+        loaded_users += len(users)
+        loaded_labels += len(labels)
+    return loaded_users, loaded_labels
+
+
+def prefetch_added_teams(previous, table):
+    """
+    Routing config reload callback: loads metadata for teams the new config routes to that aren't loaded yet.
+    """
+    added = [team_id for team_id in table.team_ids() if team_id not in LINEAR_METADATA]
+    if added:
+        prefetch_linear_metadata(added)
+
+
+def warm_imports():
+    """
+    Imports the attachment and packing modules (Pillow, NumPy) that app.py only loads on first use.
+    """
+    import attachments
+    import packing
+
+
+WARMUP_STEPS = {
+    "openai": warm_openai,
+    "linear": prefetch_linear_metadata,
+    "imports": warm_imports,
+}
+
+
+def _run_step(step, func):
+    start = time.perf_counter()
+    try:
+        with track_stage(f"warmup_{step}"):
+            func()
+        _set_step(step, {"ok": True, "seconds": round(time.perf_counter() - start, 3)})
+    except Exception as e:
+        logger.warning(f"Warm-up step {step!r} failed: {e}")
+        _set_step(step, {"ok": False, "seconds": round(time.perf_counter() - start, 3), "error": str(e)})
+
+
+def warm_up():
+    """
+    Runs every warm-up step concurrently and marks the bot ready when they have all finished.
+    A failed step is logged and reported by status() but doesn't block readiness; that upstream
+    simply starts cold.
+    """
+    with _status_lock:
+        _status["state"] = "warming"
+    threads = [
+        threading.Thread(target=_run_step, args=(step, func), name=f"warmup-{step}", daemon=True)
+        for step, func in WARMUP_STEPS.items()
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + WARMUP_TIMEOUT
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    with _status_lock:
+        for step in WARMUP_STEPS:
+            _status["steps"].setdefault(step, {"ok": False, "error": "timed out"})
+        _status["state"] = "ready"
+    READY.set(1)
+    _ready.set()
+
+
+def start_warm_up():
+    """
+    Starts warm_up() in a background thread (or marks the bot ready at once when WARMUP_ENABLED is off).
+    Teams added by later routing config reloads get their metadata loaded as soon as the reload happens.
+    """
+    routing_config.on_reload(prefetch_added_teams)
+    if not WARMUP_ENABLED:
+        with _status_lock:
+            _status["state"] = "ready"
+        READY.set(1)
+        _ready.set()
+        return None
+    thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout=None):
+    return _ready.wait(timeout)
+
+
+def status():
+    """
+    Returns the warm-up state ('idle', 'warming' or 'ready') and per-step results, for the health endpoint.
+    """
+    with _status_lock:
+        return {"state": _status["state"], "steps": {step: dict(result) for step, result in _status["steps"].items()}}
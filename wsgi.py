@@ -0,0 +1,42 @@
+import os
+
+# HTTP Events API entry point: Slack POSTs events to /slack/events and any number of worker processes
+# (and dynos) can serve them, instead of the single Socket Mode process started by `python app.py`.
+#   gunicorn wsgi:application          (settings in gunicorn.conf.py)
+# Set the app's Event Subscriptions Request URL to https://<host>/slack/events.
+
+# Redeliveries can reach any worker, so event ids are shared rather than kept per process: in SQLite under
+# BUGBOT_DATA_DIR, or in Postgres at DATABASE_URL (with ticket records and digest claims) across dynos.
+os.environ.setdefault("EVENT_DEDUPE_BACKEND", "sqlite")
+
+import app as bot
+import intake
+import routing_config
+import routing_index
+from warmup import start_warm_up
+
+# Warm upstream connections and prefetch Linear metadata while this worker finishes booting.
+start_warm_up()
+# Every worker checks for due intake digests; claiming each period in the shared store means only one posts it.
+intake.start_digests(bot.app.client, names=bot.assignee_names)
+# Each worker reloads the channel routing config when the file changes.
+routing_config.start_watching()
+# Each worker keeps its assignee routing index in step with Linear's completed issues.
+routing_index.start_sync()
+
+from flask import request
+from slack_bolt.adapter.flask import SlackRequestHandler
+
+slack_handler = SlackRequestHandler(bot.app)
+application = bot.create_flask_app()
+
+
+@application.route("/slack/events", methods=["POST"])
+def slack_events():
+    # Bolt verifies the request signature (SLACK_SIGNING_SECRET), answers url_verification, and acks
+    # before running listeners on its own worker threads, so Slack gets its 200 within the 3s limit.
+    return slack_handler.handle(request)
+
+
+# A worker with an invalid bot token fails to boot, as `python app.py` would.
+bot.wait_for_slack_auth()